@@ -0,0 +1,40 @@
+package com.schedulus.algorithm.api.v1;
+
+import java.util.IdentityHashMap;
+import java.util.List;
+import java.util.Map;
+
+import com.schedulus.algorithm.constraintsolver.domain.Lesson;
+import com.schedulus.algorithm.constraintsolver.domain.ScorePoint;
+import com.schedulus.algorithm.constraintsolver.domain.Timetable;
+
+/**
+ * Compact encoding of a solved timetable: each lesson's timeslot and room
+ * as indexes into the problem's lists (-1 when unassigned), in problem order,
+ * and the best score over solving time.
+ */
+public record CompactSolution(String score, int[] lessonTimeslot, int[] lessonRoom,
+                              List<ScorePoint> scoreTrajectory) {
+
+    public static CompactSolution of(Timetable solution) {
+        Map<Object, Integer> timeslotIndexes = indexes(solution.getTimeslots());
+        Map<Object, Integer> roomIndexes = indexes(solution.getRooms());
+        List<Lesson> lessons = solution.getLessons();
+        int[] lessonTimeslot = new int[lessons.size()];
+        int[] lessonRoom = new int[lessons.size()];
+        for (int i = 0; i < lessons.size(); i++) {
+            lessonTimeslot[i] = timeslotIndexes.getOrDefault(lessons.get(i).getTimeslot(), -1);
+            lessonRoom[i] = roomIndexes.getOrDefault(lessons.get(i).getRoom(), -1);
+        }
+        String score = solution.getScore() != null ? solution.getScore().toString() : null;
+        return new CompactSolution(score, lessonTimeslot, lessonRoom, solution.getScoreTrajectory());
+    }
+
+    private static Map<Object, Integer> indexes(List<?> values) {
+        Map<Object, Integer> indexes = new IdentityHashMap<>();
+        for (int i = 0; i < values.size(); i++) {
+            indexes.put(values.get(i), i);
+        }
+        return indexes;
+    }
+}
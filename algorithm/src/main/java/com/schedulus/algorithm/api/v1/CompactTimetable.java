@@ -0,0 +1,81 @@
+package com.schedulus.algorithm.api.v1;
+
+import java.time.DayOfWeek;
+import java.time.LocalTime;
+import java.util.ArrayList;
+import java.util.List;
+
+import com.schedulus.algorithm.constraintsolver.domain.Lesson;
+import com.schedulus.algorithm.constraintsolver.domain.Room;
+import com.schedulus.algorithm.constraintsolver.domain.Timeslot;
+import com.schedulus.algorithm.constraintsolver.domain.Timetable;
+
+/**
+ * Compact, column-wise encoding of a timetable problem (exchanged as CBOR).
+ * Strings are interned in {@code strings} and referenced by index; timeslots
+ * and rooms are referenced by index, with -1 for none; missing numbers are
+ * NaN; times are minutes since midnight and days are ISO day numbers
+ * (1 = Monday).
+ */
+public record CompactTimetable(
+        List<String> strings,
+        int[] timeslotDay,
+        int[] timeslotStart,
+        int[] timeslotEnd,
+        double[] timeslotPreference,
+        int[] roomName,
+        int[] roomCapacity,
+        List<String> lessonId,
+        int[] lessonSubject,
+        int[] lessonTeacher,
+        int[] lessonGroup,
+        int[] lessonDuration,
+        double[] lessonDifficulty,
+        double[] lessonSatisfaction,
+        boolean[] lessonPinned,
+        int[] lessonPinnedTimeslot,
+        int[] lessonPinnedRoom,
+        int[] lessonTimeslot,
+        int[] lessonRoom,
+        List<List<Integer>> lessonAllowedTimeslots) {
+
+    public Timetable toTimetable() {
+        List<Timeslot> timeslots = new ArrayList<>(timeslotDay.length);
+        for (int i = 0; i < timeslotDay.length; i++) {
+            timeslots.add(new Timeslot(DayOfWeek.of(timeslotDay[i]), time(timeslotStart[i]), time(timeslotEnd[i]),
+                    number(timeslotPreference[i])));
+        }
+
+        List<Room> rooms = new ArrayList<>(roomName.length);
+        for (int i = 0; i < roomName.length; i++) {
+            rooms.add(new Room(strings.get(roomName[i]), roomCapacity[i]));
+        }
+
+        List<Lesson> lessons = new ArrayList<>(lessonId.size());
+        for (int i = 0; i < lessonId.size(); i++) {
+            Lesson lesson = new Lesson(lessonId.get(i), strings.get(lessonSubject[i]),
+                    strings.get(lessonTeacher[i]), strings.get(lessonGroup[i]),
+                    number(lessonDifficulty[i]), number(lessonSatisfaction[i]), lessonDuration[i]);
+            lesson.setPinned(lessonPinned[i]);
+            lesson.setPinnedTimeslotIndex(index(lessonPinnedTimeslot[i]));
+            lesson.setPinnedRoomIndex(index(lessonPinnedRoom[i]));
+            lesson.setTimeslotIndex(index(lessonTimeslot[i]));
+            lesson.setRoomIndex(index(lessonRoom[i]));
+            lesson.setAllowedTimeslotIndexes(lessonAllowedTimeslots.get(i));
+            lessons.add(lesson);
+        }
+        return new Timetable(timeslots, rooms, lessons);
+    }
+
+    private static LocalTime time(int minutes) {
+        return LocalTime.of(minutes / 60, minutes % 60);
+    }
+
+    private static Integer index(int value) {
+        return value >= 0 ? value : null;
+    }
+
+    private static Double number(double value) {
+        return Double.isNaN(value) ? null : value;
+    }
+}
@@ -0,0 +1,57 @@
+package com.schedulus.algorithm.api.v1;
+
+import java.util.ArrayList;
+import java.util.List;
+
+import com.schedulus.algorithm.constraintsolver.domain.ScorePoint;
+import ai.timefold.solver.core.api.score.Score;
+
+/**
+ * Records the best score of one solve over solving time.
+ * <p>
+ * A point closer than 1% of the elapsed time to the point before the latest
+ * one replaces the latest, so a long solve keeps about one point per 1% of
+ * its duration (log-spaced) rather than one per improvement.
+ */
+final class ScoreTrajectory {
+
+    private final long startNanos = System.nanoTime();
+    private final List<ScorePoint> points = new ArrayList<>();
+    private boolean finished;
+
+    /** Records a new best score after the given solving time. */
+    synchronized void record(long millisSpent, Score<?> score) {
+        if (finished || score == null) {
+            return;
+        }
+        ScorePoint point = new ScorePoint(millisSpent, score.toString());
+        int last = points.size() - 1;
+        if (last >= 1 && millisSpent - points.get(last - 1).millis() <= points.get(last - 1).millis() / 100) {
+            points.set(last, point);
+        } else {
+            points.add(point);
+        }
+    }
+
+    /** Records a new best score, timed from the creation of this trajectory. */
+    void record(Score<?> score) {
+        record(elapsedMillis(), score);
+    }
+
+    /**
+     * Ends recording with the final best score and returns the trajectory.
+     * Best solution events still in flight are dropped.
+     */
+    synchronized List<ScorePoint> finish(Score<?> finalScore) {
+        if (finalScore != null && (points.isEmpty()
+                || !points.get(points.size() - 1).score().equals(finalScore.toString()))) {
+            record(elapsedMillis(), finalScore);
+        }
+        finished = true;
+        return List.copyOf(points);
+    }
+
+    private long elapsedMillis() {
+        return (System.nanoTime() - startNanos) / 1_000_000;
+    }
+}
@@ -1,15 +1,31 @@
 package com.schedulus.algorithm.api.v1;
 
+import java.time.Duration;
+import java.util.Collections;
+import java.util.LinkedHashMap;
+import java.util.Map;
 import java.util.UUID;
+import java.util.concurrent.ConcurrentHashMap;
 import java.util.concurrent.ExecutionException;
 
 import com.schedulus.algorithm.constraintsolver.domain.Timetable;
+import ai.timefold.solver.core.api.solver.Solver;
+import ai.timefold.solver.core.api.solver.SolverConfigOverride;
+import ai.timefold.solver.core.api.solver.SolverFactory;
 import ai.timefold.solver.core.api.solver.SolverJob;
 import ai.timefold.solver.core.api.solver.SolverManager;
+import ai.timefold.solver.core.config.solver.SolverConfig;
+import ai.timefold.solver.core.config.solver.termination.TerminationConfig;
 import org.springframework.beans.factory.annotation.Autowired;
+import org.springframework.http.HttpStatus;
+import org.springframework.http.MediaType;
+import org.springframework.web.bind.annotation.DeleteMapping;
+import org.springframework.web.bind.annotation.PathVariable;
 import org.springframework.web.bind.annotation.PostMapping;
 import org.springframework.web.bind.annotation.RequestBody;
 import org.springframework.web.bind.annotation.RequestMapping;
+import org.springframework.web.bind.annotation.RequestParam;
+import org.springframework.web.bind.annotation.ResponseStatus;
 import org.springframework.web.bind.annotation.RestController;
 
 @RestController
@@ -19,18 +35,114 @@ public class TimetableController {
     @Autowired
     private SolverManager<Timetable, UUID> solverManager;
 
+    @Autowired
+    private SolverConfig solverConfig;
+
+    // Seeds are chosen by clients, so only the most recently used factories are kept
+    private static final int SEEDED_SOLVER_FACTORY_CACHE_SIZE = 16;
+
+    // Solver factories per random seed, built lazily for portfolio solves
+    private final Map<Long, SolverFactory<Timetable>> seededSolverFactories = Collections.synchronizedMap(
+            new LinkedHashMap<>(SEEDED_SOLVER_FACTORY_CACHE_SIZE, 0.75f, true) {
+                @Override
+                protected boolean removeEldestEntry(Map.Entry<Long, SolverFactory<Timetable>> eldest) {
+                    return size() > SEEDED_SOLVER_FACTORY_CACHE_SIZE;
+                }
+            });
+
+    // Running seeded solves by problem ID, so they can be terminated like SolverManager jobs
+    private final Map<UUID, Solver<Timetable>> seededSolvers = new ConcurrentHashMap<>();
+
     @PostMapping
-    public Timetable solve(@RequestBody Timetable problem) {
-        UUID problemId = UUID.randomUUID();
-        // Submit the problem to start solving
-        SolverJob<Timetable, UUID> solverJob = solverManager.solve(problemId, problem);
+    public Timetable solve(@RequestBody Timetable problem,
+                           @RequestParam(required = false) Long timeLimitSeconds,
+                           @RequestParam(required = false) Long randomSeed,
+                           @RequestParam(required = false) UUID problemId) {
+        return solveTimetable(problem, timeLimitSeconds, randomSeed, problemId);
+    }
+
+    /**
+     * Same solve with the compact wire format: interned, index-based problem
+     * in and assignment indexes out, both CBOR-encoded.
+     */
+    @PostMapping(consumes = MediaType.APPLICATION_CBOR_VALUE, produces = MediaType.APPLICATION_CBOR_VALUE)
+    public CompactSolution solveCompact(@RequestBody CompactTimetable problem,
+                                        @RequestParam(required = false) Long timeLimitSeconds,
+                                        @RequestParam(required = false) Long randomSeed,
+                                        @RequestParam(required = false) UUID problemId) {
+        return CompactSolution.of(solveTimetable(problem.toTimetable(), timeLimitSeconds, randomSeed, problemId));
+    }
+
+    /**
+     * Terminate a running solve early, e.g. a portfolio member the caller no
+     * longer waits for. Its request then returns the best solution so far.
+     * Unknown or finished problem IDs are ignored.
+     */
+    @DeleteMapping("/{problemId}")
+    @ResponseStatus(HttpStatus.NO_CONTENT)
+    public void terminate(@PathVariable UUID problemId) {
+        Solver<Timetable> solver = seededSolvers.get(problemId);
+        if (solver != null) {
+            solver.terminateEarly();
+        } else {
+            solverManager.terminateEarly(problemId);
+        }
+    }
+
+    private Timetable solveTimetable(Timetable problem, Long timeLimitSeconds, Long randomSeed, UUID problemId) {
+        if (problemId == null) {
+            problemId = UUID.randomUUID();
+        }
+        SolverConfigOverride<Timetable> configOverride = buildConfigOverride(timeLimitSeconds);
+        // Link pins, allowed timeslots and the orchestrator's constructed solution
+        problem.resolveLessonIndexes();
+        ScoreTrajectory trajectory = new ScoreTrajectory();
+
         Timetable solution;
-        try {
-            // Wait until the solving ends
-            solution = solverJob.getFinalBestSolution();
-        } catch (InterruptedException | ExecutionException e) {
-            throw new IllegalStateException("Solving failed.", e);
+        if (randomSeed != null) {
+            // The seed is part of the solver config, which SolverConfigOverride cannot change, so seeded
+            // solves bypass the shared SolverManager; they are registered for terminate() meanwhile
+            SolverFactory<Timetable> solverFactory = seededSolverFactories.computeIfAbsent(randomSeed,
+                    seed -> SolverFactory.create(new SolverConfig(solverConfig).withRandomSeed(seed)));
+            Solver<Timetable> solver = solverFactory.buildSolver(configOverride);
+            solver.addEventListener(event -> trajectory.record(event.getTimeMillisSpent(), event.getNewBestScore()));
+            if (seededSolvers.putIfAbsent(problemId, solver) != null) {
+                throw new IllegalStateException("Problem " + problemId + " is already being solved.");
+            }
+            try {
+                solution = solver.solve(problem);
+            } finally {
+                seededSolvers.remove(problemId);
+            }
+        } else {
+            // Submit the problem to start solving
+            SolverJob<Timetable, UUID> solverJob = solverManager.solveBuilder()
+                    .withProblemId(problemId)
+                    .withProblem(problem)
+                    .withConfigOverride(configOverride)
+                    .withBestSolutionConsumer(bestSolution -> trajectory.record(bestSolution.getScore()))
+                    .run();
+            try {
+                // Wait until the solving ends
+                solution = solverJob.getFinalBestSolution();
+            } catch (InterruptedException | ExecutionException e) {
+                throw new IllegalStateException("Solving failed.", e);
+            }
         }
+        solution.setScoreTrajectory(trajectory.finish(solution.getScore()));
         return solution;
     }
-}
\ No newline at end of file
+
+    private SolverConfigOverride<Timetable> buildConfigOverride(Long timeLimitSeconds) {
+        SolverConfigOverride<Timetable> configOverride = new SolverConfigOverride<>();
+        if (timeLimitSeconds == null) {
+            return configOverride;
+        }
+        // Keep the configured best-score limit, only replace the time budget
+        TerminationConfig terminationConfig = solverConfig.getTerminationConfig() != null
+                ? solverConfig.getTerminationConfig().copyConfig()
+                : new TerminationConfig();
+        return configOverride.withTerminationConfig(
+                terminationConfig.withSpentLimit(Duration.ofSeconds(timeLimitSeconds)));
+    }
+}
@@ -1,7 +1,14 @@
 package com.schedulus.algorithm.constraintsolver.domain;
 
+import java.util.List;
+
+import com.fasterxml.jackson.annotation.JsonIgnore;
+import com.fasterxml.jackson.annotation.JsonProperty;
+
 import ai.timefold.solver.core.api.domain.entity.PlanningEntity;
+import ai.timefold.solver.core.api.domain.entity.PlanningPin;
 import ai.timefold.solver.core.api.domain.lookup.PlanningId;
+import ai.timefold.solver.core.api.domain.valuerange.ValueRangeProvider;
 import ai.timefold.solver.core.api.domain.variable.PlanningVariable;
 
 @PlanningEntity
@@ -26,11 +33,27 @@ public class Lesson {
     private Timeslot pinnedTimeslot;
     private Room pinnedRoom;
 
-    @PlanningVariable
+    @PlanningVariable(valueRangeProviderRefs = "allowedTimeslots")
     private Timeslot timeslot;
     @PlanningVariable
     private Room room;
 
+    // Timeslots this lesson may be placed in (all timeslots unless restricted)
+    private List<Timeslot> allowedTimeslots;
+
+    // Assignments from the orchestrator, as indexes into the timetable's
+    // timeslots/rooms (resolved by Timetable#resolveLessonIndexes)
+    @JsonProperty(access = JsonProperty.Access.WRITE_ONLY)
+    private Integer timeslotIndex;
+    @JsonProperty(access = JsonProperty.Access.WRITE_ONLY)
+    private Integer roomIndex;
+    @JsonProperty(access = JsonProperty.Access.WRITE_ONLY)
+    private Integer pinnedTimeslotIndex;
+    @JsonProperty(access = JsonProperty.Access.WRITE_ONLY)
+    private Integer pinnedRoomIndex;
+    @JsonProperty(access = JsonProperty.Access.WRITE_ONLY)
+    private List<Integer> allowedTimeslotIndexes;
+
     public Lesson() {
     }
 
@@ -100,6 +123,66 @@ public class Lesson {
         this.room = room;
     }
 
+    /**
+     * Lessons pinned to both a timeslot and a room are fixed facts: they keep
+     * their assignment and are excluded from search.
+     */
+    @PlanningPin
+    @JsonIgnore
+    public boolean isFixed() {
+        return pinned && pinnedTimeslot != null && pinnedRoom != null;
+    }
+
+    @ValueRangeProvider(id = "allowedTimeslots")
+    @JsonIgnore
+    public List<Timeslot> getAllowedTimeslots() {
+        return allowedTimeslots;
+    }
+
+    public void setAllowedTimeslots(List<Timeslot> allowedTimeslots) {
+        this.allowedTimeslots = allowedTimeslots;
+    }
+
+    public Integer getTimeslotIndex() {
+        return timeslotIndex;
+    }
+
+    public void setTimeslotIndex(Integer timeslotIndex) {
+        this.timeslotIndex = timeslotIndex;
+    }
+
+    public Integer getRoomIndex() {
+        return roomIndex;
+    }
+
+    public void setRoomIndex(Integer roomIndex) {
+        this.roomIndex = roomIndex;
+    }
+
+    public Integer getPinnedTimeslotIndex() {
+        return pinnedTimeslotIndex;
+    }
+
+    public void setPinnedTimeslotIndex(Integer pinnedTimeslotIndex) {
+        this.pinnedTimeslotIndex = pinnedTimeslotIndex;
+    }
+
+    public Integer getPinnedRoomIndex() {
+        return pinnedRoomIndex;
+    }
+
+    public void setPinnedRoomIndex(Integer pinnedRoomIndex) {
+        this.pinnedRoomIndex = pinnedRoomIndex;
+    }
+
+    public List<Integer> getAllowedTimeslotIndexes() {
+        return allowedTimeslotIndexes;
+    }
+
+    public void setAllowedTimeslotIndexes(List<Integer> allowedTimeslotIndexes) {
+        this.allowedTimeslotIndexes = allowedTimeslotIndexes;
+    }
+
     public Double getDifficultyWeight() {
         return difficultyWeight;
     }
@@ -0,0 +1,7 @@
+package com.schedulus.algorithm.constraintsolver.domain;
+
+/**
+ * Best score of a solve after {@code millis} of solving time.
+ */
+public record ScorePoint(long millis, String score) {
+}
@@ -2,6 +2,8 @@ package com.schedulus.algorithm.constraintsolver.domain;
 
 import java.util.List;
 
+import com.fasterxml.jackson.annotation.JsonProperty;
+
 import ai.timefold.solver.core.api.domain.solution.PlanningEntityCollectionProperty;
 import ai.timefold.solver.core.api.domain.solution.PlanningScore;
 import ai.timefold.solver.core.api.domain.solution.PlanningSolution;
@@ -12,7 +14,7 @@ import ai.timefold.solver.core.api.score.buildin.hardsoft.HardSoftScore;
 @PlanningSolution
 public class Timetable {
 
-    @ValueRangeProvider
+    // Each lesson draws its timeslots from Lesson#getAllowedTimeslots
     @ProblemFactCollectionProperty
     private List<Timeslot> timeslots;
 
@@ -26,6 +28,10 @@ public class Timetable {
     @PlanningScore
     private HardSoftScore score;
 
+    // Best score over solving time, set on the solution once solving ends
+    @JsonProperty(access = JsonProperty.Access.READ_ONLY)
+    private List<ScorePoint> scoreTrajectory;
+
     public Timetable() {
     }
 
@@ -51,4 +57,64 @@ public class Timetable {
         return score;
     }
 
+    public List<ScorePoint> getScoreTrajectory() {
+        return scoreTrajectory;
+    }
+
+    public void setScoreTrajectory(List<ScorePoint> scoreTrajectory) {
+        this.scoreTrajectory = scoreTrajectory;
+    }
+
+    /**
+     * Resolves the orchestrator's index-based lesson data against this
+     * timetable's timeslots and rooms: the allowed timeslots of each lesson,
+     * pinned values and the initial assignment. Values must be the instances
+     * of the value ranges, since rooms are compared by identity. Invalid
+     * indexes are ignored; lessons without an assignment are left for the
+     * construction heuristic.
+     */
+    public void resolveLessonIndexes() {
+        if (lessons == null || timeslots == null || rooms == null) {
+            return;
+        }
+        for (Lesson lesson : lessons) {
+            lesson.setAllowedTimeslots(timeslots);
+            List<Integer> allowedIndexes = lesson.getAllowedTimeslotIndexes();
+            if (allowedIndexes != null) {
+                List<Timeslot> allowed = allowedIndexes.stream()
+                        .filter(index -> index != null && index >= 0 && index < timeslots.size())
+                        .map(timeslots::get)
+                        .toList();
+                if (!allowed.isEmpty()) {
+                    lesson.setAllowedTimeslots(allowed);
+                }
+            }
+
+            Timeslot pinnedTimeslot = valueAt(timeslots, lesson.getPinnedTimeslotIndex());
+            Room pinnedRoom = valueAt(rooms, lesson.getPinnedRoomIndex());
+            if (pinnedTimeslot != null) {
+                lesson.setPinnedTimeslot(pinnedTimeslot);
+            }
+            if (pinnedRoom != null) {
+                lesson.setPinnedRoom(pinnedRoom);
+            }
+
+            if (lesson.isFixed()) {
+                lesson.setTimeslot(lesson.getPinnedTimeslot());
+                lesson.setRoom(lesson.getPinnedRoom());
+                continue;
+            }
+            Timeslot timeslot = valueAt(timeslots, lesson.getTimeslotIndex());
+            Room room = valueAt(rooms, lesson.getRoomIndex());
+            if (timeslot != null && room != null && lesson.getAllowedTimeslots().contains(timeslot)) {
+                lesson.setTimeslot(timeslot);
+                lesson.setRoom(room);
+            }
+        }
+    }
+
+    private static <T> T valueAt(List<T> values, Integer index) {
+        return index != null && index >= 0 && index < values.size() ? values.get(index) : null;
+    }
+
 }
\ No newline at end of file
@@ -9,6 +9,7 @@ import type {
     Timetable,
     OptimizationJob,
     OptimizationRequest,
+    LessonImportJob,
     Lesson,
     Timeslot,
     Room,
@@ -211,17 +212,32 @@ export async function removeLesson(lessonId: string): Promise<void> {
     await apiClient.delete(`/lessons/${lessonId}`);
 }
 
+// Interval between status polls of a running lesson import
+const IMPORT_POLL_INTERVAL_MS = 500;
+
 /**
  * Import lessons from XLSX.
+ *
+ * The backend imports in the background; this polls the import job
+ * until it finishes and rejects if the import failed.
  */
-export async function importLessons(file: File): Promise<Lesson[]> {
+export async function importLessons(file: File): Promise<LessonImportJob> {
     const formData = new FormData();
     formData.append('file', file);
 
-    const response = await apiClient.post<Lesson[]>('/lessons/import', formData, {
+    const response = await apiClient.post<LessonImportJob>('/lessons/import', formData, {
         headers: { 'Content-Type': 'multipart/form-data' },
     });
-    return response.data;
+
+    let job = response.data;
+    while (job.status === 'PENDING' || job.status === 'RUNNING') {
+        await new Promise((resolve) => setTimeout(resolve, IMPORT_POLL_INTERVAL_MS));
+        job = (await apiClient.get<LessonImportJob>(`/lessons/imports/${job.id}`)).data;
+    }
+    if (job.status === 'FAILED') {
+        throw new Error(job.error ?? 'Lesson import failed');
+    }
+    return job;
 }
 
 /**
@@ -56,12 +56,25 @@ export interface OptimizationJob {
     id: string;
     status: JobStatus;
     progress: number;
+    queuePosition?: number;
     startedAt: string;
     completedAt?: string;
     result?: Timetable;
     error?: string;
 }
 
+export interface LessonImportJob {
+    id: string;
+    status: JobStatus;
+    progress: number;
+    filename?: string;
+    totalRows?: number;
+    importedCount: number;
+    startedAt: string;
+    completedAt?: string;
+    error?: string;
+}
+
 // ========== Request Types ==========
 
 export interface TimeslotCreate {
@@ -0,0 +1,149 @@
+"""
+Admission control for optimization jobs.
+
+Bounds how many solves optimization jobs run at once. A job weighs as many
+run slots as the solves it runs concurrently (portfolio members, batch
+scenarios), capped at the limit. Jobs that do not fit wait in a FIFO queue
+whose length is capped, and each client may only have a limited number of
+jobs queued or running. Requests over either limit are rejected up front
+(HTTP 429) instead of piling up until every job times out.
+
+State is kept in process, so limits apply per backend worker.
+"""
+
+import asyncio
+import math
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+from config import get_settings
+from metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED
+
+settings = get_settings()
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a job cannot be admitted; carries a Retry-After hint."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Weighted concurrency limit with a bounded waiting queue and per-client quotas."""
+
+    def __init__(self, max_running: int, max_queued: int, max_per_client: int):
+        self.max_running = max(1, max_running)
+        self.max_queued = max(0, max_queued)
+        self.max_per_client = max(1, max_per_client)
+        self._queue: "OrderedDict[str, str]" = OrderedDict()  # job_id -> client
+        self._running: Set[str] = set()
+        self._clients: Dict[str, str] = {}  # job_id -> client, queued or running
+        self._weights: Dict[str, int] = {}  # job_id -> run slots, queued or running
+        self._changed = asyncio.Condition()
+        # Moving average of job run time, used for Retry-After estimates
+        self._avg_run_seconds = float(settings.admission_retry_after_seconds)
+
+    def _client_jobs(self, client: str) -> int:
+        return sum(1 for owner in self._clients.values() if owner == client)
+
+    def _running_weight(self) -> int:
+        return sum(self._weights[job_id] for job_id in self._running)
+
+    def _retry_after(self) -> int:
+        """Estimated seconds until a queue slot frees up."""
+        queued = sum(self._weights[job_id] for job_id in self._queue)
+        waves = math.ceil((queued + 1) / self.max_running)
+        return max(1, round(self._avg_run_seconds * waves))
+
+    def admit(self, job_id: str, client: str, weight: int = 1) -> Optional[int]:
+        """
+        Register a job with the controller.
+
+        Args:
+            weight: Run slots the job holds while running, i.e. its
+                concurrent solves; capped at the running limit
+
+        Returns:
+            The job's 1-based queue position, or None if it can start at once
+
+        Raises:
+            AdmissionRejectedError: If the client is over quota or the queue is full
+        """
+        if self._client_jobs(client) >= self.max_per_client:
+            ADMISSION_REJECTED.labels(reason="client_quota").inc()
+            raise AdmissionRejectedError(
+                f"Client already has {self.max_per_client} optimization jobs queued or running",
+                self._retry_after(),
+            )
+        if len(self._running) + len(self._queue) >= self.max_running + self.max_queued:
+            ADMISSION_REJECTED.labels(reason="queue_full").inc()
+            raise AdmissionRejectedError("Optimization queue is full", self._retry_after())
+
+        self._clients[job_id] = client
+        self._weights[job_id] = min(max(1, weight), self.max_running)
+        self._queue[job_id] = client
+        ADMISSION_QUEUE_DEPTH.set(len(self._queue))
+        return self.position(job_id)
+
+    def release(self, job_id: str) -> None:
+        """Forget a job that was admitted but will never run."""
+        self._queue.pop(job_id, None)
+        self._running.discard(job_id)
+        self._clients.pop(job_id, None)
+        self._weights.pop(job_id, None)
+        ADMISSION_QUEUE_DEPTH.set(len(self._queue))
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position among waiting jobs, or None if not waiting."""
+        if job_id not in self._queue:
+            return None
+        # Jobs start in queue order while they fit into the free slots
+        free = self.max_running - self._running_weight()
+        starting = 0
+        for index, queued_id in enumerate(self._queue):
+            if starting == index and self._weights[queued_id] <= free:
+                free -= self._weights[queued_id]
+                starting += 1
+            if queued_id == job_id:
+                return index + 1 - starting if index >= starting else None
+        return None
+
+    @asynccontextmanager
+    async def slot(self, job_id: str) -> AsyncIterator[None]:
+        """Wait for the job's turn, then hold a run slot until exit."""
+        loop = asyncio.get_running_loop()
+        async with self._changed:
+            try:
+                await self._changed.wait_for(
+                    lambda: self._running_weight() + self._weights[job_id] <= self.max_running
+                    and next(iter(self._queue), None) == job_id
+                )
+            except BaseException:
+                self.release(job_id)
+                self._changed.notify_all()
+                raise
+            del self._queue[job_id]
+            self._running.add(job_id)
+            ADMISSION_QUEUE_DEPTH.set(len(self._queue))
+            # Let the next job in line check whether a slot is still free
+            self._changed.notify_all()
+
+        started = loop.time()
+        try:
+            yield
+        finally:
+            elapsed = loop.time() - started
+            self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * elapsed
+            async with self._changed:
+                self.release(job_id)
+                self._changed.notify_all()
+
+
+admission = AdmissionController(
+    max_running=settings.admission_max_running_jobs,
+    max_queued=settings.admission_max_queued_jobs,
+    max_per_client=settings.admission_max_jobs_per_client,
+)
@@ -0,0 +1,285 @@
+"""
+Batch scenario optimization.
+
+Solves several variants of one base problem. ML enrichment and
+sessionization run once for the base lessons and every lesson added by a
+scenario; the scenarios are then solved with bounded parallelism, each as
+its own OptimizationJob linked to the batch.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from database import async_session_factory
+from jobs import run_job
+from models import OptimizationBatch, OptimizationJob, JobStatusEnum
+from orchestrator import orchestrator
+from problem import Lesson, Room, Session, Timeslot
+from retention import decompress_result
+from schemas import (
+    BatchOptimizationRequest,
+    BatchOptimizationResponse,
+    JobStatus,
+    ScenarioDelta,
+    ScenarioResult,
+)
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+BASE_SCENARIO_NAME = "base"
+
+
+def scenario_names(request: BatchOptimizationRequest) -> List[str]:
+    """Names of all scenarios of a batch, in solve order."""
+    names = [BASE_SCENARIO_NAME] if request.include_base else []
+    names.extend(scenario.name for scenario in request.scenarios)
+    return names
+
+
+def parallel_scenarios(request: BatchOptimizationRequest) -> int:
+    """
+    Scenarios of a batch solved at once: ``batch_max_parallel_scenarios``,
+    reduced so their solves (portfolio members each) fit the admission limit.
+    """
+    portfolio_size = request.base.portfolio.size if request.base.portfolio else 1
+    return max(1, min(
+        settings.batch_max_parallel_scenarios,
+        len(scenario_names(request)),
+        settings.admission_max_running_jobs // portfolio_size,
+    ))
+
+
+def concurrent_solves(request: BatchOptimizationRequest) -> int:
+    """Solves a batch runs at once, its weight in admission control."""
+    portfolio_size = request.base.portfolio.size if request.base.portfolio else 1
+    return parallel_scenarios(request) * portfolio_size
+
+
+def _remap_pins(
+    session: Session,
+    timeslot_map: Dict[int, int],
+    room_map: Dict[int, int],
+) -> Session:
+    """Point a session's pinned indexes at the scenario's timeslots and rooms."""
+    timeslot_index = session.pinned_timeslot_index
+    room_index = session.pinned_room_index
+    if timeslot_index is None and room_index is None:
+        return session
+    # Pins to removed timeslots or rooms are dropped
+    return session.with_pins(
+        timeslot_map.get(timeslot_index) if timeslot_index is not None else None,
+        room_map.get(room_index) if room_index is not None else None,
+    )
+
+
+def apply_scenario(
+    timeslots: List[Timeslot],
+    rooms: List[Room],
+    base_lesson_ids: List[str],
+    base_sessions: List[List[Session]],
+    delta: Optional[ScenarioDelta],
+    added_sessions: List[List[Session]],
+) -> Tuple[List[Timeslot], List[Room], List[Session]]:
+    """
+    Build a scenario's problem from the prepared base problem.
+
+    Args:
+        timeslots: Base timeslots
+        rooms: Base rooms
+        base_lesson_ids: IDs of the base lessons
+        base_sessions: Sessions of each base lesson, parallel to base_lesson_ids
+        delta: Scenario changes (None for the unmodified base problem)
+        added_sessions: Sessions of each lesson added by the scenario
+
+    Returns:
+        Tuple of (timeslots, rooms, sessions) for the scenario
+    """
+    if delta is None:
+        return timeslots, rooms, [session for sessions in base_sessions for session in sessions]
+
+    # Timeslots: replaced wholesale, or filtered by base index, then extended
+    timeslot_map: Dict[int, int] = {}
+    if delta.replace_timeslots is not None:
+        scenario_timeslots = [Timeslot.from_schema(ts) for ts in delta.replace_timeslots]
+    else:
+        removed_timeslots = set(delta.remove_timeslot_indexes)
+        scenario_timeslots = []
+        for index, ts in enumerate(timeslots):
+            if index in removed_timeslots:
+                continue
+            timeslot_map[index] = len(scenario_timeslots)
+            scenario_timeslots.append(ts)
+    scenario_timeslots.extend(Timeslot.from_schema(ts) for ts in delta.add_timeslots)
+
+    # Rooms: filtered by name, then extended
+    removed_rooms = set(delta.remove_rooms)
+    room_map: Dict[int, int] = {}
+    scenario_rooms = []
+    for index, room in enumerate(rooms):
+        if room.name in removed_rooms:
+            continue
+        room_map[index] = len(scenario_rooms)
+        scenario_rooms.append(room)
+    scenario_rooms.extend(Room.from_schema(room) for room in delta.add_rooms)
+
+    # Lessons: removed by ID, then extended with the scenario's own lessons
+    removed_lessons = set(delta.remove_lesson_ids)
+    scenario_sessions = []
+    for lesson_id, sessions in zip(base_lesson_ids, base_sessions):
+        if lesson_id in removed_lessons:
+            continue
+        scenario_sessions.extend(_remap_pins(session, timeslot_map, room_map) for session in sessions)
+    for sessions in added_sessions:
+        scenario_sessions.extend(sessions)
+
+    return scenario_timeslots, scenario_rooms, scenario_sessions
+
+
+async def run_batch(batch_id: str, request: BatchOptimizationRequest, job_ids: Dict[str, str]) -> None:
+    """
+    Background task to solve all scenarios of a batch.
+
+    Args:
+        batch_id: ID of an existing PENDING batch
+        request: The batch request
+        job_ids: Scenario name -> ID of its PENDING job
+    """
+    base = request.base
+    timeslots = [Timeslot.from_schema(ts) for ts in base.timeslots]
+    rooms = [Room.from_schema(room) for room in base.rooms]
+    base_lessons = [Lesson.from_schema(lesson) for lesson in base.lessons]
+    base_lesson_ids = [lesson.id for lesson in base_lessons]
+
+    # Lessons of all scenarios are enriched and sessionized in one pass
+    all_lessons = list(base_lessons)
+    added_ranges: Dict[str, Tuple[int, int]] = {}
+    for scenario in request.scenarios:
+        start = len(all_lessons)
+        all_lessons.extend(Lesson.from_schema(lesson) for lesson in scenario.add_lessons)
+        added_ranges[scenario.name] = (start, len(all_lessons))
+
+    await _set_batch_status(batch_id, JobStatusEnum.RUNNING)
+    prepared = asyncio.ensure_future(orchestrator.prepare_sessions(all_lessons))
+    semaphore = asyncio.Semaphore(parallel_scenarios(request))
+
+    async def run_scenario(name: str, delta: Optional[ScenarioDelta]) -> None:
+        async def solve() -> dict:
+            sessions = await prepared
+            start, end = added_ranges.get(name, (0, 0))
+            scenario_timeslots, scenario_rooms, scenario_sessions = apply_scenario(
+                timeslots,
+                rooms,
+                base_lesson_ids,
+                sessions[:len(base_lessons)],
+                delta,
+                sessions[start:end],
+            )
+            return await orchestrator.solve_prepared(
+                scenario_timeslots,
+                scenario_rooms,
+                scenario_sessions,
+                base.solver_time_limit_seconds,
+                base.portfolio,
+            )
+
+        async with semaphore:
+            await run_job(job_ids[name], solve)
+
+    scenarios: List[Tuple[str, Optional[ScenarioDelta]]] = []
+    if request.include_base:
+        scenarios.append((BASE_SCENARIO_NAME, None))
+    scenarios.extend((scenario.name, scenario) for scenario in request.scenarios)
+
+    try:
+        await asyncio.gather(*(run_scenario(name, delta) for name, delta in scenarios))
+    finally:
+        await _finish_batch(batch_id)
+
+
+async def _set_batch_status(batch_id: str, status: JobStatusEnum) -> None:
+    """Update a batch's status."""
+    async with async_session_factory() as db:
+        batch = await db.get(OptimizationBatch, uuid.UUID(batch_id))
+        if batch:
+            batch.status = status
+            await db.commit()
+
+
+async def _finish_batch(batch_id: str) -> None:
+    """Mark a batch COMPLETED, or FAILED when none of its scenarios completed."""
+    async with async_session_factory() as db:
+        batch = await db.get(OptimizationBatch, uuid.UUID(batch_id))
+        if not batch:
+            return
+        result = await db.execute(
+            select(OptimizationJob.id)
+            .where(OptimizationJob.batch_id == batch.id)
+            .where(OptimizationJob.status == JobStatusEnum.COMPLETED)
+            .limit(1)
+        )
+        completed_any = result.scalar_one_or_none() is not None
+        batch.status = JobStatusEnum.COMPLETED if completed_any else JobStatusEnum.FAILED
+        batch.completed_at = datetime.utcnow()
+        await db.commit()
+
+
+async def load_batch_response(db: AsyncSession, batch_id: uuid.UUID) -> Optional[BatchOptimizationResponse]:
+    """
+    Build the score comparison table of a batch.
+
+    Scores are read straight from the stored results' JSONB, so full
+    timetables are never loaded; only results compacted by the retention
+    sweeper are decompressed. Scenarios are ordered best score first.
+    """
+    batch = await db.get(OptimizationBatch, batch_id)
+    if not batch:
+        return None
+
+    score = OptimizationJob.result["score"]
+    result = await db.execute(
+        select(
+            OptimizationJob.id,
+            OptimizationJob.scenario_name,
+            OptimizationJob.status,
+            OptimizationJob.error,
+            score["hard_score"].as_integer(),
+            score["soft_score"].as_integer(),
+            OptimizationJob.result_compressed,
+        ).where(OptimizationJob.batch_id == batch_id)
+    )
+    scenarios = []
+    for job_id, name, status, error, hard, soft, compressed in result.all():
+        if hard is None and compressed is not None:
+            compacted_score = decompress_result(compressed).get("score") or {}
+            hard = compacted_score.get("hard_score")
+            soft = compacted_score.get("soft_score")
+        scenarios.append(ScenarioResult(
+            name=name,
+            job_id=str(job_id),
+            status=JobStatus(status.value),
+            hard_score=hard,
+            soft_score=soft,
+            error=error,
+        ))
+    scenarios.sort(key=lambda s: (
+        s.hard_score is None,
+        -(s.hard_score or 0),
+        -(s.soft_score or 0),
+        s.name,
+    ))
+
+    return BatchOptimizationResponse(
+        id=str(batch.id),
+        status=JobStatus(batch.status.value),
+        started_at=batch.started_at,
+        completed_at=batch.completed_at,
+        scenarios=scenarios,
+    )
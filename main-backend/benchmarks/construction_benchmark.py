@@ -0,0 +1,101 @@
+"""
+Benchmark: solve time to a feasible timetable, cold start vs. constructed start.
+
+Generates synthetic problems, then solves each one on a running Algorithm
+API twice per seed: once with unassigned lessons (the solver constructs
+its own initial solution) and once with the orchestrator's greedy
+construction. The Algorithm API stops as soon as the best score reaches
+its configured best-score limit (0 hard by default), so the wall time of a
+solve is the time to that target score.
+
+Usage (from main-backend/):
+    python -m benchmarks.construction_benchmark --lessons 200 400 800
+    python -m benchmarks.construction_benchmark --algorithm-url http://localhost:8081 --seeds 3
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Dict
+
+import httpx
+
+from construction import construct_initial_solution
+from problem import Lesson, Problem, Room, Timeslot
+
+DAYS = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY"]
+
+
+def generate_problem(lessons: int, seed: int) -> Problem:
+    """A synthetic problem sized by its number of lessons (one session each)."""
+    rng = random.Random(seed)
+    timeslots = [
+        Timeslot(day, f"{hour:02d}:00", f"{hour + 3:02d}:00", 1.0 if hour < 12 else 0.5)
+        for day in DAYS for hour in (8, 11, 14, 17)
+    ]
+    rooms = [Room(f"Room {i + 1}") for i in range(max(2, lessons // 15))]
+    teachers = max(2, lessons // 5)
+    groups = max(2, lessons // 6)
+    sessions = []
+    for i in range(lessons):
+        lesson = Lesson(
+            f"L{i}",
+            f"Subject {i % 50}",
+            f"Teacher {rng.randrange(teachers)}",
+            f"Group {rng.randrange(groups)}",
+            duration_hours=rng.choice([2, 3]),
+            difficulty_weight=round(rng.random(), 2),
+            satisfaction_score=round(rng.random(), 2),
+        )
+        sessions.extend(lesson.sessions())
+    return Problem(timeslots, rooms, sessions)
+
+
+def solve(client: httpx.Client, url: str, payload: Dict[str, Any], time_limit: int, seed: int):
+    start = time.perf_counter()
+    response = client.post(
+        f"{url}/timetable",
+        json=payload,
+        params={"timeLimitSeconds": time_limit, "randomSeed": seed},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start, response.json().get("score")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithm-url", default="http://localhost:8081")
+    parser.add_argument("--lessons", type=int, nargs="+", default=[100, 300, 600])
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--time-limit", type=int, default=120, help="Upper bound per solve (seconds)")
+    args = parser.parse_args()
+
+    print(f"{'lessons':>8} {'mode':>12} {'construct':>10} {'placed':>8} {'median solve':>13}  scores")
+    with httpx.Client(timeout=args.time_limit + 60) as client:
+        for size in args.lessons:
+            problem = generate_problem(size, seed=size)
+            cold = problem.to_payload()
+
+            start = time.perf_counter()
+            placed = construct_initial_solution(problem)
+            construct_seconds = time.perf_counter() - start
+
+            for mode, payload, prep in (
+                ("cold", cold, 0.0),
+                ("constructed", problem.to_payload(), construct_seconds),
+            ):
+                runs = [
+                    solve(client, args.algorithm_url, payload, args.time_limit, seed)
+                    for seed in range(args.seeds)
+                ]
+                median = statistics.median(seconds for seconds, _ in runs) + prep
+                print(
+                    f"{size:>8} {mode:>12} {prep:>9.3f}s "
+                    f"{placed if mode == 'constructed' else 0:>8} {median:>12.2f}s  "
+                    f"{', '.join(str(score) for _, score in runs)}"
+                )
+
+
+if __name__ == "__main__":
+    main()
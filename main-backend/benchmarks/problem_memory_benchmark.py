@@ -0,0 +1,142 @@
+"""
+Benchmark: memory per job of the problem preparation pipeline.
+
+Measures, with tracemalloc, the memory a job holds while its problem is
+solved (retained) and the peak while preparing it, for the typed problem
+model (``Lesson`` records -> ``Session`` views -> ``Problem`` -> compact
+encoding) against the former pipeline, which copied every lesson into a
+dict per stage (``model_dump``, one dict per session, one payload dict per
+session). The former pipeline is reproduced here as the baseline.
+
+No services are needed; problems are synthetic.
+
+Usage (from main-backend/):
+    python -m benchmarks.problem_memory_benchmark
+    python -m benchmarks.problem_memory_benchmark --lessons 1000 5000 20000
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from problem import Lesson, Problem, Room, Timeslot
+from schemas import LessonCreate, RoomCreate, TimeslotCreate
+from wire import encode_problem
+
+DAYS = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY"]
+
+
+def generate_request(lessons: int, seed: int):
+    """Timeslots, rooms and lessons as they arrive in an optimization request."""
+    rng = random.Random(seed)
+    timeslots = [
+        TimeslotCreate(day_of_week=day, start_time=f"{hour:02d}:00", end_time=f"{hour + 3:02d}:00")
+        for day in DAYS for hour in (8, 11, 14, 17)
+    ]
+    rooms = [RoomCreate(name=f"Room {i + 1}") for i in range(max(2, lessons // 15))]
+    teachers = max(2, lessons // 5)
+    groups = max(2, lessons // 6)
+    lesson_list = [
+        LessonCreate(
+            id=f"L{i}",
+            subject=f"Subject {i % 50}",
+            teacher=f"Teacher {rng.randrange(teachers)}",
+            student_group=f"Group {rng.randrange(groups)}",
+            duration_hours=rng.choice([2, 3, 4, 5, 6]),
+            difficulty_weight=round(rng.random(), 2),
+            satisfaction_score=round(rng.random(), 2),
+        )
+        for i in range(lessons)
+    ]
+    return timeslots, rooms, lesson_list
+
+
+def dict_pipeline(timeslots, rooms, lessons) -> Any:
+    """The per-stage dict pipeline: dumped lessons, copied sessions, payload dicts."""
+    lesson_dicts = [lesson.model_dump() for lesson in lessons]
+    sessions: List[Dict[str, Any]] = []
+    for lesson in lesson_dicts:
+        remaining = max(2, int(lesson["duration_hours"] or 2))
+        part_index = 1
+        while remaining > 0:
+            session_hours = 3 if remaining >= 5 or remaining == 3 else 2
+            sessions.append({
+                **lesson,
+                "id": f"{lesson['id']}-p{part_index}",
+                "duration_hours": session_hours,
+                "durationHours": session_hours,
+            })
+            remaining -= session_hours
+            part_index += 1
+    payload = {
+        "timeslots": [
+            {
+                "dayOfWeek": ts.day_of_week.value,
+                "startTime": ts.start_time,
+                "endTime": ts.end_time,
+                "preferenceBonus": ts.preference_bonus,
+            }
+            for ts in timeslots
+        ],
+        "rooms": [{"name": room.name, "capacity": room.capacity} for room in rooms],
+        "lessons": [
+            {
+                "id": session["id"],
+                "subject": session["subject"],
+                "teacher": session["teacher"],
+                "studentGroup": session["student_group"],
+                "durationHours": session["duration_hours"],
+                "difficultyWeight": session["difficulty_weight"],
+                "satisfactionScore": session["satisfaction_score"],
+                "pinned": session["pinned"],
+            }
+            for session in sessions
+        ],
+    }
+    return lesson_dicts, sessions, payload
+
+
+def typed_pipeline(timeslots, rooms, lessons) -> Any:
+    """The typed pipeline: records, session views, problem columns, compact encoding."""
+    records = [Lesson.from_schema(lesson) for lesson in lessons]
+    sessions = [session for lesson in records for session in lesson.sessions()]
+    problem = Problem(
+        [Timeslot.from_schema(ts) for ts in timeslots],
+        [Room.from_schema(room) for room in rooms],
+        sessions,
+    )
+    return records, problem, encode_problem(problem)
+
+
+def measure(pipeline: Callable, *args) -> Tuple[int, int]:
+    """(retained, peak) bytes allocated by ``pipeline``."""
+    gc.collect()
+    tracemalloc.start()
+    result = pipeline(*args)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lessons", type=int, nargs="+", default=[500, 2000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'lessons':>8} {'pipeline':>9} {'retained':>10} {'peak':>10} {'per lesson':>11}")
+    for size in args.lessons:
+        request = generate_request(size, seed=size)
+        for name, pipeline in (("dicts", dict_pipeline), ("typed", typed_pipeline)):
+            retained, peak = measure(pipeline, *request)
+            print(
+                f"{size:>8} {name:>9} {retained / 1024:>8.0f}KB {peak / 1024:>8.0f}KB "
+                f"{retained / size:>10.0f}B"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: cold start time of the main backend.
+
+Starts the API in a fresh uvicorn process repeatedly and measures, from
+process spawn:
+
+- import: time to import ``main`` (in a separate interpreter)
+- live: time until ``/health/live`` answers
+- ready: time until ``/health/ready`` answers 200
+
+The server inherits this process's environment, so point DATABASE_URL (and
+the ML Engine / Algorithm API URLs, if they are required dependencies) at
+running services, and run ``python migrate.py`` first.
+
+Usage (from main-backend/):
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --runs 10 --port 18080
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+POLL_INTERVAL_SECONDS = 0.01
+
+
+def measure_import() -> float:
+    """Seconds for a fresh interpreter to import ``main``, without startup."""
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def wait_for(client: httpx.Client, url: str, started: float, timeout: float, status: Optional[int] = None) -> float:
+    """Seconds from ``started`` until ``url`` answers (with ``status``, if given)."""
+    while time.perf_counter() - started < timeout:
+        try:
+            response = client.get(url)
+            if status is None or response.status_code == status:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(POLL_INTERVAL_SECONDS)
+    raise TimeoutError(f"{url} did not answer within {timeout}s")
+
+
+def measure_start(port: int, timeout: float) -> Dict[str, float]:
+    """Seconds from spawning uvicorn until the API is live and ready."""
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+    )
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            live = wait_for(client, f"{base_url}/health/live", started, timeout)
+            ready = wait_for(client, f"{base_url}/health/ready", started, timeout, status=200)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"live": live, "ready": ready}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    samples: Dict[str, List[float]] = {"import": [], "live": [], "ready": []}
+    for _ in range(args.runs):
+        samples["import"].append(measure_import())
+        for name, seconds in measure_start(args.port, args.timeout).items():
+            samples[name].append(seconds)
+
+    print(f"{'phase':>8} {'median':>9} {'min':>9} {'max':>9}")
+    for name, values in samples.items():
+        print(
+            f"{name:>8} {statistics.median(values) * 1000:>7.0f}ms "
+            f"{min(values) * 1000:>7.0f}ms {max(values) * 1000:>7.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+In-process caches kept consistent across backend replicas.
+
+Mutations publish typed change events with PostgreSQL ``NOTIFY`` in the
+transaction that makes the change, so events are only delivered once the
+change is committed. Every replica holds one listener connection
+(``LISTEN``) and evicts the cache entries an event affects:
+
+- ``lessons`` events (with the changed lesson IDs, or none for "any")
+  evict the lesson list and the changed lessons' ML predictions.
+- ``schedule`` events (with the changed job IDs, or none for "any")
+  evict the latest schedule and the diffs involving the changed jobs.
+
+Caches are only served while the listener is connected. The listener
+reconnects with backoff; since events may have been missed in between,
+all caches are flushed on every (re)connect and disconnect. The
+publishing replica also applies its events right after its own commit, so
+it reads its own writes without waiting for the notification.
+
+Loads that race with an invalidation are not cached: ``LocalCache.set``
+drops values loaded before the latest eviction.
+"""
+
+import asyncio
+import enum
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import async_session_factory, engine
+from metrics import CACHE_INVALIDATIONS, CACHE_LISTENER_CONNECTED, CACHE_REQUESTS
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CHANNEL = "schedulus_cache"
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+RECONNECT_MAX_SECONDS = 30.0
+# Session.info key of events to apply locally once the transaction commits
+_PENDING_EVENTS = "cache_events"
+
+MISSING = object()
+
+
+class CacheEventType(str, enum.Enum):
+    LESSONS = "lessons"
+    SCHEDULE = "schedule"
+
+
+class LocalCache:
+    """
+    A replica-local cache invalidated by change events.
+
+    Args:
+        name: Cache name in metrics
+        invalidated_by: Event types that evict entries
+        keyed_by_ids: Event IDs are cache keys; evict only those keys
+        key_ids: IDs a key depends on; events evict only the keys
+            depending on one of their IDs
+        ttl_seconds: Entries also expire after this long (None = never)
+        max_entries: Least recently used entries are evicted beyond this
+            many (None = unbounded)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        invalidated_by: Iterable[CacheEventType],
+        keyed_by_ids: bool = False,
+        key_ids: Optional[Callable[[Any], Iterable[str]]] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.name = name
+        self.invalidated_by = frozenset(invalidated_by)
+        self.keyed_by_ids = keyed_by_ids
+        self.key_ids = key_ids
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Incremented by every eviction; see set()
+        self.generation = 0
+        # Least recently used first
+        self._entries: "OrderedDict[Any, Tuple[Optional[float], Any]]" = OrderedDict()
+        cache_bus.register(self)
+
+    @property
+    def active(self) -> bool:
+        return cache_bus.connected and self.ttl_seconds != 0
+
+    def get(self, key: Any) -> Any:
+        """The cached value of ``key``, or ``MISSING``."""
+        if not self.active:
+            CACHE_REQUESTS.labels(cache=self.name, result="bypass").inc()
+            return MISSING
+        entry = self._entries.get(key)
+        if entry is None or (entry[0] is not None and entry[0] <= time.monotonic()):
+            CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+            return MISSING
+        self._entries.move_to_end(key)
+        CACHE_REQUESTS.labels(cache=self.name, result="hit").inc()
+        return entry[1]
+
+    def set(self, key: Any, value: Any, generation: int) -> None:
+        """
+        Cache ``value`` unless an eviction happened since ``generation``
+        (read before loading the value), as it may then be stale.
+        """
+        if generation != self.generation or not self.active:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_load(
+        self,
+        key: Any,
+        load: Callable[[AsyncSession], Awaitable[Any]],
+        db: AsyncSession,
+    ) -> Any:
+        """
+        The cached value of ``key``, loading it with ``load`` on a miss.
+
+        Misses are loaded from the primary database, since a lagging
+        replica could return data older than the last invalidation. While
+        the cache is inactive, ``load`` runs on ``db``.
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        if not self.active:
+            return await load(db)
+        generation = self.generation
+        async with async_session_factory() as primary:
+            value = await load(primary)
+        self.set(key, value, generation)
+        return value
+
+    def evict(self, keys: Optional[Iterable[Any]] = None) -> None:
+        """Evict ``keys``, or everything."""
+        self.generation += 1
+        if keys is None or not (self.keyed_by_ids or self.key_ids):
+            self._entries.clear()
+        elif self.key_ids is not None:
+            ids = set(keys)
+            for key in [key for key in self._entries if ids.intersection(self.key_ids(key))]:
+                del self._entries[key]
+        else:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class CacheBus:
+    """Publishes change events and applies received ones to the local caches."""
+
+    def __init__(self):
+        self.connected = False
+        self._caches: List[LocalCache] = []
+
+    def register(self, cache: LocalCache) -> None:
+        self._caches.append(cache)
+
+    def apply(self, event_type: CacheEventType, ids: Optional[List[str]] = None) -> None:
+        CACHE_INVALIDATIONS.labels(event=event_type.value).inc()
+        for cache in self._caches:
+            if event_type in cache.invalidated_by:
+                cache.evict(ids)
+
+    def flush(self, reason: str) -> None:
+        """Evict everything, for when events may have been missed."""
+        CACHE_INVALIDATIONS.labels(event=reason).inc()
+        for cache in self._caches:
+            cache.evict()
+
+    async def publish(
+        self,
+        db: AsyncSession,
+        event_type: CacheEventType,
+        ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Publish a change event in ``db``'s transaction; it is delivered to
+        all replicas when the caller commits.
+
+        Args:
+            ids: IDs of the changed records; None when unknown or many
+        """
+        ids = list(ids) if ids is not None else None
+        payload = json.dumps({"type": event_type.value, "ids": ids}, separators=(",", ":"))
+        if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+            ids = None
+            payload = json.dumps({"type": event_type.value, "ids": None}, separators=(",", ":"))
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+        db.sync_session.info.setdefault(_PENDING_EVENTS, []).append((event_type, ids))
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            event_type = CacheEventType(message["type"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Malformed cache event %r; flushing caches", payload)
+            self.flush("malformed")
+            return
+        self.apply(event_type, message.get("ids"))
+
+    async def listen(self) -> None:
+        """
+        Hold the listener connection, reconnecting with backoff until
+        cancelled. Caches are active while it is connected.
+        """
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        delay = settings.cache_listener_reconnect_seconds
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("Cache listener cannot connect, retrying in %.0fs: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+                continue
+
+            delay = settings.cache_listener_reconnect_seconds
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            try:
+                await connection.add_listener(CHANNEL, self._on_notification)
+                # Events published before LISTEN took effect were missed
+                self.flush("reconnect")
+                self._set_connected(True)
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), settings.cache_listener_keepalive_seconds)
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(
+                            connection.execute("SELECT 1"), settings.cache_listener_keepalive_seconds
+                        )
+            except (OSError, asyncpg.PostgresError, asyncio.TimeoutError) as e:
+                logger.warning("Cache listener connection lost: %s", e)
+            finally:
+                self._set_connected(False)
+                self.flush("disconnect")
+                connection.terminate()
+
+    def _set_connected(self, connected: bool) -> None:
+        self.connected = connected
+        CACHE_LISTENER_CONNECTED.set(1 if connected else 0)
+
+
+cache_bus = CacheBus()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_events(session: Session) -> None:
+    for event_type, ids in session.info.pop(_PENDING_EVENTS, ()):
+        cache_bus.apply(event_type, ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_events(session: Session) -> None:
+    session.info.pop(_PENDING_EVENTS, None)
+
+
+# Caches of main.py's read endpoints; predictions are cached by the orchestrator
+lessons_cache = LocalCache("lessons", invalidated_by=[CacheEventType.LESSONS])
+schedule_cache = LocalCache("latest_schedule", invalidated_by=[CacheEventType.SCHEDULE])
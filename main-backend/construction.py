@@ -0,0 +1,135 @@
+"""
+Greedy construction of an initial timetable.
+
+Without assignments the solver spends the first part of every budget on
+its own construction phase. ``construct_initial_solution`` places lessons
+before the problem is sent, so local search starts from a conflict-free
+(or nearly so) timetable.
+
+The heuristic is DSATUR-style graph colouring: lessons sharing a teacher
+or student group are adjacent in the conflict graph and timeslots are the
+colours. The lesson with the fewest remaining feasible timeslots is placed
+next (ties broken by degree), into the timeslot that fits its duration most
+tightly, and then into the first room free for that time (first-fit bin
+packing of room time by duration). Lessons that cannot be placed without a
+hard conflict are left for the solver.
+"""
+
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from problem import UNASSIGNED, Problem, Timeslot
+
+
+def _overlap_table(timeslots: List[Timeslot]) -> List[List[int]]:
+    """For each timeslot, the indexes of timeslots overlapping it (itself included)."""
+    by_day: Dict[str, List[int]] = defaultdict(list)
+    for index, timeslot in enumerate(timeslots):
+        by_day[timeslot.day_of_week].append(index)
+    return [
+        [
+            other for other in by_day[timeslot.day_of_week]
+            if timeslots[other].start_minute < timeslot.end_minute
+            and timeslot.start_minute < timeslots[other].end_minute
+        ]
+        for timeslot in timeslots
+    ]
+
+
+def construct_initial_solution(problem: Problem) -> int:
+    """
+    Assign the problem's sessions to timeslots and rooms.
+
+    The assignment is written to ``problem.timeslot_index``/``room_index``,
+    which the Algorithm API turns into the initial solution. Sessions that
+    are already assigned (pinned sessions) are kept where they are and
+    constrain the others; sessions only use their allowed timeslots.
+
+    Returns:
+        Number of assigned sessions
+    """
+    timeslots, sessions = problem.timeslots, problem.sessions
+    room_count = len(problem.rooms)
+    if not timeslots or not room_count or not sessions:
+        return 0
+
+    overlaps = _overlap_table(timeslots)
+    lengths = [timeslot.minutes for timeslot in timeslots]
+    preference = [timeslot.preference_bonus or 0.0 for timeslot in timeslots]
+
+    # Conflict graph over sessions sharing a teacher or a student group
+    by_resource: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    for index, session in enumerate(sessions):
+        by_resource[("teacher", session.lesson.teacher)].append(index)
+        by_resource[("group", session.lesson.student_group)].append(index)
+    neighbours: List[set] = [set() for _ in sessions]
+    for members in by_resource.values():
+        for index in members:
+            neighbours[index].update(members)
+    for index, adjacent in enumerate(neighbours):
+        adjacent.discard(index)
+
+    # Allowed timeslots each session fits in, tightest fit first
+    candidates: List[List[int]] = []
+    for index, session in enumerate(sessions):
+        needed = session.duration_hours * 60
+        allowed = problem.allowed[index]
+        fitting = [
+            t for t in (range(len(timeslots)) if allowed is None else allowed)
+            if lengths[t] >= needed
+        ]
+        fitting.sort(key=lambda t: (lengths[t] - needed, -preference[t]))
+        candidates.append(fitting)
+
+    # Timeslots a session may no longer use, and rooms taken per timeslot
+    blocked: List[set] = [set() for _ in sessions]
+    busy_rooms: List[set] = [set() for _ in timeslots]
+
+    def place(index: int, timeslot: int, room: int) -> None:
+        for other in overlaps[timeslot]:
+            busy_rooms[other].add(room)
+        for neighbour in neighbours[index]:
+            blocked[neighbour].update(overlaps[timeslot])
+        problem.timeslot_index[index] = timeslot
+        problem.room_index[index] = room
+
+    def options(index: int) -> List[int]:
+        return [
+            t for t in candidates[index]
+            if t not in blocked[index] and len(busy_rooms[t]) < room_count
+        ]
+
+    done = set()
+    unplaced = []
+    for index in range(len(sessions)):
+        timeslot, room = problem.timeslot_index[index], problem.room_index[index]
+        if timeslot != UNASSIGNED and room != UNASSIGNED:
+            place(index, timeslot, room)
+            done.add(index)
+        else:
+            unplaced.append(index)
+
+    # Saturation heap with lazy updates: fewest options first, then highest degree
+    heap = [(len(options(i)), -len(neighbours[i]), i) for i in unplaced]
+    heapq.heapify(heap)
+    placed = len(done)
+    while heap:
+        count, degree, index = heapq.heappop(heap)
+        if index in done:
+            continue
+        available = options(index)
+        if len(available) != count:
+            heapq.heappush(heap, (len(available), degree, index))
+            continue
+        done.add(index)
+        if not available:
+            continue
+        timeslot = available[0]
+        room = next(r for r in range(room_count) if r not in busy_rooms[timeslot])
+        place(index, timeslot, room)
+        placed += 1
+        for neighbour in neighbours[index]:
+            if neighbour not in done:
+                heapq.heappush(heap, (len(options(neighbour)), -len(neighbours[neighbour]), neighbour))
+    return placed
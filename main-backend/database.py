@@ -9,6 +9,7 @@ from sqlalchemy.orm import DeclarativeBase
 from typing import AsyncGenerator
 
 from config import get_settings
+from metrics import bind_db_pool
 
 settings = get_settings()
 
@@ -21,18 +22,41 @@ class Base(DeclarativeBase):
 # Create async engine with connection pooling
 engine = create_async_engine(
     settings.database_url,
-    echo=settings.debug,  # Log SQL statements in debug mode
+    echo=settings.sql_echo,
     pool_size=5,
     max_overflow=10,
     pool_pre_ping=True,  # Verify connections before use
 )
+bind_db_pool(engine.sync_engine.pool)
 
-# Session factory
+# Engine for read-only endpoints: a replica when configured, else the
+# primary's pool. Transactions are opened READ ONLY either way.
+if settings.database_read_url:
+    read_engine = create_async_engine(
+        settings.database_read_url,
+        echo=settings.sql_echo,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+    ).execution_options(postgresql_readonly=True)
+    bind_db_pool(read_engine.sync_engine.pool, "replica")
+else:
+    read_engine = engine.execution_options(postgresql_readonly=True)
+
+# True when reads may lag behind writes
+READ_REPLICA_ENABLED = bool(settings.database_read_url)
+
+# Session factories
 async_session_factory = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
+read_session_factory = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -55,18 +79,20 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def init_db() -> None:
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Initialize database tables.
+    Dependency that provides a read-only database session.
     
-    Called on application startup to ensure all tables exist.
+    Served by the read replica when one is configured, so results may lag
+    slightly behind the primary. The transaction is never committed.
+    
+    Usage in FastAPI:
+        @app.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_read_db)):
+            ...
     """
-    async with engine.begin() as conn:
-        # Import models to register them with Base
-        from models import OptimizationJob  # noqa: F401
-        
-        # Create all tables
-        await conn.run_sync(Base.metadata.create_all)
+    async with read_session_factory() as session:
+        yield session
 
 
 async def close_db() -> None:
@@ -76,3 +102,5 @@ async def close_db() -> None:
     Called on application shutdown for graceful cleanup.
     """
     await engine.dispose()
+    if READ_REPLICA_ENABLED:
+        await read_engine.dispose()
@@ -0,0 +1,113 @@
+"""
+Liveness and readiness probes.
+
+Liveness (``/health/live``) only shows that the process serves requests; it
+never touches a dependency, so an outage elsewhere does not get replicas
+restarted. Readiness (``/health/ready``) checks the database (and the read
+replica when configured), the ML Engine and the solver pool. A replica is
+ready once every dependency in ``health_required_dependencies`` is up; the
+other dependencies are reported only.
+
+Probe results are cached for ``health_probe_cache_seconds`` and concurrent
+callers share one in-flight probe, so frequent polling by load balancers
+and orchestrators costs at most one probe per dependency per interval.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import get_settings
+from database import READ_REPLICA_ENABLED, engine, read_engine
+from metrics import DEPENDENCY_UP
+from orchestrator import orchestrator
+
+settings = get_settings()
+
+
+class DependencyProbe:
+    """
+    A cached health check of one dependency.
+
+    Args:
+        name: Dependency name in responses and metrics
+        check: Coroutine function raising when the dependency is down
+    """
+
+    def __init__(self, name: str, check: Callable[[], Awaitable[None]]):
+        self.name = name
+        self._check = check
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+
+    @property
+    def required(self) -> bool:
+        return self.name in settings.health_required_dependencies
+
+    async def result(self) -> Dict[str, Any]:
+        """The latest probe result, probing when it is older than the cache period."""
+        if self._result is not None and time.monotonic() - self._checked_at < settings.health_probe_cache_seconds:
+            return self._result
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._probe())
+        # A caller that goes away must not cancel the probe others wait for
+        return await asyncio.shield(self._inflight)
+
+    async def _probe(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._check(), settings.health_probe_timeout_seconds)
+            result: Dict[str, Any] = {"status": "up"}
+        except Exception as e:
+            result = {"status": "down", "error": str(e) or type(e).__name__}
+        finally:
+            self._inflight = None
+        result["required"] = self.required
+        result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+        self._result, self._checked_at = result, time.monotonic()
+        DEPENDENCY_UP.labels(dependency=self.name).set(1 if result["status"] == "up" else 0)
+        return result
+
+
+def _database_check(db_engine: AsyncEngine) -> Callable[[], Awaitable[None]]:
+    async def check() -> None:
+        async with db_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    return check
+
+
+async def _check_solver_pool() -> None:
+    pool = orchestrator.solver_pool
+    async with httpx.AsyncClient(timeout=settings.health_probe_timeout_seconds) as client:
+        await pool.probe(client)
+    if not any(endpoint.healthy for endpoint in pool.endpoints):
+        raise RuntimeError("No healthy Algorithm API instance")
+
+
+probes: Dict[str, DependencyProbe] = {
+    probe.name: probe
+    for probe in (
+        DependencyProbe("database", _database_check(engine)),
+        *([DependencyProbe("database_replica", _database_check(read_engine))] if READ_REPLICA_ENABLED else []),
+        DependencyProbe("ml_engine", lambda: orchestrator.prediction_client.check()),
+        DependencyProbe("algorithm_api", _check_solver_pool),
+    )
+}
+
+
+async def readiness() -> Tuple[bool, Dict[str, Dict[str, Any]]]:
+    """
+    Probe all dependencies (or reuse cached results).
+
+    Returns:
+        Whether every required dependency is up, and each dependency's result
+    """
+    results = await asyncio.gather(*(probe.result() for probe in probes.values()))
+    checks = dict(zip(probes, results))
+    ready = all(result["status"] == "up" for result in results if result["required"])
+    return ready, checks
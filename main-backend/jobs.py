@@ -0,0 +1,99 @@
+"""
+Optimization job execution.
+
+Runs a solve for an ``OptimizationJob`` row and tracks its lifecycle:
+status and progress updates, result and telemetry persistence, metrics
+and tracing.
+"""
+
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict
+
+from sqlalchemy import select
+
+from caching import CacheEventType, cache_bus
+from database import async_session_factory
+from metrics import JOBS_TOTAL, JOBS_IN_PROGRESS, track_stage
+from models import OptimizationJob, JobStatusEnum
+from results import TELEMETRY_KEY
+from schedule_diff import record_assignments
+from telemetry import telemetry_row
+from tracing import JOB_ID_ATTRIBUTE, tracer
+
+logger = logging.getLogger(__name__)
+
+
+async def run_job(job_id: str, solve: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+    """
+    Run an optimization job to completion.
+    
+    Args:
+        job_id: ID of an existing PENDING job
+        solve: Coroutine factory returning the solved timetable in the stored
+            result format
+    """
+    JOBS_IN_PROGRESS.inc()
+    try:
+        with tracer.start_as_current_span(
+            "optimization_job", attributes={JOB_ID_ATTRIBUTE: job_id}
+        ):
+            await _run_job(job_id, solve)
+    finally:
+        JOBS_IN_PROGRESS.dec()
+
+
+async def _run_job(job_id: str, solve: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+    """Execute one optimization job and persist its outcome."""
+    job = None
+    async with async_session_factory() as db:
+        try:
+            # Get job from database
+            result = await db.execute(
+                select(OptimizationJob).where(OptimizationJob.id == uuid.UUID(job_id))
+            )
+            job = result.scalar_one_or_none()
+            
+            if not job:
+                return
+            
+            # Update status to running
+            job.status = JobStatusEnum.RUNNING
+            job.progress = 30
+            await db.commit()
+            JOBS_TOTAL.labels(status=JobStatusEnum.RUNNING.value).inc()
+            
+            # Run optimization
+            optimization_result = await solve()
+            
+            job.progress = 90
+            await db.commit()
+            
+            # Store result (already converted while it was received), its
+            # per-lesson assignments and the solve's telemetry. Batch
+            # scenarios are backfilled only if they are ever diffed.
+            telemetry = optimization_result.pop(TELEMETRY_KEY, None)
+            job.result = optimization_result
+            if job.batch_id is None:
+                await record_assignments(db, job.id, optimization_result)
+            if telemetry is not None:
+                db.add(telemetry_row(job_id, telemetry, optimization_result.get("score")))
+            job.status = JobStatusEnum.COMPLETED
+            job.progress = 100
+            job.completed_at = datetime.utcnow()
+            await cache_bus.publish(db, CacheEventType.SCHEDULE, [job_id])
+            with track_stage("db_persist"):
+                await db.commit()
+            JOBS_TOTAL.labels(status=JobStatusEnum.COMPLETED.value).inc()
+            
+        except Exception as e:
+            logger.exception("Optimization job %s failed", job_id)
+            JOBS_TOTAL.labels(status=JobStatusEnum.FAILED.value).inc()
+            if job is not None:
+                # A failed statement aborts the transaction; start over
+                await db.rollback()
+                job.status = JobStatusEnum.FAILED
+                job.error = str(e)
+                job.completed_at = datetime.utcnow()
+                await db.commit()
@@ -0,0 +1,228 @@
+"""
+Background lesson import from XLSX workbooks.
+
+Uploads are spooled to disk by the API and imported as a
+``LessonImportJob``: the workbook is parsed in a process pool, so large
+files never block the event loop, and the parsed lessons are upserted in
+chunks while the job's progress is updated for polling clients.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import desc, null, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from caching import CacheEventType, cache_bus
+from config import get_settings
+from database import async_session_factory
+from models import JobStatusEnum, Lesson, LessonImportJob, OptimizationJob
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = {
+    "subject",
+    "teacher",
+    "student_group",
+    "duration_hours",
+    "difficulty_weight",
+    "satisfaction_score",
+}
+# Lessons upserted per statement; progress is reported after each chunk
+UPSERT_CHUNK_SIZE = 500
+
+
+class LessonImportError(Exception):
+    """Raised for workbooks that cannot be imported."""
+
+
+def _normalize_id(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+def _to_int(value, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_float(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_lesson_workbook(path: str) -> List[Dict[str, Any]]:
+    """
+    Parse lesson rows from an XLSX file.
+
+    Expected headers: id (optional), subject, teacher, student_group,
+    duration_hours, difficulty_weight, satisfaction_score. Runs in a worker
+    process, so it only returns plain dicts.
+
+    Raises:
+        LessonImportError: If the file is not a readable workbook, is empty
+            or lacks required columns
+    """
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception:
+        raise LessonImportError("Invalid XLSX file")
+
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if not header_row:
+            raise LessonImportError("XLSX file is empty")
+
+        headers = {str(col).strip().lower(): idx for idx, col in enumerate(header_row) if col}
+        missing = REQUIRED_COLUMNS - headers.keys()
+        if missing:
+            raise LessonImportError(f"Missing required columns: {', '.join(sorted(missing))}")
+
+        lessons: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            if not row or all(cell is None for cell in row):
+                continue
+
+            def get_value(column: str, default=None):
+                idx = headers.get(column)
+                if idx is None or idx >= len(row):
+                    return default
+                return row[idx] if row[idx] is not None else default
+
+            lesson_id = _normalize_id(get_value("id")) or f"l{uuid.uuid4().hex}"
+            # A later row with the same ID replaces the earlier one
+            lessons[lesson_id] = {
+                "id": lesson_id,
+                "subject": str(get_value("subject", "Untitled")),
+                "teacher": str(get_value("teacher", "Unknown")),
+                "student_group": str(get_value("student_group", "")),
+                "duration_hours": _to_int(get_value("duration_hours"), 2),
+                "difficulty_weight": _to_float(get_value("difficulty_weight"), 0.5),
+                "satisfaction_score": _to_float(get_value("satisfaction_score"), 0.5),
+                "pinned": False,
+            }
+        return list(lessons.values())
+    finally:
+        workbook.close()
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, settings.import_workers))
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the parser processes (called on application shutdown)."""
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _update_import(import_id: uuid.UUID, **values) -> None:
+    async with async_session_factory() as db:
+        await db.execute(
+            update(LessonImportJob).where(LessonImportJob.id == import_id).values(**values)
+        )
+        await db.commit()
+
+
+async def _upsert_lessons(import_id: uuid.UUID, lessons: List[Dict[str, Any]]) -> None:
+    """Insert or replace lessons in chunks, then invalidate the latest timetable."""
+    async with async_session_factory() as db:
+        for start in range(0, len(lessons), UPSERT_CHUNK_SIZE):
+            chunk = lessons[start:start + UPSERT_CHUNK_SIZE]
+            statement = insert(Lesson).values(chunk)
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=[Lesson.id],
+                set_={
+                    column: statement.excluded[column]
+                    for column in chunk[0]
+                    if column != "id"
+                },
+            ))
+            done = start + len(chunk)
+            await db.execute(
+                update(LessonImportJob)
+                .where(LessonImportJob.id == import_id)
+                .values(imported_count=done, progress=50 + 45 * done // len(lessons))
+            )
+            await cache_bus.publish(db, CacheEventType.LESSONS, [lesson["id"] for lesson in chunk])
+            await db.commit()
+
+        # Invalidate latest timetable since lessons changed
+        latest = (
+            select(OptimizationJob.id)
+            .where(OptimizationJob.status == JobStatusEnum.COMPLETED)
+            # Batch scenarios are what-if variants, not the schedule
+            .where(OptimizationJob.batch_id.is_(None))
+            .order_by(desc(OptimizationJob.completed_at))
+            .limit(1)
+            .scalar_subquery()
+        )
+        invalidated = (await db.execute(
+            update(OptimizationJob)
+            .where(OptimizationJob.id == latest)
+            .values(result=null())
+            .returning(OptimizationJob.id)
+        )).scalars().all()
+        await cache_bus.publish(db, CacheEventType.SCHEDULE, [str(job_id) for job_id in invalidated])
+        await db.commit()
+
+
+async def run_import(import_id: str, path: str) -> None:
+    """
+    Background task importing a spooled workbook.
+
+    Args:
+        import_id: ID of an existing PENDING import job
+        path: Spooled upload; removed when the import finishes
+    """
+    job_id = uuid.UUID(import_id)
+    try:
+        await _update_import(job_id, status=JobStatusEnum.RUNNING, progress=10)
+        loop = asyncio.get_running_loop()
+        lessons = await loop.run_in_executor(_get_executor(), parse_lesson_workbook, path)
+        await _update_import(job_id, total_rows=len(lessons), progress=50)
+        if lessons:
+            await _upsert_lessons(job_id, lessons)
+        await _update_import(
+            job_id,
+            status=JobStatusEnum.COMPLETED,
+            progress=100,
+            completed_at=datetime.utcnow(),
+        )
+    except Exception as e:
+        if not isinstance(e, LessonImportError):
+            logger.exception("Lesson import %s failed", import_id)
+        await _update_import(
+            job_id,
+            status=JobStatusEnum.FAILED,
+            error=str(e),
+            completed_at=datetime.utcnow(),
+        )
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -5,44 +5,101 @@ This is the main entry point for the backend API. It coordinates between
 the frontend, ML Engine, and Algorithm API to provide schedule optimization.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, UploadFile, File, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, delete, insert, update, func, true, false
+from collections import Counter
 from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Optional
+import asyncio
+import os
+import tempfile
 import uuid
-import io
-from openpyxl import load_workbook
+import logging
 
 from config import get_settings
-from database import get_db, init_db, close_db
-from models import OptimizationJob, JobStatusEnum, Lesson
+from database import (
+    READ_REPLICA_ENABLED,
+    async_session_factory,
+    close_db,
+    engine,
+    get_db,
+    get_read_db,
+    read_engine,
+    read_session_factory,
+)
+from models import OptimizationJob, OptimizationBatch, JobStatusEnum, Lesson, LessonImportJob
 from schemas import (
     OptimizationRequest,
     OptimizationJobResponse,
+    BatchOptimizationRequest,
+    BatchOptimizationResponse,
+    ScenarioResult,
     TimetableResponse,
     HealthResponse,
+    ProbeResponse,
     JobStatus,
     LessonCreate,
     LessonResponse,
+    LessonBulkRequest,
+    LessonBulkResponse,
+    LessonOperationType,
+    LessonImportResponse,
+    TimeLimitRecommendationRequest,
+    TimeLimitRecommendationResponse,
+    ScheduleDiffResponse,
 )
 from orchestrator import orchestrator
+from problem import Problem
+from metrics import JOBS_TOTAL, render_metrics
+from tracing import setup_tracing, set_job_id
+from profiling import sampler, setup_profiling
+from jobs import run_job
+from batch import concurrent_solves, load_batch_response, run_batch, scenario_names
+from resilience import breaker_states
+from admission import AdmissionRejectedError, admission
+from retention import run_retention_sweeper, stored_result
+from telemetry import recommend_time_limit
+from caching import CacheEventType, cache_bus, lessons_cache, schedule_cache
+from schedule_diff import JobNotCompletedError, JobNotFoundError, diff_cache, diff_schedules, remove_assignments
+from health import readiness
+from migrate import migrate
+from lesson_import import run_import, shutdown_executor as shutdown_import_executor
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
-# Seed data for initial lessons (used during app startup)
-DEFAULT_LESSONS = [ ]
-
+# Uploads are spooled to disk in chunks of this size
+SPOOL_CHUNK_SIZE = 1024 * 1024
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager for startup and shutdown events."""
     # Startup
-    await init_db()
-    await seed_lessons()
+    if settings.auto_migrate:
+        await migrate()
+    background_tasks = [
+        asyncio.create_task(orchestrator.solver_pool.run_health_checks()),
+        # Probe dependencies (loading an embedded predictor) before the
+        # first readiness check asks
+        asyncio.create_task(readiness()),
+    ]
+    if settings.retention_enabled:
+        background_tasks.append(asyncio.create_task(run_retention_sweeper()))
+    if settings.cache_enabled:
+        background_tasks.append(asyncio.create_task(cache_bus.listen()))
+    if settings.profiling_sampling:
+        sampler.start()
     yield
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
+    orchestrator.close()
+    shutdown_import_executor()
+    sampler.stop()
     await close_db()
 
 
@@ -62,6 +119,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+setup_tracing(app, engine, *([read_engine] if READ_REPLICA_ENABLED else []))
+setup_profiling(app)
+
 
 @app.get("/", response_model=HealthResponse)
 async def root():
@@ -71,23 +131,57 @@ async def root():
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint with service status."""
+    """Health check endpoint with (cached) dependency probe results."""
+    ready, checks = await readiness()
     return HealthResponse(
-        status="healthy",
+        status="healthy" if ready else "unhealthy",
         version="1.0.0",
         services={
             "main_backend": "up",
-            "ml_engine": settings.ml_engine_url,
-            "algorithm_api": settings.algorithm_api_url,
+            **checks,
+            "ml_engine": {**checks["ml_engine"], "name": orchestrator.prediction_client.name},
+            "algorithm_api": {**checks["algorithm_api"], "instances": orchestrator.solver_pool.snapshot()},
         },
+        circuit_breakers=breaker_states(),
     )
 
 
+@app.get("/health/live", response_model=ProbeResponse)
+async def liveness_check():
+    """Liveness probe: the process serves requests. Checks no dependency."""
+    return ProbeResponse(status="alive")
+
+
+@app.get("/health/ready", response_model=ProbeResponse, responses={503: {"model": ProbeResponse}})
+async def readiness_check(response: Response):
+    """Readiness probe: 200 once the required dependencies are up, else 503."""
+    ready, checks = await readiness()
+    if not ready:
+        response.status_code = 503
+    return ProbeResponse(status="ready" if ready else "not_ready", checks=checks)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint."""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+def client_identity(http_request: Request) -> str:
+    """Identify the caller for per-client quotas: X-Client-Id, else client IP."""
+    client_id = http_request.headers.get("X-Client-Id")
+    if client_id:
+        return client_id
+    return http_request.client.host if http_request.client else "unknown"
+
+
 @app.post("/api/schedules/optimize", response_model=OptimizationJobResponse)
 async def start_optimization(
     request: OptimizationRequest,
     background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
+    client: str = Depends(client_identity),
 ):
     """
     Start a new schedule optimization job.
@@ -96,8 +190,24 @@ async def start_optimization(
     1. Enriches lessons with ML predictions
     2. Sends to Algorithm API for solving
     3. Returns job ID for status polling
+    
+    Jobs beyond the concurrency limit wait in a bounded queue; when the
+    queue is full or the client is over quota, 429 is returned with a
+    Retry-After header. A portfolio takes a run slot per member.
     """
     job_id = uuid.uuid4()
+    set_job_id(str(job_id))
+    
+    try:
+        queue_position = admission.admit(
+            str(job_id), client, weight=request.portfolio.size if request.portfolio else 1
+        )
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     
     # Create job in database
     job = OptimizationJob(
@@ -106,9 +216,14 @@ async def start_optimization(
         progress=0,
         started_at=datetime.utcnow(),
     )
-    db.add(job)
-    await db.commit()
-    await db.refresh(job)
+    try:
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+    except Exception:
+        admission.release(str(job_id))
+        raise
+    JOBS_TOTAL.labels(status=JobStatusEnum.PENDING.value).inc()
     
     # Run optimization in background
     background_tasks.add_task(
@@ -121,212 +236,241 @@ async def start_optimization(
         id=str(job.id),
         status=JobStatus(job.status.value),
         progress=job.progress,
+        queue_position=queue_position,
         started_at=job.started_at,
     )
 
 
 async def run_optimization_task(job_id: str, request: OptimizationRequest):
     """Background task to run optimization."""
-    from database import async_session_factory
+    async def solve() -> dict:
+        return await orchestrator.run_optimization(
+            timeslots=request.timeslots,
+            rooms=request.rooms,
+            lessons=request.lessons,
+            time_limit_seconds=request.solver_time_limit_seconds,
+            portfolio=request.portfolio,
+        )
     
-    async with async_session_factory() as db:
-        try:
-            # Get job from database
-            result = await db.execute(
-                select(OptimizationJob).where(OptimizationJob.id == uuid.UUID(job_id))
-            )
-            job = result.scalar_one_or_none()
-            
-            if not job:
-                return
-            
-            # Update status to running
-            job.status = JobStatusEnum.RUNNING
-            job.progress = 10
-            await db.commit()
-            
-            # Convert Pydantic models to dicts
-            timeslots = [ts.model_dump() for ts in request.timeslots]
-            rooms = [room.model_dump() for room in request.rooms]
-            lessons = [lesson.model_dump() for lesson in request.lessons]
-            
-            job.progress = 30
-            await db.commit()
-            
-            # Run optimization
-            optimization_result = await orchestrator.run_optimization(
-                timeslots=timeslots,
-                rooms=rooms,
-                lessons=lessons,
-            )
-            
-            job.progress = 90
-            await db.commit()
-            
-            # Parse and store result
-            timetable_response = parse_timetable_result(optimization_result)
-            job.result = timetable_response.model_dump()
-            job.status = JobStatusEnum.COMPLETED
-            job.progress = 100
-            job.completed_at = datetime.utcnow()
-            await db.commit()
-            
-        except Exception as e:
-            job.status = JobStatusEnum.FAILED
-            job.error = str(e)
-            job.completed_at = datetime.utcnow()
-            await db.commit()
-
-
-def parse_timetable_result(result: dict) -> TimetableResponse:
-    """Parse Algorithm API result to response model."""
-    from schemas import TimeslotResponse, RoomResponse, LessonResponse, ScoreResponse
-    
-    timeslots = [
-        TimeslotResponse(
-            day_of_week=ts.get("dayOfWeek", ""),
-            start_time=ts.get("startTime", ""),
-            end_time=ts.get("endTime", ""),
-            preference_bonus=ts.get("preferenceBonus"),
+    async with admission.slot(job_id):
+        await run_job(job_id, solve)
+
+
+@app.post("/api/schedules/optimize/batch", response_model=BatchOptimizationResponse)
+async def start_batch_optimization(
+    request: BatchOptimizationRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    client: str = Depends(client_identity),
+):
+    """
+    Start optimizing several scenarios of one base problem.
+    
+    Each scenario applies a delta (timeslots, rooms, lessons) to the base
+    problem and is solved as its own job. Poll the batch for a score
+    comparison across scenarios.
+    
+    The batch is admitted like a single optimization job that holds a run
+    slot per solve it runs at once (parallel scenarios times portfolio
+    members); it counts once against the queue and the client's quota.
+    429 is returned when it cannot be admitted.
+    """
+    names = scenario_names(request)
+    if len(set(names)) != len(names):
+        raise HTTPException(
+            status_code=400,
+            detail="Scenario names must be unique ('base' is reserved when include_base is set)",
         )
-        for ts in result.get("timeslots", [])
-    ]
     
-    rooms = [
-        RoomResponse(
-            name=room.get("name", ""),
-            capacity=room.get("capacity"),
+    batch_id = uuid.uuid4()
+    try:
+        queue_position = admission.admit(str(batch_id), client, weight=concurrent_solves(request))
+    except AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
         )
-        for room in result.get("rooms", [])
-    ]
     
-    lessons = []
-    for lesson in result.get("lessons", []):
-        ts = lesson.get("timeslot")
-        room = lesson.get("room")
-
-        lessons.append(LessonResponse(
-            id=lesson.get("id", ""),
-            subject=lesson.get("subject", ""),
-            teacher=lesson.get("teacher", ""),
-            student_group=lesson.get("studentGroup", ""),
-            duration_hours=lesson.get("durationHours", 2),
-            difficulty_weight=lesson.get("difficultyWeight"),
-            satisfaction_score=lesson.get("satisfactionScore"),
-            pinned=lesson.get("pinned", False),
-            timeslot=TimeslotResponse(
-                day_of_week=ts.get("dayOfWeek", "") if ts else "",
-                start_time=ts.get("startTime", "") if ts else "",
-                end_time=ts.get("endTime", "") if ts else "",
-                preference_bonus=ts.get("preferenceBonus") if ts else None,
-            ) if ts else None,
-            room=RoomResponse(
-                name=room.get("name", "") if room else "",
-                capacity=room.get("capacity") if room else None,
-            ) if room else None,
-        ))
-    
-    score = result.get("score")
-    score_response = None
-    if score:
-        # Parse Timefold score format (e.g., "0hard/-15soft")
-        if isinstance(score, str):
-            hard = 0
-            soft = 0
-            parts = score.replace("hard", "").replace("soft", "").split("/")
-            if len(parts) >= 1:
-                hard = int(parts[0])
-            if len(parts) >= 2:
-                soft = int(parts[1])
-            score_response = ScoreResponse(hard_score=hard, soft_score=soft)
-        elif isinstance(score, dict):
-            score_response = ScoreResponse(
-                hard_score=score.get("hardScore", 0),
-                soft_score=score.get("softScore", 0),
+    started_at = datetime.utcnow()
+    batch = OptimizationBatch(
+        id=batch_id,
+        status=JobStatusEnum.PENDING,
+        scenario_count=len(names),
+        started_at=started_at,
+    )
+    job_ids = {}
+    try:
+        db.add(batch)
+        for name in names:
+            job = OptimizationJob(
+                id=uuid.uuid4(),
+                status=JobStatusEnum.PENDING,
+                progress=0,
+                started_at=started_at,
+                batch_id=batch.id,
+                scenario_name=name,
             )
+            db.add(job)
+            job_ids[name] = str(job.id)
+        await db.commit()
+    except Exception:
+        admission.release(str(batch_id))
+        raise
+    JOBS_TOTAL.labels(status=JobStatusEnum.PENDING.value).inc(len(names))
     
-    return TimetableResponse(
-        timeslots=timeslots,
-        rooms=rooms,
-        lessons=lessons,
-        score=score_response,
+    background_tasks.add_task(run_batch_task, str(batch_id), request, job_ids)
+    
+    return BatchOptimizationResponse(
+        id=str(batch.id),
+        status=JobStatus(batch.status.value),
+        queue_position=queue_position,
+        started_at=batch.started_at,
+        scenarios=[
+            ScenarioResult(name=name, job_id=job_ids[name], status=JobStatus.PENDING)
+            for name in names
+        ],
     )
 
 
+async def run_batch_task(batch_id: str, request: BatchOptimizationRequest, job_ids: dict[str, str]):
+    """Background task to run a batch optimization."""
+    async with admission.slot(batch_id):
+        await run_batch(batch_id, request, job_ids)
+
+
+@app.post("/api/schedules/time-limit-recommendation", response_model=TimeLimitRecommendationResponse)
+async def recommend_solver_time_limit(
+    request: TimeLimitRecommendationRequest,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Recommend a solver time limit for a problem from the solve telemetry of
+    similar past jobs: long enough for most of them to reach the requested
+    share of their final soft score improvement.
+    """
+    problem = Problem.from_schema(request.timeslots, request.rooms, request.lessons)
+    recommendation = await recommend_time_limit(db, problem.features(), request.convergence)
+    if recommendation is None:
+        raise HTTPException(status_code=404, detail="No solve telemetry of similar problems")
+    return TimeLimitRecommendationResponse(**recommendation)
+
+
+@app.get("/api/schedules/batches/{batch_id}", response_model=BatchOptimizationResponse)
+async def get_batch_status(batch_id: str, db: AsyncSession = Depends(get_read_db)):
+    """Get the status and score comparison of a batch optimization."""
+    try:
+        batch_uuid = uuid.UUID(batch_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid batch ID format")
+    
+    response = await load_batch_response(db, batch_uuid)
+    if not response and READ_REPLICA_ENABLED:
+        # A batch polled right after creation may not have replicated yet
+        async with async_session_factory() as primary:
+            response = await load_batch_response(primary, batch_uuid)
+    if not response:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if response.status == JobStatus.PENDING:
+        response.queue_position = admission.position(batch_id)
+    return response
+
+
 @app.get("/api/schedules/jobs/{job_id}", response_model=OptimizationJobResponse)
-async def get_job_status(job_id: str, db: AsyncSession = Depends(get_db)):
+async def get_job_status(job_id: str, db: AsyncSession = Depends(get_read_db)):
     """Get the status of an optimization job."""
+    set_job_id(job_id)
     try:
         job_uuid = uuid.UUID(job_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid job ID format")
     
-    result = await db.execute(
-        select(OptimizationJob).where(OptimizationJob.id == job_uuid)
-    )
-    job = result.scalar_one_or_none()
+    job = await db.get(OptimizationJob, job_uuid)
+    if not job and READ_REPLICA_ENABLED:
+        # A job polled right after creation may not have replicated yet
+        async with async_session_factory() as primary:
+            job = await primary.get(OptimizationJob, job_uuid)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    result = stored_result(job)
     return OptimizationJobResponse(
         id=str(job.id),
         status=JobStatus(job.status.value),
         progress=job.progress,
+        queue_position=admission.position(str(job_uuid)) if job.status == JobStatusEnum.PENDING else None,
         started_at=job.started_at,
         completed_at=job.completed_at,
-        result=TimetableResponse(**job.result) if job.result else None,
+        result=TimetableResponse(**result) if result else None,
         error=job.error,
     )
 
 
-@app.get("/api/schedules/latest", response_model=TimetableResponse)
-async def get_latest_schedule(db: AsyncSession = Depends(get_db)):
-    """Get the most recently completed schedule."""
+async def _load_latest_schedule(db: AsyncSession) -> Optional[TimetableResponse]:
     result = await db.execute(
         select(OptimizationJob)
         .where(OptimizationJob.status == JobStatusEnum.COMPLETED)
+        # Batch scenarios are what-if variants, not the schedule
+        .where(OptimizationJob.batch_id.is_(None))
         .where(OptimizationJob.result.isnot(None))
         .order_by(desc(OptimizationJob.completed_at))
         .limit(1)
     )
     job = result.scalar_one_or_none()
-    
-    if not job:
+    return TimetableResponse(**job.result) if job else None
+
+
+@app.get("/api/schedules/latest", response_model=TimetableResponse)
+async def get_latest_schedule(db: AsyncSession = Depends(get_read_db)):
+    """Get the most recently completed schedule."""
+    schedule = await schedule_cache.get_or_load(None, _load_latest_schedule, db)
+    if not schedule:
         raise HTTPException(status_code=404, detail="No completed schedules found")
     
-    return TimetableResponse(**job.result)
+    return schedule
+
+
+@app.get("/api/schedules/diff", response_model=ScheduleDiffResponse)
+async def get_schedule_diff(
+    from_job: str = Query(alias="from"),
+    to_job: str = Query(alias="to"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the lessons moved, added and removed between two completed jobs,
+    and the score change.
+    
+    Served by the primary, since jobs completed before per-lesson
+    assignments were recorded are backfilled on first use.
+    """
+    try:
+        from_uuid, to_uuid = uuid.UUID(from_job), uuid.UUID(to_job)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    
+    try:
+        return await diff_cache.get_or_load(
+            (str(from_uuid), str(to_uuid)),
+            lambda session: diff_schedules(session, from_uuid, to_uuid),
+            db,
+        )
+    except JobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except JobNotCompletedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 
 # ========== Lessons CRUD ==========
-async def seed_lessons():
-    """Seed default lessons if table is empty."""
-    from database import async_session_factory
-    
-    async with async_session_factory() as db:
-        result = await db.execute(select(Lesson).limit(1))
-        if result.scalar_one_or_none() is None:
-            for lesson_data in DEFAULT_LESSONS:
-                lesson = Lesson(
-                    id=lesson_data["id"],
-                    subject=lesson_data["subject"],
-                    teacher=lesson_data["teacher"],
-                    student_group=lesson_data["student_group"],
-                    duration_hours=lesson_data.get("duration_hours", 2),
-                    difficulty_weight=lesson_data["difficulty_weight"],
-                    satisfaction_score=lesson_data["satisfaction_score"],
-                    pinned=False,
-                )
-                db.add(lesson)
-            await db.commit()
+async def _load_lessons(db: AsyncSession) -> list[LessonResponse]:
+    result = await db.execute(select(Lesson).order_by(Lesson.id))
+    return [LessonResponse(**lesson.to_dict()) for lesson in result.scalars()]
 
 
 @app.get("/api/lessons", response_model=list[LessonResponse])
-async def get_lessons(db: AsyncSession = Depends(get_db)):
+async def get_lessons(db: AsyncSession = Depends(get_read_db)):
     """Get all lessons."""
-    result = await db.execute(select(Lesson).order_by(Lesson.id))
-    lessons = result.scalars().all()
-    return [LessonResponse(**lesson.to_dict()) for lesson in lessons]
+    return await lessons_cache.get_or_load(None, _load_lessons, db)
 
 
 @app.post("/api/lessons", response_model=LessonResponse)
@@ -348,6 +492,7 @@ async def create_lesson(lesson_data: LessonCreate, db: AsyncSession = Depends(ge
         pinned=lesson_data.pinned,
     )
     db.add(lesson)
+    await cache_bus.publish(db, CacheEventType.LESSONS, [lesson.id])
     await db.commit()
     await db.refresh(lesson)
     return LessonResponse(**lesson.to_dict())
@@ -370,6 +515,7 @@ async def update_lesson(lesson_id: str, lesson_data: LessonCreate, db: AsyncSess
     lesson.satisfaction_score = lesson_data.satisfaction_score
     lesson.pinned = lesson_data.pinned
     
+    await cache_bus.publish(db, CacheEventType.LESSONS, [lesson_id])
     await db.commit()
     await db.refresh(lesson)
     return LessonResponse(**lesson.to_dict())
@@ -386,23 +532,130 @@ async def delete_lesson(lesson_id: str, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Lesson not found")
     
     await db.delete(lesson)
+    await _remove_lessons_from_latest_schedule(db, [lesson_id])
+    await cache_bus.publish(db, CacheEventType.LESSONS, [lesson_id])
     await db.commit()
     
-    # Also remove any scheduled occurrences of the lesson in the latest timetable
-    # by marking the latest completed job result to exclude the deleted lesson.
+    return {"message": "Lesson deleted"}
+
+
+async def _remove_lessons_from_latest_schedule(db: AsyncSession, lesson_ids) -> None:
+    """
+    Remove scheduled occurrences of deleted lessons from the latest timetable.
+    
+    Sessions of a split lesson (``{id}-p{n}``) are removed along with it.
+    The caller commits.
+    """
     job_result = await db.execute(
         select(OptimizationJob)
         .where(OptimizationJob.status == JobStatusEnum.COMPLETED)
+        # Batch scenarios are what-if variants, not the schedule
+        .where(OptimizationJob.batch_id.is_(None))
         .where(OptimizationJob.result.isnot(None))
         .order_by(desc(OptimizationJob.completed_at))
         .limit(1)
     )
     latest_job = job_result.scalar_one_or_none()
-    if latest_job and latest_job.result and latest_job.result.get("lessons"):
-        latest_job.result["lessons"] = [l for l in latest_job.result["lessons"] if l.get("id") != lesson_id]
-        await db.commit()
+    if not latest_job or not latest_job.result or not latest_job.result.get("lessons"):
+        return
     
-    return {"message": "Lesson deleted"}
+    removed = set(lesson_ids)
+    
+    def is_removed(scheduled_id: str) -> bool:
+        base_id, _, part = scheduled_id.rpartition("-p")
+        return scheduled_id in removed or (part.isdigit() and base_id in removed)
+    
+    lessons = latest_job.result["lessons"]
+    kept = [l for l in lessons if not is_removed(l.get("id", ""))]
+    if len(kept) != len(lessons):
+        # Reassign rather than mutate so the JSONB change is persisted
+        latest_job.result = {**latest_job.result, "lessons": kept}
+        await remove_assignments(
+            db, latest_job.id, [l.get("id", "") for l in lessons if is_removed(l.get("id", ""))]
+        )
+        await cache_bus.publish(db, CacheEventType.SCHEDULE, [str(latest_job.id)])
+
+
+@app.post("/api/lessons/bulk", response_model=LessonBulkResponse)
+async def bulk_update_lessons(request: LessonBulkRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Apply many lesson operations in one transaction.
+    
+    Operations are grouped by type and each group runs as one set-based
+    statement; the latest timetable is updated once for all deletions.
+    Each lesson may appear in at most one operation. If any operation is
+    invalid, nothing is applied.
+    """
+    operations = request.operations
+    ids = [op.id for op in operations]
+    duplicates = sorted(lesson_id for lesson_id, count in Counter(ids).items() if count > 1)
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Lessons appear in more than one operation: {duplicates}")
+    
+    existing = set((await db.execute(select(Lesson.id).where(Lesson.id.in_(ids)))).scalars())
+    already_exist = [op.id for op in operations if op.op == LessonOperationType.CREATE and op.id in existing]
+    if already_exist:
+        raise HTTPException(status_code=400, detail=f"Lessons already exist: {already_exist}")
+    missing = [op.id for op in operations if op.op != LessonOperationType.CREATE and op.id not in existing]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Lessons not found: {missing}")
+    
+    by_type = {op_type: [op for op in operations if op.op == op_type] for op_type in LessonOperationType}
+    
+    def lesson_values(op) -> dict:
+        return {
+            "id": op.id,
+            "subject": op.lesson.subject,
+            "teacher": op.lesson.teacher,
+            "student_group": op.lesson.student_group,
+            "duration_hours": op.lesson.duration_hours,
+            "difficulty_weight": op.lesson.difficulty_weight,
+            "satisfaction_score": op.lesson.satisfaction_score,
+            "pinned": op.lesson.pinned,
+        }
+    
+    if by_type[LessonOperationType.CREATE]:
+        await db.execute(insert(Lesson), [lesson_values(op) for op in by_type[LessonOperationType.CREATE]])
+    if by_type[LessonOperationType.UPDATE]:
+        await db.execute(update(Lesson), [lesson_values(op) for op in by_type[LessonOperationType.UPDATE]])
+    
+    pins = by_type[LessonOperationType.PIN]
+    for value, pinned in ((True, true()), (False, false()), (None, ~func.coalesce(Lesson.pinned, False))):
+        pin_ids = [op.id for op in pins if op.pinned is value]
+        if pin_ids:
+            await db.execute(
+                update(Lesson).where(Lesson.id.in_(pin_ids)).values(pinned=pinned),
+                execution_options={"synchronize_session": False},
+            )
+    
+    deleted_ids = [op.id for op in by_type[LessonOperationType.DELETE]]
+    if deleted_ids:
+        await db.execute(
+            delete(Lesson).where(Lesson.id.in_(deleted_ids)),
+            execution_options={"synchronize_session": False},
+        )
+        await _remove_lessons_from_latest_schedule(db, deleted_ids)
+    
+    changed_ids = [op.id for op in operations if op.op != LessonOperationType.DELETE]
+    lessons = []
+    if changed_ids:
+        result = await db.execute(
+            select(Lesson)
+            .where(Lesson.id.in_(changed_ids))
+            .order_by(Lesson.id)
+            .execution_options(populate_existing=True)
+        )
+        lessons = [LessonResponse(**lesson.to_dict()) for lesson in result.scalars()]
+    await cache_bus.publish(db, CacheEventType.LESSONS, ids)
+    await db.commit()
+    
+    return LessonBulkResponse(
+        created=len(by_type[LessonOperationType.CREATE]),
+        updated=len(by_type[LessonOperationType.UPDATE]),
+        deleted=len(deleted_ids),
+        pinned=len(pins),
+        lessons=lessons,
+    )
 
 
 @app.patch("/api/lessons/{lesson_id}/pin", response_model=LessonResponse)
@@ -415,104 +668,126 @@ async def toggle_lesson_pin(lesson_id: str, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Lesson not found")
     
     lesson.pinned = not lesson.pinned
+    await cache_bus.publish(db, CacheEventType.LESSONS, [lesson_id])
     await db.commit()
     await db.refresh(lesson)
     return LessonResponse(**lesson.to_dict())
 
 
-@app.post("/api/lessons/import", response_model=list[LessonResponse])
-async def import_lessons(file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
-    """Import lessons from an XLSX file.
+@app.post("/api/lessons/import", response_model=LessonImportResponse, status_code=202)
+async def import_lessons(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Start importing lessons from an XLSX file.
+    
     Expected headers: id (optional),subject,teacher,student_group,duration_hours,difficulty_weight,satisfaction_score
+    
+    The upload is spooled to disk and imported in the background; poll
+    ``/api/lessons/imports/{id}`` or stream its ``/events`` for progress.
+    Lessons with an existing ID are replaced.
     """
-    content = await file.read()
-
+    fd, path = tempfile.mkstemp(suffix=".xlsx", dir=settings.import_spool_dir)
     try:
-        workbook = load_workbook(io.BytesIO(content), data_only=True)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid XLSX file")
-
-    sheet = workbook.active
-    rows = list(sheet.iter_rows(values_only=True))
-
-    if not rows:
-        raise HTTPException(status_code=400, detail="XLSX file is empty")
-
-    header_row = rows[0]
-    headers = {str(col).strip().lower(): idx for idx, col in enumerate(header_row) if col}
-    required_headers = {"subject", "teacher", "student_group", "duration_hours", "difficulty_weight", "satisfaction_score"}
-    if not required_headers.issubset(headers.keys()):
-        missing = required_headers - set(headers.keys())
-        raise HTTPException(status_code=400, detail=f"Missing required columns: {', '.join(sorted(missing))}")
-
-    imported_lessons: list[LessonResponse] = []
-    for row in rows[1:]:
-        if not row or all(cell is None for cell in row):
-            continue
-
-        def get_value(column: str, default=None):
-            idx = headers.get(column)
-            if idx is None or idx >= len(row):
-                return default
-            return row[idx] if row[idx] is not None else default
-
-        def normalize_id(value):
-            if value is None:
-                return None
-            if isinstance(value, float) and value.is_integer():
-                value = int(value)
-            text = str(value).strip()
-            return text or None
-
-        def to_int(value, default: int) -> int:
-            try:
-                return int(value)
-            except (TypeError, ValueError):
-                return default
-
-        def to_float(value, default: float) -> float:
-            try:
-                return float(value)
-            except (TypeError, ValueError):
-                return default
-
-        lesson_id = normalize_id(get_value("id")) or f"l{uuid.uuid4().hex}"
-        # Upsert: delete existing lesson with same id to keep data fresh
-        existing = await db.execute(select(Lesson).where(Lesson.id == lesson_id))
-        existing_lesson = existing.scalar_one_or_none()
-        if existing_lesson:
-            await db.delete(existing_lesson)
-            await db.commit()
-
-        lesson = Lesson(
-            id=lesson_id,
-            subject=str(get_value("subject", "Untitled")),
-            teacher=str(get_value("teacher", "Unknown")),
-            student_group=str(get_value("student_group", "")),
-            duration_hours=to_int(get_value("duration_hours"), 2),
-            difficulty_weight=to_float(get_value("difficulty_weight"), 0.5),
-            satisfaction_score=to_float(get_value("satisfaction_score"), 0.5),
-            pinned=False,
+        size = 0
+        with os.fdopen(fd, "wb") as spool:
+            while chunk := await file.read(SPOOL_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.import_max_bytes:
+                    raise HTTPException(status_code=413, detail="XLSX file is too large")
+                await asyncio.to_thread(spool.write, chunk)
+        
+        import_job = LessonImportJob(
+            id=uuid.uuid4(),
+            status=JobStatusEnum.PENDING,
+            progress=0,
+            filename=file.filename,
+            started_at=datetime.utcnow(),
         )
-        db.add(lesson)
+        db.add(import_job)
         await db.commit()
-        await db.refresh(lesson)
-        imported_lessons.append(LessonResponse(**lesson.to_dict()))
-
-    # Invalidate latest timetable since lessons changed
-    latest_job_result = await db.execute(
-        select(OptimizationJob)
-        .where(OptimizationJob.status == JobStatusEnum.COMPLETED)
-        .order_by(desc(OptimizationJob.completed_at))
-        .limit(1)
+    except BaseException:
+        os.remove(path)
+        raise
+    
+    background_tasks.add_task(run_import, str(import_job.id), path)
+    return _import_response(import_job)
+
+
+def _import_response(import_job: LessonImportJob) -> LessonImportResponse:
+    return LessonImportResponse(
+        id=str(import_job.id),
+        status=JobStatus(import_job.status.value),
+        progress=import_job.progress,
+        filename=import_job.filename,
+        total_rows=import_job.total_rows,
+        imported_count=import_job.imported_count or 0,
+        started_at=import_job.started_at,
+        completed_at=import_job.completed_at,
+        error=import_job.error,
     )
-    latest_job = latest_job_result.scalar_one_or_none()
-    if latest_job:
-        latest_job.result = None
-        latest_job.score = None if hasattr(latest_job, "score") else None  # safeguard
-        await db.commit()
 
-    return imported_lessons
+
+async def _load_import_job(import_uuid: uuid.UUID) -> Optional[LessonImportJob]:
+    """Read an import job in a fresh read session, falling back to the primary."""
+    async with read_session_factory() as db:
+        import_job = await db.get(LessonImportJob, import_uuid)
+    if not import_job and READ_REPLICA_ENABLED:
+        # An import polled right after its upload may not have replicated yet
+        async with async_session_factory() as primary:
+            import_job = await primary.get(LessonImportJob, import_uuid)
+    return import_job
+
+
+def _parse_import_id(import_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(import_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid import ID format")
+
+
+@app.get("/api/lessons/imports/{import_id}", response_model=LessonImportResponse)
+async def get_import_status(import_id: str):
+    """Get the status and progress of a lesson import."""
+    import_job = await _load_import_job(_parse_import_id(import_id))
+    if not import_job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return _import_response(import_job)
+
+
+@app.get("/api/lessons/imports/{import_id}/events")
+async def stream_import_status(import_id: str):
+    """
+    Stream a lesson import's progress as server-sent events.
+    
+    An event carrying the import status is sent whenever it changes; the
+    stream ends once the import has completed or failed.
+    """
+    import_uuid = _parse_import_id(import_id)
+    if not await _load_import_job(import_uuid):
+        raise HTTPException(status_code=404, detail="Import not found")
+    
+    async def events():
+        last = None
+        while True:
+            import_job = await _load_import_job(import_uuid)
+            if not import_job:
+                return
+            data = _import_response(import_job).model_dump_json()
+            if data != last:
+                yield f"data: {data}\n\n"
+                last = data
+            if import_job.status in (JobStatusEnum.COMPLETED, JobStatusEnum.FAILED):
+                return
+            await asyncio.sleep(settings.import_stream_interval_seconds)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
 
 if __name__ == "__main__":
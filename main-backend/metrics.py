@@ -0,0 +1,190 @@
+"""
+Prometheus metrics for the main backend.
+
+Per-stage timing of the optimization pipeline, job counters, ML cache
+hit rate, upstream HTTP latency/errors and DB pool utilization, all
+exposed on ``/metrics``.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import httpx
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# Solver stages can take minutes, so the buckets go well beyond the defaults
+STAGE_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_DURATION = Histogram(
+    "schedulus_optimization_stage_seconds",
+    "Time spent in each stage of the optimization pipeline",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+JOBS_TOTAL = Counter(
+    "schedulus_optimization_jobs_total",
+    "Optimization jobs by status transition",
+    ["status"],
+)
+
+JOBS_IN_PROGRESS = Gauge(
+    "schedulus_optimization_jobs_in_progress",
+    "Optimization jobs currently being processed by this replica",
+)
+
+ML_CACHE_REQUESTS = Counter(
+    "schedulus_ml_cache_requests_total",
+    "ML prediction cache lookups by result (hit/miss)",
+    ["result"],
+)
+
+CACHE_REQUESTS = Counter(
+    "schedulus_cache_requests_total",
+    "In-process cache lookups by cache and result (hit/miss/bypass)",
+    ["cache", "result"],
+)
+
+CACHE_INVALIDATIONS = Counter(
+    "schedulus_cache_invalidations_total",
+    "Cache invalidations applied, by event type or flush reason",
+    ["event"],
+)
+
+CACHE_LISTENER_CONNECTED = Gauge(
+    "schedulus_cache_listener_connected",
+    "Whether the cache invalidation listener is connected (caches are served)",
+)
+
+DEPENDENCY_UP = Gauge(
+    "schedulus_dependency_up",
+    "Whether the dependency's last readiness probe succeeded",
+    ["dependency"],
+)
+
+UPSTREAM_LATENCY = Histogram(
+    "schedulus_upstream_request_seconds",
+    "Latency of outbound HTTP calls by upstream service",
+    ["upstream"],
+    buckets=STAGE_BUCKETS,
+)
+
+UPSTREAM_ERRORS = Counter(
+    "schedulus_upstream_errors_total",
+    "Failed outbound HTTP calls by upstream service and reason",
+    ["upstream", "reason"],
+)
+
+UPSTREAM_RETRIES = Counter(
+    "schedulus_upstream_retries_total",
+    "Retried outbound HTTP calls by upstream",
+    ["upstream"],
+)
+
+CIRCUIT_STATE = Gauge(
+    "schedulus_circuit_breaker_state",
+    "Circuit breaker state by upstream (0=closed, 1=half-open, 2=open)",
+    ["upstream"],
+)
+
+ML_ENRICHMENT_DEGRADED = Counter(
+    "schedulus_ml_enrichment_degraded_total",
+    "Enrichments that proceeded without fresh ML predictions",
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "schedulus_admission_queue_depth",
+    "Optimization jobs waiting for a run slot",
+)
+
+ADMISSION_REJECTED = Counter(
+    "schedulus_admission_rejected_total",
+    "Optimization requests rejected by admission control",
+    ["reason"],
+)
+
+SOLVER_IN_FLIGHT = Gauge(
+    "schedulus_solver_in_flight",
+    "Solves in flight per Algorithm API instance",
+    ["instance"],
+)
+
+SOLVER_WAITING = Gauge(
+    "schedulus_solver_waiting",
+    "Solves waiting for a free Algorithm API instance",
+)
+
+PORTFOLIO_MEMBERS = Counter(
+    "schedulus_portfolio_members_total",
+    "Portfolio solve members by outcome (best/completed/failed/cancelled)",
+    ["outcome"],
+)
+
+RETENTION_ROWS = Counter(
+    "schedulus_retention_rows_total",
+    "Optimization job rows affected by the retention sweeper by action",
+    ["action"],
+)
+
+RETENTION_SWEEP_SECONDS = Histogram(
+    "schedulus_retention_sweep_seconds",
+    "Duration of retention sweeps",
+    buckets=STAGE_BUCKETS,
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "schedulus_db_pool_connections",
+    "Database connection pool utilization by pool and state",
+    ["pool", "state"],
+)
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Time a pipeline stage and record it in the stage histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def track_upstream(upstream: str) -> Iterator[None]:
+    """
+    Record latency of an outbound call and count it as an error if it raises.
+
+    HTTP status errors are labelled with the status code, transport errors
+    with the exception class name.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except httpx.HTTPStatusError as e:
+        UPSTREAM_ERRORS.labels(upstream=upstream, reason=str(e.response.status_code)).inc()
+        raise
+    except httpx.HTTPError as e:
+        UPSTREAM_ERRORS.labels(upstream=upstream, reason=type(e).__name__).inc()
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(upstream=upstream).observe(time.perf_counter() - start)
+
+
+def bind_db_pool(pool, name: str = "primary") -> None:
+    """Expose a SQLAlchemy QueuePool's utilization as gauges."""
+    DB_POOL_CONNECTIONS.labels(pool=name, state="size").set_function(pool.size)
+    DB_POOL_CONNECTIONS.labels(pool=name, state="checked_out").set_function(pool.checkedout)
+    DB_POOL_CONNECTIONS.labels(pool=name, state="checked_in").set_function(pool.checkedin)
+    DB_POOL_CONNECTIONS.labels(pool=name, state="overflow").set_function(pool.overflow)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all registered metrics in the Prometheus text format."""
+    return generate_latest(), CONTENT_TYPE_LATEST
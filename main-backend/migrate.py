@@ -0,0 +1,136 @@
+"""
+Database migration step.
+
+Creates missing tables, applies pending schema migrations and seeds the
+default lessons. Run it once per deployment before starting the API:
+
+    python migrate.py
+
+The API only does this itself at startup when ``AUTO_MIGRATE`` is set, so
+new replicas do not repeat it on every boot.
+
+``create_all`` creates tables that do not exist yet, but never changes an
+existing one; changes to existing tables are the versioned ``MIGRATIONS``
+below. Applied versions are recorded in ``schema_migrations``. Statements
+are idempotent, so databases whose tables ``create_all`` already created
+at a newer model version migrate cleanly too. Everything runs in one
+transaction under an advisory lock, so concurrent runs apply each
+migration once.
+"""
+
+import asyncio
+import logging
+from typing import List, Tuple
+
+from sqlalchemy import func, select, text
+
+from caching import CacheEventType, cache_bus
+from database import Base, async_session_factory, close_db, engine
+from models import Lesson
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key of the migration advisory lock
+MIGRATION_LOCK_KEY = 0x5C4ED1
+
+# (version, statements) in order of application; never edit an applied one
+MIGRATIONS: List[Tuple[str, List[str]]] = [
+    ("0001_optimization_job_batches", [
+        "ALTER TABLE optimization_jobs ADD COLUMN IF NOT EXISTS batch_id uuid",
+        "ALTER TABLE optimization_jobs ADD COLUMN IF NOT EXISTS scenario_name varchar(100)",
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = 'optimization_jobs'::regclass
+                  AND confrelid = 'optimization_batches'::regclass
+            ) THEN
+                ALTER TABLE optimization_jobs ADD CONSTRAINT optimization_jobs_batch_id_fkey
+                    FOREIGN KEY (batch_id) REFERENCES optimization_batches (id) ON DELETE CASCADE;
+            END IF;
+        END $$
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_optimization_jobs_batch_id ON optimization_jobs (batch_id)",
+    ]),
+    ("0002_optimization_job_retention", [
+        "ALTER TABLE optimization_jobs ADD COLUMN IF NOT EXISTS result_compressed bytea",
+        "CREATE INDEX IF NOT EXISTS ix_optimization_jobs_status_completed_at "
+        "ON optimization_jobs (status, completed_at)",
+    ]),
+    ("0003_lesson_assignments_text", [
+        "ALTER TABLE lesson_assignments "
+        + ", ".join(
+            f"ALTER COLUMN {column} TYPE text"
+            for column in (
+                "lesson_id", "subject", "teacher", "student_group",
+                "day_of_week", "start_time", "end_time", "room",
+            )
+        ),
+    ]),
+]
+
+# Seed data for initial lessons
+DEFAULT_LESSONS = [ ]
+
+
+async def seed_lessons() -> None:
+    """Seed default lessons if table is empty."""
+    async with async_session_factory() as db:
+        result = await db.execute(select(Lesson).limit(1))
+        if result.scalar_one_or_none() is None:
+            for lesson_data in DEFAULT_LESSONS:
+                lesson = Lesson(
+                    id=lesson_data["id"],
+                    subject=lesson_data["subject"],
+                    teacher=lesson_data["teacher"],
+                    student_group=lesson_data["student_group"],
+                    duration_hours=lesson_data.get("duration_hours", 2),
+                    difficulty_weight=lesson_data["difficulty_weight"],
+                    satisfaction_score=lesson_data["satisfaction_score"],
+                    pinned=False,
+                )
+                db.add(lesson)
+            await cache_bus.publish(db, CacheEventType.LESSONS)
+            await db.commit()
+
+
+async def apply_migrations() -> None:
+    """Create missing tables and apply pending schema migrations."""
+    async with engine.begin() as conn:
+        await conn.execute(select(func.pg_advisory_xact_lock(MIGRATION_LOCK_KEY)))
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version varchar(100) PRIMARY KEY, "
+            "applied_at timestamp NOT NULL DEFAULT now())"
+        ))
+        applied = set((await conn.execute(text("SELECT version FROM schema_migrations"))).scalars())
+        for version, statements in MIGRATIONS:
+            if version in applied:
+                continue
+            for statement in statements:
+                await conn.execute(text(statement))
+            await conn.execute(
+                text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": version}
+            )
+            logger.info("Applied migration %s", version)
+
+
+async def migrate() -> None:
+    """Create missing tables, apply schema migrations and seed lessons."""
+    await apply_migrations()
+    await seed_lessons()
+
+
+async def _main() -> None:
+    try:
+        await migrate()
+    finally:
+        await close_db()
+    logger.info("Database migrated")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    asyncio.run(_main())
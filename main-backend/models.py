@@ -4,7 +4,7 @@ SQLAlchemy ORM Models
 Database models for job tracking and schedule storage.
 """
 
-from sqlalchemy import Column, String, Integer, DateTime, Text, Enum as SQLEnum, Float, Boolean
+from sqlalchemy import Column, String, Integer, DateTime, Text, Enum as SQLEnum, Float, Boolean, ForeignKey, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from datetime import datetime
 import uuid
@@ -28,6 +28,10 @@ class OptimizationJob(Base):
     Stores the status and results of optimization jobs.
     """
     __tablename__ = "optimization_jobs"
+    __table_args__ = (
+        # Latest-schedule lookups and the retention sweeper
+        Index("ix_optimization_jobs_status_completed_at", "status", "completed_at"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     status = Column(
@@ -39,7 +43,17 @@ class OptimizationJob(Base):
     started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     result = Column(JSONB, nullable=True)  # Stores the full timetable result
+    # Older results are moved here zstd-compressed by the retention sweeper
+    result_compressed = Column(LargeBinary, nullable=True)
     error = Column(Text, nullable=True)
+    # Set for jobs that solve one scenario of a batch
+    batch_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("optimization_batches.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    scenario_name = Column(String(100), nullable=True)
     
     def to_dict(self) -> dict:
         """Convert model to dictionary for API response."""
@@ -51,9 +65,115 @@ class OptimizationJob(Base):
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "result": self.result,
             "error": self.error,
+            "batch_id": str(self.batch_id) if self.batch_id else None,
+            "scenario_name": self.scenario_name,
         }
 
 
+class OptimizationBatch(Base):
+    """
+    Batch scenario optimization tracking table.
+    
+    Groups the optimization jobs that solve variants of one base problem.
+    """
+    __tablename__ = "optimization_batches"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(
+        SQLEnum(JobStatusEnum, name="job_status_enum"),
+        nullable=False,
+        default=JobStatusEnum.PENDING
+    )
+    scenario_count = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+
+class SolveTelemetry(Base):
+    """
+    Solve telemetry table.
+    
+    One row per completed optimization job: problem size features, solver
+    settings, final score and the best score over solving time. Rows are
+    kept independently of the job's retention; ``job_id`` is not a foreign
+    key, since a partitioned optimization_jobs is keyed by (id, started_at).
+    """
+    __tablename__ = "solve_telemetry"
+    __table_args__ = (
+        # Candidate search of time limit recommendations
+        Index("ix_solve_telemetry_sessions", "sessions"),
+    )
+    
+    job_id = Column(UUID(as_uuid=True), primary_key=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    # Problem size
+    sessions = Column(Integer, nullable=False)
+    lessons = Column(Integer, nullable=False)
+    timeslots = Column(Integer, nullable=False)
+    rooms = Column(Integer, nullable=False)
+    teachers = Column(Integer, nullable=False)
+    student_groups = Column(Integer, nullable=False)
+    pinned_sessions = Column(Integer, nullable=False, default=0)
+    # Solver settings; time limit None = Algorithm API default
+    time_limit_seconds = Column(Integer, nullable=True)
+    random_seed = Column(Integer, nullable=True)
+    portfolio_size = Column(Integer, nullable=False, default=1)
+    wire_format = Column(String(10), nullable=True)
+    constructed_sessions = Column(Integer, nullable=True)  # Placed by initial construction
+    # Outcome
+    solve_seconds = Column(Float, nullable=True)  # Wall time of the solver call
+    hard_score = Column(Integer, nullable=True)
+    soft_score = Column(Integer, nullable=True)
+    score_trajectory = Column(JSONB, nullable=False, default=list)  # [[millis, hard, soft], ...]
+
+
+class LessonAssignment(Base):
+    """
+    Lesson assignment table.
+    
+    One row per scheduled lesson session of a completed optimization job,
+    so schedules can be diffed without loading whole results. Like
+    ``SolveTelemetry.job_id``, ``job_id`` is not a foreign key; the primary
+    key serves lookups by job.
+    """
+    __tablename__ = "lesson_assignments"
+    
+    job_id = Column(UUID(as_uuid=True), primary_key=True)
+    # Text: values come from optimization requests, which bound no lengths
+    lesson_id = Column(Text, primary_key=True)  # Session ID, e.g. "CS101-p2"
+    subject = Column(Text, nullable=False)
+    teacher = Column(Text, nullable=False)
+    student_group = Column(Text, nullable=False)
+    # Unassigned sessions have no timeslot and room
+    day_of_week = Column(Text, nullable=True)
+    start_time = Column(Text, nullable=True)
+    end_time = Column(Text, nullable=True)
+    room = Column(Text, nullable=True)
+
+
+class LessonImportJob(Base):
+    """
+    Lesson XLSX import tracking table.
+    
+    Tracks imports that are parsed and written in the background.
+    """
+    __tablename__ = "lesson_import_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(
+        SQLEnum(JobStatusEnum, name="job_status_enum"),
+        nullable=False,
+        default=JobStatusEnum.PENDING
+    )
+    progress = Column(Integer, default=0)
+    filename = Column(String(255), nullable=True)
+    total_rows = Column(Integer, nullable=True)  # Known once the workbook is parsed
+    imported_count = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+
+
 class Lesson(Base):
     """
     Lesson table.
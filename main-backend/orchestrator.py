@@ -2,12 +2,34 @@
 Orchestrator service - coordinates between ML Engine and Algorithm API.
 """
 
+import asyncio
 import httpx
+import logging
+import time
+import uuid
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from caching import MISSING, CacheEventType, LocalCache
 from config import get_settings
+from construction import construct_initial_solution
+from metrics import (
+    ML_CACHE_REQUESTS,
+    ML_ENRICHMENT_DEGRADED,
+    PORTFOLIO_MEMBERS,
+    track_stage,
+    track_upstream,
+)
+from prediction_client import PredictionUnavailableError, create_prediction_client
+from resilience import CircuitOpenError, call_with_retry, is_connect_error
+from solver_pool import SolverPool, SolverPoolTimeoutError
+from results import TELEMETRY_KEY, TimetableStreamParser, result_score
+from problem import Lesson, Problem, Room, Session, Timeslot
+from schemas import LessonCreate, PortfolioConfig, RoomCreate, TimeslotCreate
+from wire import COMPACT_CONTENT_TYPE, decode_solution, encode_problem
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SOLVER_TERMINATE_TIMEOUT_SECONDS = 5.0
 
 
 class OrchestratorService:
@@ -16,190 +38,374 @@ class OrchestratorService:
     def __init__(self):
         self.ml_engine_url = settings.ml_engine_url
         self.algorithm_api_url = settings.algorithm_api_url
+        self.prediction_client = create_prediction_client()
+        self.solver_pool = SolverPool(
+            settings.algorithm_api_urls or [self.algorithm_api_url],
+            settings.solver_max_concurrency_per_instance,
+        )
+        self.prediction_cache_ttl = settings.ml_prediction_cache_ttl_seconds
+        # Predictions by course ID; lesson changes evict their courses
+        self._prediction_cache = LocalCache(
+            "predictions",
+            invalidated_by=[CacheEventType.LESSONS],
+            keyed_by_ids=True,
+            ttl_seconds=self.prediction_cache_ttl,
+        )
+        # Solver instances that rejected the compact wire format
+        self._json_only_solvers: set = set()
+    
+    def _cached_predictions(self, course_ids: List[str]) -> Dict[str, Dict]:
+        """Return unexpired cached predictions for the given course IDs."""
+        cached = {}
+        for course_id in course_ids:
+            prediction = self._prediction_cache.get(course_id)
+            if prediction is not MISSING:
+                cached[course_id] = prediction
+        ML_CACHE_REQUESTS.labels(result="hit").inc(len(cached))
+        ML_CACHE_REQUESTS.labels(result="miss").inc(len(course_ids) - len(cached))
+        return cached
     
     async def get_ml_predictions(self, course_ids: List[str]) -> Dict[str, Dict]:
         """
         Fetch difficulty weights and satisfaction scores from ML Engine.
         
+        Uses the HTTP or embedded prediction client selected by
+        ``ml_engine_mode``. Predictions are cached per course ID for
+        ``ml_prediction_cache_ttl_seconds`` or until the lesson changes; only
+        cache misses are requested.
+        
         Returns:
             Dictionary mapping course_id to prediction data
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.ml_engine_url}/predict",
-                    json={"course_ids": course_ids}
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Convert to dictionary for easy lookup
-                return {
-                    pred["course_id"]: {
-                        "difficulty_weight": pred["difficulty_weight"],
-                        "satisfaction_score": pred["satisfaction_score"],
-                    }
-                    for pred in data.get("predictions", [])
-                }
-            except httpx.HTTPError as e:
-                print(f"ML Engine request failed: {e}")
-                return {}
+        unique_ids = list(dict.fromkeys(course_ids))
+        generation = self._prediction_cache.generation
+        predictions = self._cached_predictions(unique_ids)
+        missing = [course_id for course_id in unique_ids if course_id not in predictions]
+        if not missing:
+            return predictions
+        
+        try:
+            data = await self.prediction_client.predict(missing)
+        except PredictionUnavailableError as e:
+            # Enrichment is best effort: continue with cached predictions only
+            ML_ENRICHMENT_DEGRADED.inc()
+            logger.warning(
+                "ML predictions unavailable, %d courses left without predictions: %s",
+                len(missing), e,
+            )
+            return predictions
+        
+        for pred in data:
+            # Convert to dictionary for easy lookup
+            prediction = {
+                "difficulty_weight": pred["difficulty_weight"],
+                "satisfaction_score": pred["satisfaction_score"],
+            }
+            predictions[pred["course_id"]] = prediction
+            self._prediction_cache.set(pred["course_id"], prediction, generation)
+        
+        return predictions
     
-    async def solve_timetable(self, timetable_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def solve_timetable(
+        self,
+        problem: Problem,
+        time_limit_seconds: Optional[int] = None,
+        random_seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
         Send timetable to Algorithm API for solving.
         
+        The solve is dispatched to the least-loaded healthy instance of the
+        solver pool, waiting for a free slot if all instances are busy. With
+        ``solver_wire_format`` "cbor" the problem is sent in the compact wire
+        format; instances that do not accept it (415) are sent JSON instead.
+        JSON results are converted while they stream in. The result carries
+        the solve's telemetry (problem features, settings, score trajectory)
+        under ``TELEMETRY_KEY``. If the call is cancelled or fails after the
+        request was sent, the instance is told to terminate the solve.
+        
         Args:
-            timetable_data: Timetable with timeslots, rooms, and lessons
+            problem: Problem to solve
+            time_limit_seconds: Solver time budget (server default if None)
+            random_seed: Solver random seed (server default if None)
             
         Returns:
-            Solved timetable with assignments and score
+            Solved timetable in the stored result format
         """
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.algorithm_api_url}/timetable",
-                    json=timetable_data
+        # Lets the solve be terminated if this call is cancelled
+        problem_id = str(uuid.uuid4())
+        params = {"problemId": problem_id}
+        if time_limit_seconds:
+            params["timeLimitSeconds"] = time_limit_seconds
+        if random_seed is not None:
+            params["randomSeed"] = random_seed
+        # Leave headroom over the solver budget for queuing and transfer
+        timeout = max(60.0, (time_limit_seconds or 0) + 30.0)
+        
+        compact = None
+        if settings.solver_wire_format == "cbor":
+            compact = await asyncio.to_thread(encode_problem, problem)
+        
+        try:
+            async with self.solver_pool.acquire() as endpoint, \
+                    httpx.AsyncClient(timeout=timeout) as client:
+                async def request_solution() -> Dict[str, Any]:
+                    with track_upstream("algorithm_api"):
+                        if compact is not None and endpoint.url not in self._json_only_solvers:
+                            response = await client.post(
+                                f"{endpoint.url}/timetable",
+                                content=compact,
+                                params=params,
+                                headers={"Content-Type": COMPACT_CONTENT_TYPE, "Accept": COMPACT_CONTENT_TYPE},
+                            )
+                            if response.status_code != 415:
+                                response.raise_for_status()
+                                return decode_solution(problem, response.content)
+                            logger.warning("%s does not accept %s, using JSON", endpoint.url, COMPACT_CONTENT_TYPE)
+                            self._json_only_solvers.add(endpoint.url)
+                        async with client.stream(
+                            "POST",
+                            f"{endpoint.url}/timetable",
+                            json=problem.to_payload(),
+                            params=params,
+                        ) as response:
+                            response.raise_for_status()
+                            parser = TimetableStreamParser()
+                            async for chunk in response.aiter_bytes():
+                                parser.feed(chunk)
+                            return parser.close()
+                
+                started = time.monotonic()
+                try:
+                    with track_stage("solver_call"):
+                        # A solve that timed out or failed may still be running
+                        # on the instance; only retry if it never got there.
+                        # Long solves outliving the HTTP timeout are no sign of
+                        # an unhealthy instance, so only these trip the circuit.
+                        result = await call_with_retry(
+                            request_solution, endpoint.breaker, retryable=is_connect_error
+                        )
+                except BaseException as e:
+                    # Cancellation, timeouts and errors after the request was
+                    # sent do not stop the solver; keep the slot until the
+                    # instance has been told to, or the pool would count it free
+                    if not isinstance(e, CircuitOpenError) and not is_connect_error(e):
+                        await self._terminate_solve(endpoint.url, problem_id)
+                    raise
+                result.setdefault(TELEMETRY_KEY, {}).update(
+                    problem.features(),
+                    time_limit_seconds=time_limit_seconds,
+                    random_seed=random_seed,
+                    wire_format="json" if compact is None or endpoint.url in self._json_only_solvers else "cbor",
+                    solve_seconds=round(time.monotonic() - started, 3),
                 )
+                return result
+        except (httpx.HTTPError, CircuitOpenError, SolverPoolTimeoutError) as e:
+            logger.error("Algorithm API request failed: %s", e)
+            raise
+    
+    async def _terminate_solve(self, url: str, problem_id: str) -> None:
+        """Ask an Algorithm API instance to stop a solve nobody waits for."""
+        try:
+            async with httpx.AsyncClient(timeout=SOLVER_TERMINATE_TIMEOUT_SECONDS) as client:
+                response = await client.delete(f"{url}/timetable/{problem_id}")
                 response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                print(f"Algorithm API request failed: {e}")
-                raise
+        except httpx.HTTPError as e:
+            logger.warning("Cannot terminate solve %s on %s: %s", problem_id, url, e)
     
-    async def enrich_lessons_with_ml(
-        self, 
-        lessons: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
+    async def solve_portfolio(
+        self,
+        problem: Problem,
+        portfolio: PortfolioConfig,
+        time_limit_seconds: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
-        Enrich lessons with ML predictions if not already provided.
+        Race several solves of the same problem and return the best result.
         
-        Args:
-            lessons: List of lesson dictionaries
-            
-        Returns:
-            Lessons enriched with difficulty_weight and satisfaction_score
+        Members differ by random seed and are dispatched through the solver
+        pool like any other solve. The race stops early when a
+        member meets the portfolio's target score, or when the deadline has
+        passed and at least one result is available; unfinished members are
+        then cancelled, which terminates their solves.
+        
+        Raises:
+            The last member error if every member failed
+        """
+        seeds = portfolio.random_seeds or list(range(portfolio.size))
+        members = {
+            asyncio.create_task(
+                self.solve_timetable(problem, time_limit_seconds, seed)
+            ): seed
+            for seed in seeds
+        }
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + portfolio.deadline_seconds if portfolio.deadline_seconds else None
+        best: Optional[Dict[str, Any]] = None
+        best_score = None
+        best_seed = None
+        last_error: Optional[Exception] = None
+        pending = set(members)
+        
+        try:
+            while pending:
+                # Without a result in hand, keep waiting past the deadline
+                timeout = None
+                if deadline is not None and best is not None:
+                    timeout = max(0.0, deadline - loop.time())
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                
+                for task in done:
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        PORTFOLIO_MEMBERS.labels(outcome="failed").inc()
+                        last_error = e
+                        continue
+                    PORTFOLIO_MEMBERS.labels(outcome="completed").inc()
+                    score = result_score(result)
+                    if best is None or (score is not None and (best_score is None or score > best_score)):
+                        best, best_score, best_seed = result, score, members[task]
+                
+                if best_score is not None and self._meets_target(best_score, portfolio):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                PORTFOLIO_MEMBERS.labels(outcome="cancelled").inc(len(pending))
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        if best is None:
+            raise last_error or RuntimeError("All portfolio members failed")
+        
+        PORTFOLIO_MEMBERS.labels(outcome="best").inc()
+        best[TELEMETRY_KEY]["portfolio_size"] = len(seeds)
+        logger.info("Portfolio solve finished: best score %s from seed %s", best_score, best_seed)
+        return best
+    
+    @staticmethod
+    def _meets_target(score: tuple, portfolio: PortfolioConfig) -> bool:
+        """Check whether a (hard, soft) score reaches the portfolio target."""
+        hard, soft = score
+        if hard < portfolio.target_hard_score:
+            return False
+        return portfolio.target_soft_score is None or soft >= portfolio.target_soft_score
+    
+    async def enrich_lessons_with_ml(self, lessons: List[Lesson]) -> None:
+        """
+        Fill in ML predictions for lessons that do not provide their own
+        difficulty weight and satisfaction score (in place).
         """
         # Find lessons that need ML predictions
         lessons_needing_predictions = [
             lesson for lesson in lessons
-            if lesson.get("difficulty_weight") is None or 
-               lesson.get("satisfaction_score") is None
+            if lesson.difficulty_weight is None or lesson.satisfaction_score is None
         ]
-        
         if not lessons_needing_predictions:
-            return lessons
+            return
         
-        # Get course IDs (use subject as course ID if no explicit ID)
-        course_ids = [
-            lesson.get("id", lesson.get("subject", "unknown"))
-            for lesson in lessons_needing_predictions
-        ]
+        # Fetch predictions, keyed by lesson ID as course ID
+        predictions = await self.get_ml_predictions(
+            [lesson.id for lesson in lessons_needing_predictions]
+        )
         
-        # Fetch predictions
-        predictions = await self.get_ml_predictions(course_ids)
-        
-        # Enrich lessons
-        enriched = []
-        for lesson in lessons:
-            lesson_id = lesson.get("id", lesson.get("subject", "unknown"))
-            if lesson_id in predictions:
-                if lesson.get("difficulty_weight") is None:
-                    lesson["difficulty_weight"] = predictions[lesson_id]["difficulty_weight"]
-                if lesson.get("satisfaction_score") is None:
-                    lesson["satisfaction_score"] = predictions[lesson_id]["satisfaction_score"]
-            enriched.append(lesson)
-        
-        return enriched
+        for lesson in lessons_needing_predictions:
+            prediction = predictions.get(lesson.id)
+            if prediction is None:
+                continue
+            if lesson.difficulty_weight is None:
+                lesson.difficulty_weight = prediction["difficulty_weight"]
+            if lesson.satisfaction_score is None:
+                lesson.satisfaction_score = prediction["satisfaction_score"]
     
     async def run_optimization(
         self,
-        timeslots: List[Dict[str, Any]],
-        rooms: List[Dict[str, Any]],
-        lessons: List[Dict[str, Any]],
+        timeslots: List[TimeslotCreate],
+        rooms: List[RoomCreate],
+        lessons: List[LessonCreate],
+        time_limit_seconds: Optional[int] = None,
+        portfolio: Optional[PortfolioConfig] = None,
     ) -> Dict[str, Any]:
         """
         Run the full optimization workflow.
         
         1. Enrich lessons with ML predictions
-        2. Send to Algorithm API for solving
+        2. Send to Algorithm API for solving (as a portfolio if requested)
         3. Return solved timetable
         
         Args:
             timeslots: Available time slots
             rooms: Available rooms
             lessons: Lessons to schedule
+            time_limit_seconds: Solver time budget per solve
+            portfolio: Optional portfolio configuration
             
         Returns:
             Solved timetable with score
         """
+        sessions_per_lesson = await self.prepare_sessions([Lesson.from_schema(lesson) for lesson in lessons])
+        return await self.solve_prepared(
+            [Timeslot.from_schema(ts) for ts in timeslots],
+            [Room.from_schema(room) for room in rooms],
+            [session for sessions in sessions_per_lesson for session in sessions],
+            time_limit_seconds,
+            portfolio,
+        )
+    
+    async def prepare_sessions(self, lessons: List[Lesson]) -> List[List[Session]]:
+        """
+        Enrich lessons with ML predictions and split them into sessions.
+        
+        The result does not depend on timeslots or rooms, so it can be shared
+        by several solves of variants of the same problem.
+        
+        Returns:
+            One list of sessions per input lesson, in input order
+        """
         # Step 1: Enrich with ML predictions
-        enriched_lessons = await self.enrich_lessons_with_ml(lessons)
+        with track_stage("ml_enrichment"):
+            await self.enrich_lessons_with_ml(lessons)
 
         # Step 1b: Split lessons into 2-3 hour sessions to fit constraints
-        sessionized_lessons: List[Dict[str, Any]] = []
-        for lesson in enriched_lessons:
-            duration = max(2, int(lesson.get("duration_hours", lesson.get("durationHours", 2)) or 2))
-            remaining = duration
-            part_index = 1
-            while remaining > 0:
-                if remaining >= 5:
-                    session_hours = 3
-                elif remaining == 4:
-                    session_hours = 2
-                elif remaining == 3:
-                    session_hours = 3
-                else:
-                    session_hours = 2
-                session_lesson = {
-                    **lesson,
-                    "id": f"{lesson.get('id')}-p{part_index}",
-                    "duration_hours": session_hours,
-                    "durationHours": session_hours,
-                }
-                sessionized_lessons.append(session_lesson)
-                remaining -= session_hours
-                part_index += 1
+        with track_stage("sessionization"):
+            return [lesson.sessions() for lesson in lessons]
+    
+    async def solve_prepared(
+        self,
+        timeslots: List[Timeslot],
+        rooms: List[Room],
+        sessions: List[Session],
+        time_limit_seconds: Optional[int] = None,
+        portfolio: Optional[PortfolioConfig] = None,
+    ) -> Dict[str, Any]:
+        """Build the problem for prepared sessions and solve it."""
+        # Step 2: Resolve pins and prune each session's timeslots
+        with track_stage("payload_build"):
+            problem = Problem(timeslots, rooms, sessions)
 
-        # Step 2: Prepare timetable for Algorithm API
-        # Convert to format expected by Java API
-        timetable_data = {
-            "timeslots": [
-                {
-                    "dayOfWeek": ts.get("day_of_week", ts.get("dayOfWeek")),
-                    "startTime": ts.get("start_time", ts.get("startTime")),
-                    "endTime": ts.get("end_time", ts.get("endTime")),
-                    "preferenceBonus": ts.get("preference_bonus", ts.get("preferenceBonus", 1.0)),
-                }
-                for ts in timeslots
-            ],
-            "rooms": [
-                {
-                    "name": room.get("name"),
-                    "capacity": room.get("capacity", 30),
-                }
-                for room in rooms
-            ],
-            "lessons": [
-                {
-                    "id": lesson.get("id"),
-                    "subject": lesson.get("subject"),
-                    "teacher": lesson.get("teacher"),
-                    "studentGroup": lesson.get("student_group", lesson.get("studentGroup")),
-                    "durationHours": lesson.get("duration_hours", lesson.get("durationHours", 2)),
-                    "difficultyWeight": lesson.get("difficulty_weight", lesson.get("difficultyWeight", 0.5)),
-                    "satisfactionScore": lesson.get("satisfaction_score", lesson.get("satisfactionScore", 0.5)),
-                    "pinned": lesson.get("pinned", False),
-                }
-                for lesson in sessionized_lessons
-            ],
-        }
+        # Step 2b: Construct an initial solution so the solver starts with local search
+        constructed = None
+        if settings.solver_initial_construction:
+            with track_stage("construction"):
+                constructed = await asyncio.to_thread(construct_initial_solution, problem)
         
         # Step 3: Solve
-        result = await self.solve_timetable(timetable_data)
-        
+        if portfolio:
+            result = await self.solve_portfolio(problem, portfolio, time_limit_seconds)
+        else:
+            result = await self.solve_timetable(problem, time_limit_seconds)
+        result[TELEMETRY_KEY]["constructed_sessions"] = constructed
         return result
 
+    def close(self) -> None:
+        """Release resources held by the prediction client."""
+        self.prediction_client.close()
+
 
 # Singleton instance
 orchestrator = OrchestratorService()
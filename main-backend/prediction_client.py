@@ -0,0 +1,189 @@
+"""
+ML prediction clients.
+
+``HttpPredictionClient`` calls a (possibly scaled-out) ML Engine over HTTP.
+``EmbeddedPredictionClient`` loads the ML Engine's ``predictor`` module into
+this process and runs inference in a thread or process pool, removing the
+network hop for single-node deployments. Both return the ML Engine's
+prediction dicts and raise ``PredictionUnavailableError`` on failure.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import httpx
+
+from config import get_settings
+from metrics import track_upstream
+from resilience import CircuitOpenError, breaker_for, call_with_retry, hedged
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Maximum course IDs the ML Engine accepts per /predict request
+MAX_COURSES_PER_REQUEST = 100
+
+# Module name the embedded predictor is registered under; distinct from
+# "predictor" so it cannot clash with main-backend modules
+EMBEDDED_MODULE_NAME = "schedulus_ml_predictor"
+
+
+class PredictionUnavailableError(Exception):
+    """Raised when predictions could not be obtained."""
+
+
+class HttpPredictionClient:
+    """Fetches predictions from the ML Engine's /predict endpoint."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    @property
+    def name(self) -> str:
+        return self.base_url
+
+    def close(self) -> None:
+        pass
+
+    async def check(self) -> None:
+        """Raise unless the ML Engine answers its health check with a loaded model."""
+        async with httpx.AsyncClient(timeout=settings.health_probe_timeout_seconds) as client:
+            response = await client.get(f"{self.base_url}/health")
+            response.raise_for_status()
+            if not response.json().get("model_loaded"):
+                raise PredictionUnavailableError("ML Engine has no model loaded")
+
+    async def predict(self, course_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Predict metrics for the given courses.
+
+        Requests are split to respect the ML Engine's per-request limit and
+        go through retries, the upstream's circuit breaker and, if enabled,
+        hedging.
+        """
+        predictions: List[Dict[str, Any]] = []
+        async with httpx.AsyncClient(timeout=settings.ml_timeout_seconds) as client:
+            for start in range(0, len(course_ids), MAX_COURSES_PER_REQUEST):
+                chunk = course_ids[start:start + MAX_COURSES_PER_REQUEST]
+                data = await self._predict_chunk(client, chunk)
+                predictions.extend(data.get("predictions", []))
+        return predictions
+
+    async def _predict_chunk(self, client: httpx.AsyncClient, course_ids: List[str]) -> Dict[str, Any]:
+        async def request_predictions() -> Dict[str, Any]:
+            with track_upstream("ml_engine"):
+                response = await client.post(
+                    f"{self.base_url}/predict",
+                    json={"course_ids": course_ids}
+                )
+                response.raise_for_status()
+            return response.json()
+
+        async def attempt() -> Dict[str, Any]:
+            if settings.ml_hedge_delay_ms > 0:
+                return await hedged(request_predictions, settings.ml_hedge_delay_ms / 1000)
+            return await request_predictions()
+
+        try:
+            return await call_with_retry(attempt, breaker_for(self.base_url))
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            raise PredictionUnavailableError(str(e)) from e
+
+
+# Predictor module loaded in this process (the main process for thread
+# pools, each worker for process pools)
+_predictor = None
+_predictor_lock = threading.Lock()
+
+
+def _load_predictor(path: str) -> None:
+    """Import the ML Engine's predictor module from a file path."""
+    global _predictor
+    spec = importlib.util.spec_from_file_location(EMBEDDED_MODULE_NAME, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load predictor from {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _predictor = module
+
+
+def _ensure_predictor(path: str) -> None:
+    """Load the predictor unless loaded; thread pools load it on first use."""
+    with _predictor_lock:
+        if _predictor is None:
+            _load_predictor(path)
+
+
+def _predict(path: str, course_ids: List[str]) -> List[Dict[str, Any]]:
+    """Run inference with the predictor (executes in the pool)."""
+    _ensure_predictor(path)
+    return _predictor.predict_course_metrics(course_ids)
+
+
+def _check_predictor(path: str) -> None:
+    """Raise unless the predictor has a model to serve (executes in the pool)."""
+    _ensure_predictor(path)
+    _predictor.active_model()
+
+
+class EmbeddedPredictionClient:
+    """Runs the ML Engine predictor in process, off the event loop."""
+
+    def __init__(self, ml_engine_path: str, executor: str = "thread", workers: int = 2):
+        self.predictor_path = os.path.abspath(os.path.join(ml_engine_path, "predictor.py"))
+        self._executor: Executor
+        if executor == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_load_predictor,
+                initargs=(self.predictor_path,),
+            )
+        elif executor == "thread":
+            # Loaded by the first task rather than here, keeping the
+            # predictor's imports off the startup path
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="ml-predictor",
+            )
+        else:
+            raise ValueError(f"Unknown embedded ML executor: {executor}")
+
+    @property
+    def name(self) -> str:
+        return f"embedded:{self.predictor_path}"
+
+    async def predict(self, course_ids: List[str]) -> List[Dict[str, Any]]:
+        """Predict metrics for the given courses in the executor pool."""
+        loop = asyncio.get_running_loop()
+        try:
+            with track_upstream("ml_embedded"):
+                return await loop.run_in_executor(self._executor, _predict, self.predictor_path, course_ids)
+        except Exception as e:
+            logger.exception("Embedded prediction failed")
+            raise PredictionUnavailableError(str(e)) from e
+
+    async def check(self) -> None:
+        """Raise unless the predictor loads and has a model (loading both if needed)."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, _check_predictor, self.predictor_path)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_prediction_client():
+    """Create the prediction client selected by ``Settings.ml_engine_mode``."""
+    if settings.ml_engine_mode == "embedded":
+        return EmbeddedPredictionClient(
+            settings.ml_engine_path,
+            executor=settings.ml_embedded_executor,
+            workers=settings.ml_embedded_workers,
+        )
+    if settings.ml_engine_mode == "http":
+        return HttpPredictionClient(settings.ml_engine_url)
+    raise ValueError(f"Unknown ML engine mode: {settings.ml_engine_mode}")
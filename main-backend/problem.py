@@ -0,0 +1,323 @@
+"""
+Typed in-memory model of an optimization problem.
+
+Requests are converted once into compact records (``__slots__``, interned
+strings) that flow through ML enrichment, sessionization, feasibility
+pruning, initial construction and wire encoding without per-stage dict
+copies:
+
+- ``Lesson`` holds the catalog data of one lesson; ML enrichment fills its
+  weights in place.
+- ``Session`` is one 2-3 hour part of a lesson. It references its lesson
+  instead of copying it, so sessions only add their own duration and pins.
+- ``Problem`` is one solvable problem: timeslots, rooms and sessions plus
+  array-backed per-session columns for the allowed timeslots and the
+  initial assignment (indexes into ``timeslots``/``rooms``, -1 = none).
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, List, Optional
+
+from results import TimetableResultBuilder
+from schemas import LessonCreate, RoomCreate, TimeslotCreate
+
+UNASSIGNED = -1
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = str(value).split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def valid_index(index: Optional[int], size: int) -> Optional[int]:
+    """``index`` if it points into a list of ``size`` items, else None."""
+    return index if index is not None and 0 <= index < size else None
+
+
+def _intern(value: Optional[str]) -> str:
+    return sys.intern(value) if value else ""
+
+
+class Timeslot:
+    __slots__ = ("day_of_week", "start_time", "end_time", "preference_bonus", "start_minute", "end_minute")
+
+    def __init__(self, day_of_week: str, start_time: str, end_time: str, preference_bonus: Optional[float]):
+        self.day_of_week = day_of_week
+        self.start_time = start_time
+        self.end_time = end_time
+        self.preference_bonus = preference_bonus
+        self.start_minute = _minutes(start_time)
+        self.end_minute = _minutes(end_time)
+
+    @classmethod
+    def from_schema(cls, timeslot: TimeslotCreate) -> "Timeslot":
+        return cls(
+            _intern(timeslot.day_of_week.value),
+            _intern(timeslot.start_time),
+            _intern(timeslot.end_time),
+            timeslot.preference_bonus,
+        )
+
+    @property
+    def minutes(self) -> int:
+        return self.end_minute - self.start_minute
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {
+            "dayOfWeek": self.day_of_week,
+            "startTime": self.start_time,
+            "endTime": self.end_time,
+            "preferenceBonus": self.preference_bonus,
+        }
+
+
+class Room:
+    __slots__ = ("name", "capacity")
+
+    def __init__(self, name: str, capacity: int = 30):
+        self.name = name
+        self.capacity = capacity
+
+    @classmethod
+    def from_schema(cls, room: RoomCreate) -> "Room":
+        return cls(_intern(room.name), room.capacity)
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {"name": self.name, "capacity": self.capacity}
+
+
+class Lesson:
+    __slots__ = (
+        "id", "subject", "teacher", "student_group", "duration_hours",
+        "difficulty_weight", "satisfaction_score",
+        "pinned", "pinned_timeslot_index", "pinned_room_index",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        subject: str,
+        teacher: str,
+        student_group: str,
+        duration_hours: int = 2,
+        difficulty_weight: Optional[float] = None,
+        satisfaction_score: Optional[float] = None,
+        pinned: bool = False,
+        pinned_timeslot_index: Optional[int] = None,
+        pinned_room_index: Optional[int] = None,
+    ):
+        self.id = id
+        self.subject = _intern(subject)
+        self.teacher = _intern(teacher)
+        self.student_group = _intern(student_group)
+        self.duration_hours = duration_hours
+        self.difficulty_weight = difficulty_weight
+        self.satisfaction_score = satisfaction_score
+        self.pinned = pinned
+        self.pinned_timeslot_index = pinned_timeslot_index
+        self.pinned_room_index = pinned_room_index
+
+    @classmethod
+    def from_schema(cls, lesson: LessonCreate) -> "Lesson":
+        return cls(
+            lesson.id,
+            lesson.subject,
+            lesson.teacher,
+            lesson.student_group,
+            lesson.duration_hours,
+            lesson.difficulty_weight,
+            lesson.satisfaction_score,
+            lesson.pinned,
+            lesson.pinned_timeslot_index,
+            lesson.pinned_room_index,
+        )
+
+    def sessions(self) -> List["Session"]:
+        """
+        Split the lesson into 2-3 hour sessions that fit the available timeslots.
+
+        The lesson's pinned timeslot and room apply to its first session; the
+        remaining sessions are scheduled freely.
+        """
+        sessions = []
+        remaining = max(2, int(self.duration_hours or 2))
+        part_index = 1
+        while remaining > 0:
+            if remaining >= 5:
+                session_hours = 3
+            elif remaining == 4:
+                session_hours = 2
+            elif remaining == 3:
+                session_hours = 3
+            else:
+                session_hours = 2
+            first = part_index == 1 and self.pinned
+            sessions.append(Session(
+                f"{self.id}-p{part_index}",
+                self,
+                session_hours,
+                first,
+                self.pinned_timeslot_index if first else None,
+                self.pinned_room_index if first else None,
+            ))
+            remaining -= session_hours
+            part_index += 1
+        return sessions
+
+
+class Session:
+    __slots__ = ("id", "lesson", "duration_hours", "pinned", "pinned_timeslot_index", "pinned_room_index")
+
+    def __init__(
+        self,
+        id: str,
+        lesson: Lesson,
+        duration_hours: int,
+        pinned: bool = False,
+        pinned_timeslot_index: Optional[int] = None,
+        pinned_room_index: Optional[int] = None,
+    ):
+        self.id = id
+        self.lesson = lesson
+        self.duration_hours = duration_hours
+        self.pinned = pinned
+        self.pinned_timeslot_index = pinned_timeslot_index
+        self.pinned_room_index = pinned_room_index
+
+    def with_pins(self, pinned_timeslot_index: Optional[int], pinned_room_index: Optional[int]) -> "Session":
+        return Session(
+            self.id, self.lesson, self.duration_hours, self.pinned, pinned_timeslot_index, pinned_room_index,
+        )
+
+    def to_payload(self) -> Dict[str, Any]:
+        lesson = self.lesson
+        return {
+            "id": self.id,
+            "subject": lesson.subject,
+            "teacher": lesson.teacher,
+            "studentGroup": lesson.student_group,
+            "durationHours": self.duration_hours,
+            "difficultyWeight": lesson.difficulty_weight,
+            "satisfactionScore": lesson.satisfaction_score,
+            "pinned": self.pinned,
+        }
+
+
+class Problem:
+    """
+    One solvable problem.
+
+    Building a problem resolves pins and prunes each session's timeslots to
+    those long enough for it (or its pinned timeslot), so infeasible
+    durations are never explored by the solver. Sessions pinned to both a
+    timeslot and a room start out, and stay, assigned.
+    """
+
+    __slots__ = ("timeslots", "rooms", "sessions", "allowed", "timeslot_index", "room_index")
+
+    def __init__(self, timeslots: List[Timeslot], rooms: List[Room], sessions: List[Session]):
+        self.timeslots = timeslots
+        self.rooms = rooms
+        self.sessions = sessions
+        # Per session: allowed timeslot indexes, None when all are allowed
+        self.allowed: List[Optional[List[int]]] = []
+        self.timeslot_index = array("i", [UNASSIGNED]) * len(sessions)
+        self.room_index = array("i", [UNASSIGNED]) * len(sessions)
+
+        lengths = [timeslot.minutes for timeslot in timeslots]
+        fitting_by_hours: Dict[int, Optional[List[int]]] = {}
+        for position, session in enumerate(sessions):
+            pinned_timeslot = pinned_room = None
+            if session.pinned:
+                pinned_timeslot = valid_index(session.pinned_timeslot_index, len(timeslots))
+                pinned_room = valid_index(session.pinned_room_index, len(rooms))
+                if pinned_timeslot is not None and pinned_room is not None:
+                    self.timeslot_index[position] = pinned_timeslot
+                    self.room_index[position] = pinned_room
+
+            if pinned_timeslot is not None:
+                self.allowed.append([pinned_timeslot])
+                continue
+            hours = int(session.duration_hours or 2)
+            if hours not in fitting_by_hours:
+                fitting = [index for index, length in enumerate(lengths) if length >= hours * 60]
+                # With no fitting timeslot, leave the domain open and let the
+                # solver report the violation
+                fitting_by_hours[hours] = fitting if fitting and len(fitting) < len(lengths) else None
+            # Sessions of the same length share one list
+            self.allowed.append(fitting_by_hours[hours])
+
+    @classmethod
+    def from_schema(
+        cls,
+        timeslots: List[TimeslotCreate],
+        rooms: List[RoomCreate],
+        lessons: List[LessonCreate],
+    ) -> "Problem":
+        """The problem of request data as given, without ML enrichment."""
+        return cls(
+            [Timeslot.from_schema(timeslot) for timeslot in timeslots],
+            [Room.from_schema(room) for room in rooms],
+            [session for lesson in lessons for session in Lesson.from_schema(lesson).sessions()],
+        )
+
+    def to_payload(self) -> Dict[str, Any]:
+        """The problem in the Algorithm API's JSON format."""
+        lessons = []
+        for position, session in enumerate(self.sessions):
+            lesson = session.to_payload()
+            if session.pinned:
+                lesson["pinnedTimeslotIndex"] = valid_index(session.pinned_timeslot_index, len(self.timeslots))
+                lesson["pinnedRoomIndex"] = valid_index(session.pinned_room_index, len(self.rooms))
+            if self.timeslot_index[position] != UNASSIGNED:
+                lesson["timeslotIndex"] = self.timeslot_index[position]
+                lesson["roomIndex"] = self.room_index[position]
+            if self.allowed[position] is not None:
+                lesson["allowedTimeslotIndexes"] = self.allowed[position]
+            lessons.append(lesson)
+        return {
+            "timeslots": [timeslot.to_payload() for timeslot in self.timeslots],
+            "rooms": [room.to_payload() for room in self.rooms],
+            "lessons": lessons,
+        }
+
+    def features(self) -> Dict[str, int]:
+        """Size features of the problem, recorded with its solve telemetry."""
+        lessons = {id(session.lesson): session.lesson for session in self.sessions}.values()
+        return {
+            "sessions": len(self.sessions),
+            "lessons": len(lessons),
+            "timeslots": len(self.timeslots),
+            "rooms": len(self.rooms),
+            "teachers": len({lesson.teacher for lesson in lessons}),
+            "student_groups": len({lesson.student_group for lesson in lessons}),
+            "pinned_sessions": sum(1 for session in self.sessions if session.pinned),
+        }
+
+    def solution(
+        self,
+        score: Any,
+        timeslot_indexes,
+        room_indexes,
+        score_trajectory: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        A solved timetable in the stored result format, from each session's
+        assigned timeslot and room index.
+        """
+        builder = TimetableResultBuilder()
+        timeslots = [timeslot.to_payload() for timeslot in self.timeslots]
+        rooms = [room.to_payload() for room in self.rooms]
+        for timeslot in timeslots:
+            builder.add_timeslot(timeslot)
+        for room in rooms:
+            builder.add_room(room)
+        for session, timeslot, room in zip(self.sessions, timeslot_indexes, room_indexes):
+            lesson = session.to_payload()
+            lesson["timeslot"] = timeslots[timeslot] if timeslot != UNASSIGNED else None
+            lesson["room"] = rooms[room] if room != UNASSIGNED else None
+            builder.add_lesson(lesson)
+        builder.set_score(score)
+        builder.set_score_trajectory(score_trajectory)
+        return builder.result
@@ -0,0 +1,223 @@
+"""
+Resilience helpers for upstream HTTP calls.
+
+Retries with jittered exponential backoff, per-upstream circuit breakers
+that fail fast while an upstream is down, and hedged requests that race a
+second copy of a slow call.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from config import get_settings
+from metrics import CIRCUIT_STATE, UPSTREAM_RETRIES
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transport failures, throttling and server errors are retryable."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def is_connect_error(error: Exception) -> bool:
+    """Connection failures: the request was never sent, so a retry cannot duplicate work."""
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast for ``reset_timeout`` seconds. Then one trial call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._publish()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving OPEN to HALF_OPEN once the timeout elapsed."""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._set_state(self.HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self._state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning("Circuit for %s opened after %d failures", self.name, self.consecutive_failures)
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def release(self) -> None:
+        """Give back a half-open trial slot without recording an outcome."""
+        self._trial_in_flight = False
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        self._publish()
+
+    def _publish(self) -> None:
+        CIRCUIT_STATE.labels(upstream=self.name).set(self._STATE_VALUES[self._state])
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(upstream: str) -> CircuitBreaker:
+    """Get (or create) the circuit breaker of an upstream, keyed by base URL."""
+    breaker = _breakers.get(upstream)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            upstream,
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_timeout=settings.circuit_reset_seconds,
+        )
+        _breakers[upstream] = breaker
+    return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    """States of all known circuit breakers, for health reporting."""
+    return {name: breaker.state for name, breaker in _breakers.items()}
+
+
+@dataclass
+class RetryPolicy:
+    """Retry budget and jittered exponential backoff parameters."""
+    max_attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 5.0
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=max(1, settings.upstream_max_attempts),
+            base_delay=settings.upstream_backoff_base_seconds,
+            max_delay=settings.upstream_backoff_max_seconds,
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt`` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+async def call_with_retry(
+    call: Callable[[], Awaitable[T]],
+    breaker: CircuitBreaker,
+    policy: Optional[RetryPolicy] = None,
+    retryable: Callable[[Exception], bool] = is_retryable,
+) -> T:
+    """
+    Run an upstream call through its circuit breaker, retrying transient errors.
+
+    Errors that ``retryable`` rejects (by default e.g. 4xx responses) are
+    raised immediately and do not count against the circuit.
+
+    Raises:
+        CircuitOpenError: If the circuit is open
+        httpx.HTTPError: The last error once retries are exhausted
+    """
+    policy = policy or RetryPolicy.from_settings()
+    attempt = 1
+    while True:
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {breaker.name}")
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not retryable(e):
+                breaker.release()
+                raise
+            breaker.record_failure()
+            if attempt >= policy.max_attempts:
+                raise
+            UPSTREAM_RETRIES.labels(upstream=breaker.name).inc()
+            await asyncio.sleep(policy.backoff(attempt))
+            attempt += 1
+            continue
+        breaker.record_success()
+        return result
+
+
+async def hedged(call: Callable[[], Awaitable[T]], delay: float) -> T:
+    """
+    Run a call, starting an identical backup call if it is slower than ``delay``.
+
+    The first successful result wins and the other call is cancelled. If
+    one copy fails, the other one is still awaited.
+    """
+    primary = asyncio.ensure_future(call())
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        backup = asyncio.ensure_future(call())
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    finally:
+        if not primary.done():
+            primary.cancel()
@@ -0,0 +1,187 @@
+"""
+Parsing of Algorithm API results into the stored result format.
+
+Results are converted entry by entry into plain dicts shaped like
+``TimetableResponse``, without building a tree of response models; large
+JSON results are parsed incrementally while they stream in.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import ijson
+
+# Key of a solve's telemetry in a result on its way to storage. It is
+# persisted to solve_telemetry by run_job and not stored with the result.
+TELEMETRY_KEY = "telemetry"
+
+
+def parse_score(score) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Timefold score into a (hard, soft) tuple.
+    
+    Accepts the string format (e.g., "0hard/-15soft") as well as the
+    object format ({"hardScore": 0, "softScore": -15}). Tuples compare
+    the same way Timefold compares HardSoftScores.
+    """
+    if not score:
+        return None
+    if isinstance(score, str):
+        hard = 0
+        soft = 0
+        parts = score.replace("hard", "").replace("soft", "").split("/")
+        if len(parts) >= 1:
+            hard = int(parts[0])
+        if len(parts) >= 2:
+            soft = int(parts[1])
+        return hard, soft
+    if isinstance(score, dict):
+        return score.get("hardScore", 0), score.get("softScore", 0)
+    return None
+
+
+def result_score(result: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """The (hard, soft) score of a timetable in the stored result format."""
+    score = result.get("score")
+    return (score["hard_score"], score["soft_score"]) if score else None
+
+
+def _timeslot(ts: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "day_of_week": ts.get("dayOfWeek", ""),
+        "start_time": ts.get("startTime", ""),
+        "end_time": ts.get("endTime", ""),
+        "preference_bonus": ts.get("preferenceBonus"),
+    }
+
+
+def _room(room: Dict[str, Any]) -> Dict[str, Any]:
+    return {"name": room.get("name", ""), "capacity": room.get("capacity")}
+
+
+class TimetableResultBuilder:
+    """
+    Converts Algorithm API result entries, one at a time, into the stored
+    result format: ``TimetableResponse`` as JSON-compatible dicts, the form
+    ``OptimizationJob.result`` holds.
+
+    Lessons assigned to the same timeslot or room share that entry's dict,
+    so a timetable's size grows with its lessons only.
+    """
+
+    def __init__(self):
+        self.result: Dict[str, Any] = {"timeslots": [], "rooms": [], "lessons": [], "score": None}
+        self._timeslots: Dict[tuple, Dict[str, Any]] = {}
+        self._rooms: Dict[tuple, Dict[str, Any]] = {}
+
+    def add_timeslot(self, ts: Dict[str, Any]) -> None:
+        self.result["timeslots"].append(_timeslot(ts))
+
+    def add_room(self, room: Dict[str, Any]) -> None:
+        self.result["rooms"].append(_room(room))
+
+    def add_lesson(self, lesson: Dict[str, Any]) -> None:
+        ts = lesson.get("timeslot")
+        room = lesson.get("room")
+        if ts:
+            key = (ts.get("dayOfWeek"), ts.get("startTime"), ts.get("endTime"), ts.get("preferenceBonus"))
+            ts = self._timeslots.get(key) or self._timeslots.setdefault(key, _timeslot(ts))
+        if room:
+            key = (room.get("name"), room.get("capacity"))
+            room = self._rooms.get(key) or self._rooms.setdefault(key, _room(room))
+        self.result["lessons"].append({
+            "id": lesson.get("id", ""),
+            "subject": lesson.get("subject", ""),
+            "teacher": lesson.get("teacher", ""),
+            "student_group": lesson.get("studentGroup", ""),
+            "duration_hours": lesson.get("durationHours", 2),
+            "difficulty_weight": lesson.get("difficultyWeight"),
+            "satisfaction_score": lesson.get("satisfactionScore"),
+            "pinned": lesson.get("pinned", False),
+            "timeslot": ts or None,
+            "room": room or None,
+        })
+
+    def set_score(self, score) -> None:
+        parsed = parse_score(score)
+        self.result["score"] = {"hard_score": parsed[0], "soft_score": parsed[1]} if parsed else None
+
+    def set_score_trajectory(self, points: Optional[List[Dict[str, Any]]]) -> None:
+        """Keep the solver's best score over time as telemetry of the solve."""
+        trajectory = []
+        for point in points or []:
+            score = parse_score(point.get("score"))
+            if score is not None:
+                trajectory.append([point.get("millis", 0), score[0], score[1]])
+        self.result.setdefault(TELEMETRY_KEY, {})["score_trajectory"] = trajectory
+
+
+def stored_timetable_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a complete Algorithm API result to the stored result format."""
+    builder = TimetableResultBuilder()
+    for ts in result.get("timeslots", []):
+        builder.add_timeslot(ts)
+    for room in result.get("rooms", []):
+        builder.add_room(room)
+    for lesson in result.get("lessons", []):
+        builder.add_lesson(lesson)
+    builder.set_score(result.get("score"))
+    builder.set_score_trajectory(result.get("scoreTrajectory"))
+    return builder.result
+
+
+class TimetableStreamParser:
+    """
+    Incremental parser of an Algorithm API JSON result.
+
+    Fed the response body chunk by chunk, it converts each timeslot, room
+    and lesson entry into the stored result format as soon as the entry is
+    complete. Neither the raw body nor a tree of the whole document is
+    held; only the entry being parsed.
+    """
+
+    _ENTRIES = {
+        "timeslots.item": TimetableResultBuilder.add_timeslot,
+        "rooms.item": TimetableResultBuilder.add_room,
+        "lessons.item": TimetableResultBuilder.add_lesson,
+        "score": TimetableResultBuilder.set_score,
+        "scoreTrajectory": TimetableResultBuilder.set_score_trajectory,
+    }
+
+    def __init__(self):
+        self._builder = TimetableResultBuilder()
+        self._events = ijson.sendable_list()
+        self._parser = ijson.parse_coro(self._events, use_float=True)
+        self._entry: Optional[ijson.ObjectBuilder] = None
+        self._entry_prefix: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> None:
+        self._parser.send(chunk)
+        self._consume()
+
+    def close(self) -> Dict[str, Any]:
+        """Finish parsing and return the timetable in the stored result format."""
+        self._parser.close()
+        self._consume()
+        if TELEMETRY_KEY not in self._builder.result:
+            # No trajectory in the body; record an empty one as the full parse does
+            self._builder.set_score_trajectory(None)
+        return self._builder.result
+
+    def _consume(self) -> None:
+        for prefix, event, value in self._events:
+            if self._entry is not None:
+                self._entry.event(event, value)
+                if prefix == self._entry_prefix and event in ("end_map", "end_array"):
+                    self._finish_entry()
+            elif event in ("start_map", "start_array") and prefix in self._ENTRIES:
+                self._entry = ijson.ObjectBuilder()
+                self._entry_prefix = prefix
+                self._entry.event(event, value)
+            elif prefix == "score" and event in ("string", "null"):
+                self._builder.set_score(value)
+        del self._events[:]
+
+    def _finish_entry(self) -> None:
+        value, prefix = self._entry.value, self._entry_prefix
+        self._entry = self._entry_prefix = None
+        self._ENTRIES[prefix](self._builder, value)
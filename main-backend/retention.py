@@ -0,0 +1,221 @@
+"""
+Optimization job history retention.
+
+A background sweeper that keeps ``optimization_jobs`` small:
+
+- The latest ``retention_keep_full_results`` completed jobs per scope (each
+  batch, and all non-batch jobs together) keep their full JSONB result.
+  Older results are moved into ``result_compressed`` as zstd-compressed
+  JSON, or dropped when ``retention_compress_results`` is off.
+- Lesson assignments (see ``schedule_diff``) are kept only for jobs that
+  still have their full result; diffing an older job backfills them again.
+- FAILED jobs older than ``retention_failed_max_age_days`` and jobs stuck
+  in PENDING/RUNNING for ``retention_stale_job_hours`` are deleted.
+- When the table has been partitioned by ``started_at`` month (see
+  ``sql/partition_optimization_jobs.sql``), partitions for the upcoming
+  months are created ahead of time.
+
+Only one sweeper runs at a time across backend workers, guarded by a
+PostgreSQL advisory lock.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import zstandard
+from sqlalchemy import bindparam, delete, exists, func, null, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from config import get_settings
+from database import engine
+from metrics import RETENTION_ROWS, RETENTION_SWEEP_SECONDS
+from models import JobStatusEnum, LessonAssignment, OptimizationBatch, OptimizationJob
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key of the sweeper's advisory lock
+SWEEPER_LOCK_KEY = 0x5C4ED0
+# Results compressed per round trip
+COMPACTION_CHUNK_SIZE = 100
+ZSTD_LEVEL = 10
+
+_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def compress_result(result: Dict[str, Any]) -> bytes:
+    """Serialize a stored result to zstd-compressed JSON."""
+    return _compressor.compress(json.dumps(result, separators=(",", ":")).encode("utf-8"))
+
+
+def decompress_result(data: bytes) -> Dict[str, Any]:
+    """Inverse of ``compress_result``."""
+    return json.loads(_decompressor.decompress(data))
+
+
+def stored_result(job: OptimizationJob) -> Optional[Dict[str, Any]]:
+    """A job's result, whether kept in full or compacted; None if dropped."""
+    if job.result is not None:
+        return job.result
+    if job.result_compressed is not None:
+        return decompress_result(job.result_compressed)
+    return None
+
+
+def _compaction_candidates(keep: int):
+    """Completed jobs with a full result beyond the latest ``keep`` of their scope."""
+    ranked = (
+        select(
+            OptimizationJob.id,
+            func.row_number().over(
+                partition_by=OptimizationJob.batch_id,
+                order_by=OptimizationJob.completed_at.desc(),
+            ).label("rank"),
+        )
+        .where(OptimizationJob.status == JobStatusEnum.COMPLETED)
+        .where(OptimizationJob.result.isnot(None))
+        .subquery()
+    )
+    return select(ranked.c.id).where(ranked.c.rank > keep)
+
+
+async def _compact_results(conn: AsyncConnection) -> None:
+    """Compress or drop the full results of all but the latest jobs per scope."""
+    candidates = _compaction_candidates(max(1, settings.retention_keep_full_results))
+
+    if not settings.retention_compress_results:
+        result = await conn.execute(
+            update(OptimizationJob)
+            .where(OptimizationJob.id.in_(candidates))
+            .values(result=null())
+        )
+        await conn.commit()
+        RETENTION_ROWS.labels(action="dropped").inc(result.rowcount)
+        return
+
+    while True:
+        rows = (await conn.execute(
+            select(OptimizationJob.id, OptimizationJob.result)
+            .where(OptimizationJob.id.in_(candidates.limit(COMPACTION_CHUNK_SIZE)))
+        )).all()
+        if not rows:
+            return
+        compressed = await asyncio.to_thread(
+            lambda: [{"job_id": job_id, "data": compress_result(result)} for job_id, result in rows]
+        )
+        await conn.execute(
+            update(OptimizationJob)
+            .where(OptimizationJob.id == bindparam("job_id"))
+            .values(result=null(), result_compressed=bindparam("data")),
+            compressed,
+        )
+        await conn.commit()
+        RETENTION_ROWS.labels(action="compressed").inc(len(rows))
+
+
+async def _prune_assignments(conn: AsyncConnection) -> None:
+    """Delete lesson assignments of jobs compacted, invalidated or deleted."""
+    result = await conn.execute(
+        delete(LessonAssignment)
+        .where(~exists().where(
+            (OptimizationJob.id == LessonAssignment.job_id) & OptimizationJob.result.isnot(None)
+        ))
+    )
+    await conn.commit()
+    RETENTION_ROWS.labels(action="pruned_assignments").inc(result.rowcount)
+
+
+async def _purge_jobs(conn: AsyncConnection) -> None:
+    """Delete old FAILED jobs, stale unfinished jobs and then-empty batches."""
+    now = datetime.utcnow()
+
+    failed = await conn.execute(
+        delete(OptimizationJob)
+        .where(OptimizationJob.status == JobStatusEnum.FAILED)
+        .where(OptimizationJob.started_at < now - timedelta(days=settings.retention_failed_max_age_days))
+    )
+    RETENTION_ROWS.labels(action="purged_failed").inc(failed.rowcount)
+
+    stale = await conn.execute(
+        delete(OptimizationJob)
+        .where(OptimizationJob.status.in_([JobStatusEnum.PENDING, JobStatusEnum.RUNNING]))
+        .where(OptimizationJob.started_at < now - timedelta(hours=settings.retention_stale_job_hours))
+    )
+    RETENTION_ROWS.labels(action="purged_stale").inc(stale.rowcount)
+
+    batches = await conn.execute(
+        delete(OptimizationBatch)
+        .where(OptimizationBatch.started_at < now - timedelta(hours=settings.retention_stale_job_hours))
+        .where(~exists().where(OptimizationJob.batch_id == OptimizationBatch.id))
+    )
+    RETENTION_ROWS.labels(action="purged_batches").inc(batches.rowcount)
+    await conn.commit()
+
+
+def _month_starts(first: date, count: int) -> List[date]:
+    """First days of ``count`` consecutive months starting with ``first``'s month."""
+    months = []
+    year, month = first.year, first.month
+    for _ in range(count):
+        months.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+async def _ensure_partitions(conn: AsyncConnection) -> None:
+    """Create upcoming monthly partitions if the jobs table is partitioned."""
+    partitioned = (await conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'optimization_jobs'"
+    ))).scalar_one_or_none()
+    if not partitioned:
+        return
+
+    # Current month plus the months ahead, and the end bound of the last one
+    bounds = _month_starts(date.today(), settings.retention_partitions_ahead + 2)
+    for start, end in zip(bounds, bounds[1:]):
+        # Bounds are generated dates, never user input
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS optimization_jobs_{start:%Y_%m} "
+            f"PARTITION OF optimization_jobs "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+    await conn.commit()
+
+
+async def sweep() -> None:
+    """Run one retention pass, unless another worker is already sweeping."""
+    async with engine.connect() as conn:
+        locked = (await conn.execute(
+            select(func.pg_try_advisory_lock(SWEEPER_LOCK_KEY))
+        )).scalar_one()
+        await conn.commit()
+        if not locked:
+            return
+        start = time.perf_counter()
+        try:
+            await _ensure_partitions(conn)
+            await _compact_results(conn)
+            await _purge_jobs(conn)
+            await _prune_assignments(conn)
+        finally:
+            await conn.rollback()
+            await conn.execute(select(func.pg_advisory_unlock(SWEEPER_LOCK_KEY)))
+            await conn.commit()
+            RETENTION_SWEEP_SECONDS.observe(time.perf_counter() - start)
+
+
+async def run_retention_sweeper() -> None:
+    """Sweep forever at the configured interval."""
+    while True:
+        try:
+            await sweep()
+        except Exception:
+            logger.exception("Retention sweep failed")
+        await asyncio.sleep(settings.retention_interval_seconds)
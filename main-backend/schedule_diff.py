@@ -0,0 +1,202 @@
+"""
+Schedule diffs between optimization jobs.
+
+Completed jobs (other than batch scenarios) record where each lesson
+session was scheduled in ``lesson_assignments``. The diff of two jobs is a
+full outer join of their assignments on the session ID, computed in the
+database from the primary key index, so only moved, added and removed
+sessions leave it. The retention sweeper deletes a job's assignments once
+its full result is compacted; jobs without assignments are backfilled from
+their stored result when they are diffed.
+
+Diffs are cached per pair of job IDs, for ``schedule_diff_cache_ttl_seconds``
+and up to ``schedule_diff_cache_max_entries`` pairs. A schedule change event
+evicts the pairs involving the changed job, since editing the latest
+schedule also edits its assignments.
+"""
+
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, exists, func, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from caching import CacheEventType, LocalCache
+from config import get_settings
+from database import async_session_factory
+from models import JobStatusEnum, LessonAssignment, OptimizationJob, SolveTelemetry
+from retention import stored_result
+from schemas import AssignmentChange, AssignmentSlot, ScheduleDiffResponse, ScoreResponse
+
+settings = get_settings()
+
+# Diffs by (from job ID, to job ID) strings
+diff_cache = LocalCache(
+    "schedule_diff",
+    invalidated_by=[CacheEventType.SCHEDULE],
+    key_ids=lambda pair: pair,
+    ttl_seconds=settings.schedule_diff_cache_ttl_seconds,
+    max_entries=settings.schedule_diff_cache_max_entries,
+)
+
+_SLOT_COLUMNS = ("day_of_week", "start_time", "end_time", "room")
+
+
+class JobNotFoundError(Exception):
+    """Raised when a diffed job does not exist."""
+
+
+class JobNotCompletedError(Exception):
+    """Raised when a diffed job has not completed."""
+
+
+def assignment_rows(job_id: uuid.UUID, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """``lesson_assignments`` rows of a timetable in the stored result format."""
+    rows = []
+    for lesson in result.get("lessons", []):
+        timeslot = lesson.get("timeslot") or {}
+        room = lesson.get("room") or {}
+        rows.append({
+            "job_id": job_id,
+            "lesson_id": lesson["id"],
+            "subject": lesson.get("subject", ""),
+            "teacher": lesson.get("teacher", ""),
+            "student_group": lesson.get("student_group", ""),
+            "day_of_week": timeslot.get("day_of_week"),
+            "start_time": timeslot.get("start_time"),
+            "end_time": timeslot.get("end_time"),
+            "room": room.get("name"),
+        })
+    return rows
+
+
+async def record_assignments(db: AsyncSession, job_id: uuid.UUID, result: Dict[str, Any]) -> None:
+    """Record a completed job's assignments in ``db``'s transaction."""
+    rows = assignment_rows(job_id, result)
+    if rows:
+        await db.execute(insert(LessonAssignment).on_conflict_do_nothing(), rows)
+
+
+async def remove_assignments(db: AsyncSession, job_id: uuid.UUID, session_ids: Iterable[str]) -> None:
+    """Delete assignments of sessions removed from a job's result."""
+    await db.execute(
+        delete(LessonAssignment)
+        .where(LessonAssignment.job_id == job_id)
+        .where(LessonAssignment.lesson_id.in_(list(session_ids)))
+    )
+
+
+def _score(hard: Optional[int], soft: Optional[int]) -> Optional[ScoreResponse]:
+    return ScoreResponse(hard_score=hard, soft_score=soft) if hard is not None and soft is not None else None
+
+
+async def _prepare_job(db: AsyncSession, job_id: uuid.UUID) -> Optional[ScoreResponse]:
+    """
+    Check that a job can be diffed, backfilling its assignments if needed.
+
+    Returns:
+        The job's score, if known
+    """
+    row = (await db.execute(
+        select(
+            OptimizationJob.status,
+            OptimizationJob.result["score"],
+            SolveTelemetry.hard_score,
+            SolveTelemetry.soft_score,
+            exists().where(LessonAssignment.job_id == OptimizationJob.id),
+        )
+        .outerjoin(SolveTelemetry, SolveTelemetry.job_id == OptimizationJob.id)
+        .where(OptimizationJob.id == job_id)
+    )).one_or_none()
+    if row is None:
+        raise JobNotFoundError(f"Job {job_id} not found")
+    status, result_score, hard_score, soft_score, has_assignments = row
+    if status != JobStatusEnum.COMPLETED:
+        raise JobNotCompletedError(f"Job {job_id} has not completed")
+
+    if result_score:
+        score = _score(result_score.get("hard_score"), result_score.get("soft_score"))
+    else:
+        score = _score(hard_score, soft_score)
+    if has_assignments:
+        return score
+
+    # Batch scenario, compacted or completed before assignments were recorded
+    async with async_session_factory() as primary:
+        job = await primary.get(OptimizationJob, job_id)
+        result = stored_result(job) or {}
+        await record_assignments(primary, job_id, result)
+        await primary.commit()
+    if score is None and result.get("score"):
+        score = _score(result["score"]["hard_score"], result["score"]["soft_score"])
+    return score
+
+
+def _change(side: Dict[str, Any], before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> AssignmentChange:
+    return AssignmentChange(
+        id=side["lesson_id"],
+        subject=side["subject"],
+        teacher=side["teacher"],
+        student_group=side["student_group"],
+        before=AssignmentSlot(**{name: before[name] for name in _SLOT_COLUMNS}) if before else None,
+        after=AssignmentSlot(**{name: after[name] for name in _SLOT_COLUMNS}) if after else None,
+    )
+
+
+async def diff_schedules(db: AsyncSession, from_job_id: uuid.UUID, to_job_id: uuid.UUID) -> ScheduleDiffResponse:
+    """
+    Sessions moved, added and removed between two completed jobs.
+
+    Raises:
+        JobNotFoundError: A job does not exist
+        JobNotCompletedError: A job has not completed
+    """
+    from_score = await _prepare_job(db, from_job_id)
+    to_score = await _prepare_job(db, to_job_id)
+
+    before = select(LessonAssignment).where(LessonAssignment.job_id == from_job_id).subquery()
+    after = select(LessonAssignment).where(LessonAssignment.job_id == to_job_id).subquery()
+    rows = await db.execute(
+        select(
+            *(column.label(f"before_{column.name}") for column in before.c),
+            *(column.label(f"after_{column.name}") for column in after.c),
+        )
+        .select_from(before.join(after, before.c.lesson_id == after.c.lesson_id, full=True))
+        .where(or_(
+            before.c.lesson_id.is_(None),
+            after.c.lesson_id.is_(None),
+            tuple_(*(before.c[name] for name in _SLOT_COLUMNS)).is_distinct_from(
+                tuple_(*(after.c[name] for name in _SLOT_COLUMNS))
+            ),
+        ))
+        .order_by(func.coalesce(before.c.lesson_id, after.c.lesson_id))
+    )
+
+    moved, added, removed = [], [], []
+    for row in rows.mappings():
+        old = {name: row[f"before_{name}"] for name in before.c.keys()}
+        new = {name: row[f"after_{name}"] for name in after.c.keys()}
+        if old["lesson_id"] is None:
+            added.append(_change(new, None, new))
+        elif new["lesson_id"] is None:
+            removed.append(_change(old, old, None))
+        else:
+            moved.append(_change(new, old, new))
+
+    score_change = None
+    if from_score and to_score:
+        score_change = ScoreResponse(
+            hard_score=to_score.hard_score - from_score.hard_score,
+            soft_score=to_score.soft_score - from_score.soft_score,
+        )
+    return ScheduleDiffResponse(
+        from_job_id=str(from_job_id),
+        to_job_id=str(to_job_id),
+        moved=moved,
+        added=added,
+        removed=removed,
+        from_score=from_score,
+        to_score=to_score,
+        score_change=score_change,
+    )
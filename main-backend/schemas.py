@@ -2,7 +2,7 @@
 Pydantic schemas for API request/response models.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
 from datetime import datetime
 from enum import Enum
@@ -45,12 +45,121 @@ class LessonCreate(BaseModel):
     pinned_room_index: Optional[int] = None
 
 
+class PortfolioConfig(BaseModel):
+    """
+    Race several solver configurations and keep the best result.
+    
+    Each member solves the same problem with its own random seed. Remaining
+    members are cancelled once a member reaches the target score or, when
+    at least one result is in, once the deadline passes.
+    """
+    size: int = Field(default=4, ge=2, le=16)
+    # Defaults to 0..size-1; otherwise size is the number of seeds
+    random_seeds: Optional[List[int]] = Field(default=None, min_length=2, max_length=16)
+    target_hard_score: int = 0
+    target_soft_score: Optional[int] = None  # None = any feasible score wins
+    deadline_seconds: Optional[int] = Field(default=None, ge=1)
+    
+    @model_validator(mode="after")
+    def check_seeds(self) -> "PortfolioConfig":
+        if self.random_seeds is None:
+            return self
+        if len(set(self.random_seeds)) != len(self.random_seeds):
+            raise ValueError("'random_seeds' must be unique")
+        if "size" in self.model_fields_set and self.size != len(self.random_seeds):
+            raise ValueError("'size' must match the number of 'random_seeds'")
+        self.size = len(self.random_seeds)
+        return self
+
+
 class OptimizationRequest(BaseModel):
     """Request to start schedule optimization."""
     timeslots: List[TimeslotCreate]
     rooms: List[RoomCreate]
     lessons: List[LessonCreate]
     solver_time_limit_seconds: int = 30
+    portfolio: Optional[PortfolioConfig] = None
+
+
+class TimeLimitRecommendationRequest(BaseModel):
+    """Problem to recommend a solver time limit for."""
+    timeslots: List[TimeslotCreate]
+    rooms: List[RoomCreate]
+    lessons: List[LessonCreate]
+    # Share of the final soft score improvement the time limit should reach
+    convergence: float = Field(default=0.99, gt=0, le=1)
+
+
+class TimeLimitRecommendationResponse(BaseModel):
+    """Solver time limit recommended from similar past solves."""
+    recommended_time_limit_seconds: int
+    convergence: float
+    similar_jobs: int
+    median_convergence_seconds: float
+    max_convergence_seconds: float
+
+
+class ScenarioDelta(BaseModel):
+    """
+    Changes applied to the base problem of a batch to form one scenario.
+    
+    Timeslot indexes refer to the base problem's timeslots; pinned indexes
+    of remaining lessons are remapped accordingly.
+    """
+    name: str = Field(min_length=1, max_length=100)
+    replace_timeslots: Optional[List[TimeslotCreate]] = None
+    add_timeslots: List[TimeslotCreate] = []
+    remove_timeslot_indexes: List[int] = []
+    add_rooms: List[RoomCreate] = []
+    remove_rooms: List[str] = []  # Room names
+    add_lessons: List[LessonCreate] = []
+    remove_lesson_ids: List[str] = []
+
+
+class BatchOptimizationRequest(BaseModel):
+    """Request to optimize several variants of one base problem."""
+    base: OptimizationRequest
+    scenarios: List[ScenarioDelta] = Field(min_length=1, max_length=50)
+    include_base: bool = True  # Also solve the unmodified base problem as "base"
+
+
+class LessonOperationType(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    PIN = "pin"
+
+
+class LessonOperation(BaseModel):
+    """
+    One operation of a bulk lesson request.
+    
+    ``create`` and ``update`` take the full lesson in ``lesson``; ``update``,
+    ``delete`` and ``pin`` address the lesson by ``id`` (for ``create`` it
+    defaults to ``lesson.id``). ``pin`` sets ``pinned``, or toggles the pin
+    when it is omitted.
+    """
+    op: LessonOperationType
+    id: Optional[str] = None
+    lesson: Optional[LessonCreate] = None
+    pinned: Optional[bool] = None
+    
+    @model_validator(mode="after")
+    def check_operands(self) -> "LessonOperation":
+        if self.op in (LessonOperationType.CREATE, LessonOperationType.UPDATE) and self.lesson is None:
+            raise ValueError(f"'{self.op.value}' requires 'lesson'")
+        if self.op == LessonOperationType.CREATE:
+            if self.id is not None and self.id != self.lesson.id:
+                raise ValueError("'id' must match 'lesson.id'")
+            self.id = self.lesson.id
+        elif self.id is None:
+            raise ValueError(f"'{self.op.value}' requires 'id'")
+        return self
+
+
+class LessonBulkRequest(BaseModel):
+    """Lesson operations applied together in one transaction."""
+    operations: List[LessonOperation] = Field(min_length=1, max_length=1000)
 
 
 # ========== Response Schemas ==========
@@ -92,6 +201,42 @@ class TimetableResponse(BaseModel):
     score: Optional[ScoreResponse] = None
 
 
+class AssignmentSlot(BaseModel):
+    """Where a lesson session is scheduled; None fields are unassigned."""
+    day_of_week: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    room: Optional[str] = None
+
+
+class AssignmentChange(BaseModel):
+    id: str  # Session ID
+    subject: str
+    teacher: str
+    student_group: str
+    before: Optional[AssignmentSlot] = None  # None for added sessions
+    after: Optional[AssignmentSlot] = None  # None for removed sessions
+
+
+class ScheduleDiffResponse(BaseModel):
+    from_job_id: str
+    to_job_id: str
+    moved: List[AssignmentChange]
+    added: List[AssignmentChange]
+    removed: List[AssignmentChange]
+    from_score: Optional[ScoreResponse] = None
+    to_score: Optional[ScoreResponse] = None
+    score_change: Optional[ScoreResponse] = None  # to_score - from_score
+
+
+class LessonBulkResponse(BaseModel):
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    pinned: int = 0
+    lessons: List[LessonResponse]  # Resulting state of created, updated and pinned lessons
+
+
 class JobStatus(str, Enum):
     PENDING = "PENDING"
     RUNNING = "RUNNING"
@@ -103,13 +248,53 @@ class OptimizationJobResponse(BaseModel):
     id: str
     status: JobStatus
     progress: int = 0
+    # 1-based position in the admission queue while waiting for a run slot
+    queue_position: Optional[int] = None
     started_at: datetime
     completed_at: Optional[datetime] = None
     result: Optional[TimetableResponse] = None
     error: Optional[str] = None
 
 
+class LessonImportResponse(BaseModel):
+    id: str
+    status: JobStatus
+    progress: int = 0
+    filename: Optional[str] = None
+    total_rows: Optional[int] = None
+    imported_count: int = 0
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class ScenarioResult(BaseModel):
+    name: str
+    job_id: str
+    status: JobStatus
+    hard_score: Optional[int] = None
+    soft_score: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchOptimizationResponse(BaseModel):
+    id: str
+    status: JobStatus
+    # 1-based position in the admission queue while waiting for a run slot
+    queue_position: Optional[int] = None
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    scenarios: List[ScenarioResult]
+
+
 class HealthResponse(BaseModel):
     status: str
     version: str
     services: dict
+    circuit_breakers: dict = {}
+
+
+class ProbeResponse(BaseModel):
+    """Liveness or readiness probe result."""
+    status: str
+    checks: dict = {}
@@ -0,0 +1,145 @@
+"""
+Solver pool dispatcher.
+
+Tracks in-flight solves per Algorithm API instance and sends each solve to
+the least-loaded healthy instance, subject to a per-instance concurrency
+cap. Instances are ejected while their health probe fails or their circuit
+breaker is open, and re-admitted once they recover.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from config import get_settings
+from metrics import SOLVER_IN_FLIGHT, SOLVER_WAITING
+from resilience import CircuitBreaker, breaker_for
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class SolverPoolTimeoutError(Exception):
+    """Raised when no solver instance became available in time."""
+
+
+class SolverEndpoint:
+    """One Algorithm API instance and its current occupancy."""
+
+    def __init__(self, url: str, max_concurrency: int):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.healthy = True  # Optimistic until the first probe says otherwise
+        self.breaker: CircuitBreaker = breaker_for(url)
+
+    @property
+    def available(self) -> bool:
+        """Whether the instance can take another solve right now."""
+        if not self.healthy or self.in_flight >= self.max_concurrency:
+            return False
+        state = self.breaker.state
+        # A half-open circuit lets a single trial solve through
+        return state == CircuitBreaker.CLOSED or (state == CircuitBreaker.HALF_OPEN and self.in_flight == 0)
+
+    @property
+    def load(self) -> float:
+        return self.in_flight / self.max_concurrency
+
+
+class SolverPool:
+    """Least-loaded dispatcher over a set of Algorithm API instances."""
+
+    def __init__(self, urls: List[str], max_concurrency: int):
+        self.endpoints = [SolverEndpoint(url, max(1, max_concurrency)) for url in urls]
+        self._changed = asyncio.Condition()
+
+    def _pick(self) -> Optional[SolverEndpoint]:
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.available]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda endpoint: endpoint.load)
+
+    @asynccontextmanager
+    async def acquire(self, timeout: Optional[float] = None) -> AsyncIterator[SolverEndpoint]:
+        """
+        Reserve a solve slot on the least-loaded healthy instance.
+
+        Waits while every instance is full or ejected.
+
+        Raises:
+            SolverPoolTimeoutError: If no slot frees up within the timeout
+        """
+        timeout = settings.solver_acquire_timeout_seconds if timeout is None else timeout
+        async with self._changed:
+            SOLVER_WAITING.inc()
+            try:
+                # Breakers move to half-open on their own, so re-check periodically
+                endpoint = self._pick()
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + timeout
+                while endpoint is None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise SolverPoolTimeoutError("No solver instance available")
+                    # Not wait_for: before Python 3.12 it swallows a cancellation
+                    # that races with a notification, and the waiter then solves
+                    # for a caller that is gone
+                    try:
+                        async with asyncio.timeout(min(remaining, 1.0)):
+                            await self._changed.wait()
+                    except TimeoutError:
+                        pass
+                    endpoint = self._pick()
+            finally:
+                SOLVER_WAITING.dec()
+            endpoint.in_flight += 1
+            SOLVER_IN_FLIGHT.labels(instance=endpoint.url).set(endpoint.in_flight)
+
+        try:
+            yield endpoint
+        finally:
+            async with self._changed:
+                endpoint.in_flight -= 1
+                SOLVER_IN_FLIGHT.labels(instance=endpoint.url).set(endpoint.in_flight)
+                self._changed.notify_all()
+
+    async def probe(self, client: httpx.AsyncClient) -> None:
+        """Probe every instance's health endpoint once and update ejections."""
+        await asyncio.gather(*(self._probe_endpoint(client, endpoint) for endpoint in self.endpoints))
+
+    async def _probe_endpoint(self, client: httpx.AsyncClient, endpoint: SolverEndpoint) -> None:
+        try:
+            response = await client.get(f"{endpoint.url}/actuator/health")
+            healthy = response.status_code == 200
+        except httpx.HTTPError:
+            healthy = False
+        if healthy != endpoint.healthy:
+            logger.warning(
+                "Solver instance %s %s", endpoint.url, "recovered" if healthy else "ejected"
+            )
+            endpoint.healthy = healthy
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def run_health_checks(self) -> None:
+        """Probe instances forever at the configured interval."""
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            while True:
+                await self.probe(client)
+                await asyncio.sleep(settings.solver_health_check_interval_seconds)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per-instance state for health reporting."""
+        return {
+            endpoint.url: {
+                "healthy": endpoint.healthy,
+                "circuit": endpoint.breaker.state,
+                "in_flight": endpoint.in_flight,
+                "max_concurrency": endpoint.max_concurrency,
+            }
+            for endpoint in self.endpoints
+        }
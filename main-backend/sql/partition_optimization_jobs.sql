@@ -0,0 +1,54 @@
+-- Convert optimization_jobs into a table partitioned by started_at month.
+--
+-- Optional; run once during a maintenance window, as it locks the table and
+-- copies every row. Run the migration step (python migrate.py) first, so the
+-- table has all its columns:
+--
+--     psql "$DATABASE_URL" -f sql/partition_optimization_jobs.sql
+--
+-- Afterwards the retention sweeper creates the partitions of upcoming months
+-- ahead of time (retention_partitions_ahead). The primary key becomes
+-- (id, started_at), as PostgreSQL requires the partition key in it.
+
+BEGIN;
+
+ALTER TABLE optimization_jobs RENAME TO optimization_jobs_unpartitioned;
+ALTER TABLE optimization_jobs_unpartitioned
+    RENAME CONSTRAINT optimization_jobs_pkey TO optimization_jobs_unpartitioned_pkey;
+ALTER INDEX IF EXISTS ix_optimization_jobs_batch_id
+    RENAME TO ix_optimization_jobs_unpartitioned_batch_id;
+ALTER INDEX IF EXISTS ix_optimization_jobs_status_completed_at
+    RENAME TO ix_optimization_jobs_unpartitioned_status_completed_at;
+
+CREATE TABLE optimization_jobs (
+    LIKE optimization_jobs_unpartitioned INCLUDING DEFAULTS,
+    PRIMARY KEY (id, started_at),
+    FOREIGN KEY (batch_id) REFERENCES optimization_batches (id) ON DELETE CASCADE
+) PARTITION BY RANGE (started_at);
+
+CREATE INDEX ix_optimization_jobs_batch_id ON optimization_jobs (batch_id);
+CREATE INDEX ix_optimization_jobs_status_completed_at ON optimization_jobs (status, completed_at);
+
+-- One partition for every month that has jobs, plus the current month
+DO $$
+DECLARE
+    month_start date;
+BEGIN
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', started_at)::date FROM optimization_jobs_unpartitioned
+        UNION
+        SELECT date_trunc('month', now())::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE optimization_jobs_%s PARTITION OF optimization_jobs FOR VALUES FROM (%L) TO (%L)',
+            to_char(month_start, 'YYYY_MM'),
+            month_start,
+            (month_start + interval '1 month')::date
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO optimization_jobs SELECT * FROM optimization_jobs_unpartitioned;
+DROP TABLE optimization_jobs_unpartitioned;
+
+COMMIT;
@@ -0,0 +1,124 @@
+"""
+Solve telemetry and solver time limit recommendations.
+
+Every completed job records its problem size, solver settings, final score
+and the best score over solving time in ``solve_telemetry``. For a new
+problem, the most similar feasible past solves tell how long the solver
+needed to converge: the time at which a solve reached a given share
+(default 99%) of its final soft score improvement. The recommended time
+limit covers that time for most similar solves, so problems that converge
+in seconds are not given minutes.
+"""
+
+import math
+import statistics
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from models import SolveTelemetry
+
+settings = get_settings()
+
+# Features compared between problems, on a log scale
+SIMILARITY_FEATURES = ("sessions", "timeslots", "rooms", "teachers", "student_groups")
+RECOMMENDATION_PERCENTILE = 0.9
+
+
+def telemetry_row(job_id: str, telemetry: Dict[str, Any], score: Optional[Dict[str, int]]) -> SolveTelemetry:
+    """The ``solve_telemetry`` row of a completed job."""
+    return SolveTelemetry(
+        job_id=uuid.UUID(job_id),
+        sessions=telemetry.get("sessions", 0),
+        lessons=telemetry.get("lessons", 0),
+        timeslots=telemetry.get("timeslots", 0),
+        rooms=telemetry.get("rooms", 0),
+        teachers=telemetry.get("teachers", 0),
+        student_groups=telemetry.get("student_groups", 0),
+        pinned_sessions=telemetry.get("pinned_sessions", 0),
+        time_limit_seconds=telemetry.get("time_limit_seconds"),
+        random_seed=telemetry.get("random_seed"),
+        portfolio_size=telemetry.get("portfolio_size", 1),
+        wire_format=telemetry.get("wire_format"),
+        constructed_sessions=telemetry.get("constructed_sessions"),
+        solve_seconds=telemetry.get("solve_seconds"),
+        hard_score=score["hard_score"] if score else None,
+        soft_score=score["soft_score"] if score else None,
+        score_trajectory=telemetry.get("score_trajectory", []),
+    )
+
+
+def convergence_millis(trajectory: Sequence[Sequence[int]], fraction: float) -> Optional[int]:
+    """
+    Solving time after which a solve had reached ``fraction`` of its final
+    soft score improvement.
+
+    The improvement is measured at the final hard score, from the first best
+    score at that hard score to the final one.
+
+    Args:
+        trajectory: Best scores over time as [millis, hard, soft] points
+        fraction: Share of the improvement, in (0, 1]
+    """
+    if not trajectory:
+        return None
+    _, final_hard, final_soft = trajectory[-1]
+    at_final_hard = [point for point in trajectory if point[1] >= final_hard]
+    first_soft = at_final_hard[0][2]
+    threshold = final_soft - (1 - fraction) * (final_soft - first_soft)
+    return next(millis for millis, _, soft in at_final_hard if soft >= threshold)
+
+
+def _distance(features: Dict[str, int], row: SolveTelemetry) -> float:
+    return math.fsum(
+        (math.log1p(features[name]) - math.log1p(getattr(row, name))) ** 2
+        for name in SIMILARITY_FEATURES
+    )
+
+
+async def recommend_time_limit(
+    db: AsyncSession,
+    features: Dict[str, int],
+    fraction: float,
+) -> Optional[Dict[str, Any]]:
+    """
+    Recommend a solver time limit for a problem with the given features.
+
+    Candidates are recent feasible solves of between half and twice as many
+    sessions; the ``budget_similar_jobs`` nearest of them by problem size
+    are used.
+
+    Returns:
+        The recommendation, or None without comparable solves
+    """
+    sessions = features["sessions"]
+    result = await db.execute(
+        select(SolveTelemetry)
+        .where(SolveTelemetry.hard_score >= 0)
+        .where(SolveTelemetry.sessions.between(sessions // 2, sessions * 2))
+        .order_by(SolveTelemetry.created_at.desc())
+        .limit(settings.budget_history_jobs)
+    )
+    rows = sorted(result.scalars().all(), key=lambda row: _distance(features, row))
+    times: List[int] = []
+    for row in rows:
+        millis = convergence_millis(row.score_trajectory, fraction)
+        if millis is not None:
+            times.append(millis)
+            if len(times) >= settings.budget_similar_jobs:
+                break
+    if not times:
+        return None
+
+    times.sort()
+    percentile = times[max(0, math.ceil(RECOMMENDATION_PERCENTILE * len(times)) - 1)]
+    return {
+        "recommended_time_limit_seconds": max(1, math.ceil(percentile / 1000 * settings.budget_safety_margin)),
+        "convergence": fraction,
+        "similar_jobs": len(times),
+        "median_convergence_seconds": statistics.median(times) / 1000,
+        "max_convergence_seconds": times[-1] / 1000,
+    }
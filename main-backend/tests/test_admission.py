@@ -0,0 +1,129 @@
+import asyncio
+
+import httpx
+import pytest
+
+import main
+from admission import AdmissionController, AdmissionRejectedError
+from database import get_db
+
+OPTIMIZATION_REQUEST = {
+    "timeslots": [{"day_of_week": "MONDAY", "start_time": "08:00", "end_time": "10:00"}],
+    "rooms": [{"name": "A"}],
+    "lessons": [{"id": "math", "subject": "Math", "teacher": "T", "student_group": "G"}],
+}
+
+
+def test_client_over_quota_is_rejected():
+    admission = AdmissionController(max_running=4, max_queued=10, max_per_client=2)
+    admission.admit("job-1", "alice")
+    admission.admit("job-2", "alice")
+    with pytest.raises(AdmissionRejectedError) as rejected:
+        admission.admit("job-3", "alice")
+    assert rejected.value.retry_after >= 1
+    # Other clients are unaffected
+    assert admission.admit("job-4", "bob") is None
+
+
+def test_full_queue_is_rejected():
+    admission = AdmissionController(max_running=1, max_queued=1, max_per_client=10)
+    assert admission.admit("job-1", "alice") is None
+    assert admission.admit("job-2", "bob") == 1
+    with pytest.raises(AdmissionRejectedError, match="queue is full"):
+        admission.admit("job-3", "carol")
+
+
+def test_released_jobs_free_their_quota():
+    admission = AdmissionController(max_running=1, max_queued=1, max_per_client=1)
+    admission.admit("job-1", "alice")
+    admission.release("job-1")
+    assert admission.admit("job-2", "alice") is None
+
+
+def test_queue_positions_follow_weights():
+    admission = AdmissionController(max_running=4, max_queued=10, max_per_client=10)
+    assert admission.admit("portfolio", "alice", weight=3) is None
+    # Only one slot is left, so the next heavy job waits and blocks the line
+    assert admission.admit("batch", "alice", weight=2) == 1
+    assert admission.admit("single", "alice") == 2
+    # Weights are capped at the running limit so every job can start
+    assert admission.admit("huge", "alice", weight=100) == 3
+
+
+def test_slots_run_jobs_in_order_within_the_limit():
+    async def scenario():
+        admission = AdmissionController(max_running=2, max_queued=10, max_per_client=10)
+        running, peak, order = set(), [0], []
+
+        async def job(job_id: str, weight: int):
+            async with admission.slot(job_id):
+                running.add(job_id)
+                order.append(job_id)
+                peak[0] = max(peak[0], sum(weights[j] for j in running))
+                await asyncio.sleep(0.01)
+                running.discard(job_id)
+
+        weights = {"a": 1, "b": 2, "c": 1}
+        for job_id, weight in weights.items():
+            admission.admit(job_id, "alice", weight=weight)
+        await asyncio.gather(*(job(job_id, weight) for job_id, weight in weights.items()))
+        return order, peak[0], admission.position("a")
+
+    order, peak, position = asyncio.run(scenario())
+    assert order == ["a", "b", "c"]
+    assert peak <= 2
+    assert position is None
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        admission = AdmissionController(max_running=1, max_queued=10, max_per_client=10)
+        admission.admit("first", "alice")
+        admission.admit("second", "alice")
+        async def second():
+            async with admission.slot("second"):
+                pass
+
+        async with admission.slot("first"):
+            waiter = asyncio.create_task(second())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            return admission.position("second"), admission.admit("third", "alice")
+
+    position, third = asyncio.run(scenario())
+    assert position is None
+    assert third == 1
+
+
+@pytest.fixture
+def api(monkeypatch):
+    admission = AdmissionController(max_running=1, max_queued=0, max_per_client=1)
+    monkeypatch.setattr(main, "admission", admission)
+    main.app.dependency_overrides[get_db] = lambda: None
+    yield admission
+    main.app.dependency_overrides.pop(get_db, None)
+
+
+def _post(path: str, body: dict, client_id: str) -> httpx.Response:
+    async def post():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=body, headers={"X-Client-Id": client_id})
+    return asyncio.run(post())
+
+
+def test_optimize_over_quota_returns_429_with_retry_after(api):
+    api.admit("running-job", "alice")
+    response = _post("/api/schedules/optimize", OPTIMIZATION_REQUEST, "alice")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_batch_over_capacity_returns_429_with_retry_after(api):
+    api.admit("running-job", "bob")
+    body = {"base": OPTIMIZATION_REQUEST, "scenarios": [{"name": "variant"}]}
+    response = _post("/api/schedules/optimize/batch", body, "alice")
+    assert response.status_code == 429
+    assert "queue is full" in response.json()["detail"]
+    assert int(response.headers["Retry-After"]) >= 1
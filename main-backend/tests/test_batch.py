@@ -0,0 +1,74 @@
+from batch import BASE_SCENARIO_NAME, apply_scenario, scenario_names
+from problem import Lesson, Room, Timeslot
+from schemas import BatchOptimizationRequest, ScenarioDelta
+
+
+def _base():
+    timeslots = [
+        Timeslot("MONDAY", "08:00", "10:00", None),
+        Timeslot("MONDAY", "10:00", "12:00", None),
+        Timeslot("TUESDAY", "08:00", "10:00", None),
+    ]
+    rooms = [Room("A"), Room("B")]
+    lessons = [
+        Lesson("math", "Math", "T1", "G1", pinned=True, pinned_timeslot_index=2, pinned_room_index=1),
+        Lesson("bio", "Bio", "T2", "G1", duration_hours=4),
+    ]
+    return timeslots, rooms, [lesson.id for lesson in lessons], [lesson.sessions() for lesson in lessons]
+
+
+def _request(include_base: bool) -> BatchOptimizationRequest:
+    return BatchOptimizationRequest(
+        base={"timeslots": [], "rooms": [], "lessons": []},
+        scenarios=[{"name": "fewer-rooms"}, {"name": "extra-slot"}],
+        include_base=include_base,
+    )
+
+
+def test_scenario_names_start_with_base():
+    assert scenario_names(_request(True)) == [BASE_SCENARIO_NAME, "fewer-rooms", "extra-slot"]
+    assert scenario_names(_request(False)) == ["fewer-rooms", "extra-slot"]
+
+
+def test_base_scenario_is_the_base_problem():
+    timeslots, rooms, ids, sessions = _base()
+    scenario_timeslots, scenario_rooms, scenario_sessions = apply_scenario(timeslots, rooms, ids, sessions, None, [])
+    assert scenario_timeslots is timeslots and scenario_rooms is rooms
+    assert [session.id for session in scenario_sessions] == ["math-p1", "bio-p1", "bio-p2"]
+
+
+def test_removed_timeslots_remap_pins():
+    timeslots, rooms, ids, sessions = _base()
+    delta = ScenarioDelta(name="no-monday-morning", remove_timeslot_indexes=[0])
+    scenario_timeslots, _, scenario_sessions = apply_scenario(timeslots, rooms, ids, sessions, delta, [])
+    assert [ts.start_time for ts in scenario_timeslots] == ["10:00", "08:00"]
+    math = scenario_sessions[0]
+    assert (math.pinned_timeslot_index, math.pinned_room_index) == (1, 1)
+
+
+def test_pins_to_removed_timeslots_and_rooms_are_dropped():
+    timeslots, rooms, ids, sessions = _base()
+    delta = ScenarioDelta(name="no-tuesday", remove_timeslot_indexes=[2], remove_rooms=["A"])
+    _, scenario_rooms, scenario_sessions = apply_scenario(timeslots, rooms, ids, sessions, delta, [])
+    assert [room.name for room in scenario_rooms] == ["B"]
+    math = scenario_sessions[0]
+    assert (math.pinned_timeslot_index, math.pinned_room_index) == (None, 0)
+
+
+def test_replaced_timeslots_drop_timeslot_pins():
+    timeslots, rooms, ids, sessions = _base()
+    delta = ScenarioDelta(
+        name="new-grid",
+        replace_timeslots=[{"day_of_week": "FRIDAY", "start_time": "09:00", "end_time": "12:00"}],
+    )
+    scenario_timeslots, _, scenario_sessions = apply_scenario(timeslots, rooms, ids, sessions, delta, [])
+    assert [ts.day_of_week for ts in scenario_timeslots] == ["FRIDAY"]
+    assert scenario_sessions[0].pinned_timeslot_index is None
+
+
+def test_lessons_are_removed_and_added():
+    timeslots, rooms, ids, sessions = _base()
+    added = [Lesson("chem", "Chem", "T3", "G2").sessions()]
+    delta = ScenarioDelta(name="swap", remove_lesson_ids=["bio"])
+    _, _, scenario_sessions = apply_scenario(timeslots, rooms, ids, sessions, delta, added)
+    assert [session.id for session in scenario_sessions] == ["math-p1", "chem-p1"]
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from orchestrator import OrchestratorService
+from results import TELEMETRY_KEY
+from schemas import PortfolioConfig
+
+
+def _result(hard: int, soft: int) -> dict:
+    return {"lessons": [], "score": {"hard_score": hard, "soft_score": soft}, TELEMETRY_KEY: {}}
+
+
+def _run_portfolio(monkeypatch, portfolio: PortfolioConfig, outcomes: dict):
+    """Race a portfolio whose member for each seed returns or raises after a delay."""
+    service = OrchestratorService()
+    started, cancelled = [], []
+
+    async def solve_timetable(problem, time_limit_seconds=None, random_seed=None):
+        started.append(random_seed)
+        delay, outcome = outcomes[random_seed]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(random_seed)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(service, "solve_timetable", solve_timetable)
+    result = asyncio.run(service.solve_portfolio(None, portfolio, 5))
+    return result, started, cancelled
+
+
+def test_seeds_default_to_range_of_size():
+    assert PortfolioConfig(size=3).size == 3
+
+
+def test_size_is_derived_from_seeds():
+    assert PortfolioConfig(random_seeds=[7, 11, 13]).size == 3
+
+
+@pytest.mark.parametrize("values", [
+    {"random_seeds": list(range(17))},
+    {"random_seeds": [1]},
+    {"random_seeds": [1, 2, 1]},
+    {"size": 4, "random_seeds": [1, 2]},
+    {"size": 17},
+])
+def test_invalid_portfolios_are_rejected(values):
+    with pytest.raises(ValidationError):
+        PortfolioConfig(**values)
+
+
+@pytest.mark.parametrize("score, target_soft, met", [
+    ((0, -10), None, True),
+    ((-1, 0), None, False),
+    ((0, -10), -5, False),
+    ((0, -5), -5, True),
+])
+def test_meets_target(score, target_soft, met):
+    portfolio = PortfolioConfig(target_hard_score=0, target_soft_score=target_soft)
+    assert OrchestratorService._meets_target(score, portfolio) is met
+
+
+def test_explicit_seeds_are_solved(monkeypatch):
+    portfolio = PortfolioConfig(random_seeds=[7, 11], target_soft_score=100)
+    result, started, _ = _run_portfolio(monkeypatch, portfolio, {
+        7: (0, _result(0, -5)),
+        11: (0, _result(0, -3)),
+    })
+    assert sorted(started) == [7, 11]
+    assert result["score"] == {"hard_score": 0, "soft_score": -3}
+    assert result[TELEMETRY_KEY]["portfolio_size"] == 2
+
+
+def test_target_score_cancels_remaining_members(monkeypatch):
+    portfolio = PortfolioConfig(size=3)
+    result, started, cancelled = _run_portfolio(monkeypatch, portfolio, {
+        0: (0, _result(0, -8)),
+        1: (10, _result(0, 0)),
+        2: (10, _result(0, 0)),
+    })
+    assert sorted(started) == [0, 1, 2]
+    assert sorted(cancelled) == [1, 2]
+    assert result["score"] == {"hard_score": 0, "soft_score": -8}
+
+
+def test_failed_members_are_skipped(monkeypatch):
+    portfolio = PortfolioConfig(size=2, target_soft_score=100)
+    result, _, _ = _run_portfolio(monkeypatch, portfolio, {
+        0: (0, RuntimeError("solver down")),
+        1: (0, _result(-1, 0)),
+    })
+    assert result["score"] == {"hard_score": -1, "soft_score": 0}
+
+
+def test_all_members_failing_raises_last_error(monkeypatch):
+    portfolio = PortfolioConfig(size=2)
+    with pytest.raises(RuntimeError, match="solver down"):
+        _run_portfolio(monkeypatch, portfolio, {
+            0: (0, RuntimeError("solver down")),
+            1: (0, RuntimeError("solver down")),
+        })
@@ -0,0 +1,67 @@
+from problem import UNASSIGNED, Lesson, Problem, Room, Timeslot
+
+TIMESLOTS = [
+    Timeslot("MONDAY", "08:00", "10:00", None),  # 2h
+    Timeslot("MONDAY", "10:00", "13:00", None),  # 3h
+    Timeslot("TUESDAY", "08:00", "10:00", None),  # 2h
+]
+ROOMS = [Room("A"), Room("B")]
+
+
+def _problem(*lessons: Lesson) -> Problem:
+    return Problem(TIMESLOTS, ROOMS, [session for lesson in lessons for session in lesson.sessions()])
+
+
+def test_lessons_split_into_sessions():
+    durations = {hours: [s.duration_hours for s in Lesson("x", "S", "T", "G", hours).sessions()] for hours in (2, 3, 4, 5, 7)}
+    assert durations == {2: [2], 3: [3], 4: [2, 2], 5: [3, 2], 7: [3, 2, 2]}
+
+
+def test_long_sessions_are_pruned_to_fitting_timeslots():
+    problem = _problem(Lesson("x", "S", "T", "G", 3))
+    assert problem.allowed == [[1]]
+
+
+def test_sessions_fitting_every_timeslot_are_unrestricted():
+    problem = _problem(Lesson("x", "S", "T", "G", 2))
+    assert problem.allowed == [None]
+
+
+def test_sessions_fitting_no_timeslot_are_left_open():
+    problem = Problem(TIMESLOTS[:1], ROOMS, Lesson("x", "S", "T", "G", 3).sessions())
+    assert problem.allowed == [None]
+
+
+def test_fully_pinned_session_starts_assigned():
+    problem = _problem(Lesson("x", "S", "T", "G", 4, pinned=True, pinned_timeslot_index=2, pinned_room_index=1))
+    # Only the first session carries the pins
+    assert problem.allowed == [[2], None]
+    assert list(problem.timeslot_index) == [2, UNASSIGNED]
+    assert list(problem.room_index) == [1, UNASSIGNED]
+
+
+def test_timeslot_only_pin_restricts_domain_without_assigning():
+    problem = _problem(Lesson("x", "S", "T", "G", 2, pinned=True, pinned_timeslot_index=0))
+    assert problem.allowed == [[0]]
+    assert list(problem.timeslot_index) == [UNASSIGNED]
+
+
+def test_out_of_range_pins_are_ignored():
+    problem = _problem(Lesson("x", "S", "T", "G", 3, pinned=True, pinned_timeslot_index=9, pinned_room_index=0))
+    assert problem.allowed == [[1]]
+    assert list(problem.timeslot_index) == [UNASSIGNED]
+    lesson = problem.to_payload()["lessons"][0]
+    assert lesson["pinnedTimeslotIndex"] is None
+    assert lesson["pinnedRoomIndex"] == 0
+
+
+def test_payload_carries_pins_assignment_and_domain():
+    problem = _problem(
+        Lesson("pinned", "S", "T", "G", 2, pinned=True, pinned_timeslot_index=1, pinned_room_index=0),
+        Lesson("long", "S", "T", "G", 3),
+    )
+    pinned, long = problem.to_payload()["lessons"]
+    assert pinned["pinnedTimeslotIndex"] == 1 and pinned["timeslotIndex"] == 1 and pinned["roomIndex"] == 0
+    assert pinned["allowedTimeslotIndexes"] == [1]
+    assert long["allowedTimeslotIndexes"] == [1]
+    assert "timeslotIndex" not in long and "pinnedTimeslotIndex" not in long
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from results import TimetableStreamParser, parse_score, stored_timetable_result
+
+MONDAY = {"dayOfWeek": "MONDAY", "startTime": "08:00", "endTime": "10:00", "preferenceBonus": 1.5}
+TUESDAY = {"dayOfWeek": "TUESDAY", "startTime": "10:00", "endTime": "13:00", "preferenceBonus": None}
+ROOM = {"name": "A", "capacity": 25}
+
+RESULT = {
+    "timeslots": [MONDAY, TUESDAY],
+    "rooms": [ROOM, {"name": "B", "capacity": None}],
+    "lessons": [
+        {"id": "l1", "subject": "Math", "teacher": "Smith", "studentGroup": "1A", "durationHours": 2,
+         "difficultyWeight": 0.75, "satisfactionScore": None, "pinned": True,
+         "timeslot": MONDAY, "room": ROOM},
+        {"id": "l2", "subject": "Art", "teacher": "Jones", "studentGroup": "1A", "durationHours": 3,
+         "timeslot": TUESDAY, "room": None},
+        {"id": "l3", "subject": "Ünicode", "teacher": "Smith", "studentGroup": "1B",
+         "timeslot": MONDAY, "room": ROOM},
+    ],
+    "score": "-1hard/-20soft",
+    "scoreTrajectory": [{"millis": 5, "score": "-3hard/0soft"}, {"millis": 40, "score": "-1hard/-20soft"}],
+}
+BODY = json.dumps(RESULT, ensure_ascii=False).encode()
+
+
+def _stream(body: bytes, chunk_size: int):
+    parser = TimetableStreamParser()
+    for start in range(0, len(body), chunk_size):
+        parser.feed(body[start:start + chunk_size])
+    return parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, len(BODY)])
+def test_stream_parser_matches_full_parse(chunk_size):
+    assert _stream(BODY, chunk_size) == stored_timetable_result(RESULT)
+
+
+def test_stream_parser_handles_any_key_order():
+    reordered = {key: RESULT[key] for key in reversed(list(RESULT))}
+    assert _stream(json.dumps(reordered).encode(), 16) == stored_timetable_result(RESULT)
+
+
+def test_stream_parser_handles_object_score_and_missing_trajectory():
+    result = {"timeslots": [], "rooms": [], "lessons": [], "score": {"hardScore": 0, "softScore": -4}}
+    parsed = _stream(json.dumps(result).encode(), 3)
+    assert parsed == stored_timetable_result(result)
+    assert parsed["score"] == {"hard_score": 0, "soft_score": -4}
+    assert parsed["telemetry"] == {"score_trajectory": []}
+
+
+def test_full_parse_shares_timeslot_and_room_entries():
+    stored = stored_timetable_result(RESULT)
+    first, _, third = stored["lessons"]
+    assert first["timeslot"] is third["timeslot"]
+    assert first["room"] is third["room"]
+    assert stored["score"] == {"hard_score": -1, "soft_score": -20}
+    assert stored["telemetry"]["score_trajectory"] == [[5, -3, 0], [40, -1, -20]]
+
+
+@pytest.mark.parametrize("score, expected", [
+    ("0hard/-15soft", (0, -15)),
+    ({"hardScore": -2, "softScore": 3}, (-2, 3)),
+    (None, None),
+    ("", None),
+])
+def test_parse_score(score, expected):
+    assert parse_score(score) == expected
@@ -0,0 +1,76 @@
+import math
+
+import cbor2
+
+from problem import UNASSIGNED, Lesson, Problem, Room, Timeslot
+from wire import decode_solution, encode_problem
+
+TIMESLOTS = [
+    Timeslot("MONDAY", "08:00", "10:00", 1.5),
+    Timeslot("FRIDAY", "13:30", "16:30", None),
+]
+ROOMS = [Room("A", 20), Room("B")]
+LESSONS = [
+    Lesson("math", "Math", "Smith", "1A", 2, difficulty_weight=0.8, satisfaction_score=None),
+    Lesson("art", "Art", "Smith", "1A", 3, difficulty_weight=None, satisfaction_score=4.0,
+           pinned=True, pinned_timeslot_index=1, pinned_room_index=0),
+]
+
+
+def _problem() -> Problem:
+    return Problem(TIMESLOTS, ROOMS, [session for lesson in LESSONS for session in lesson.sessions()])
+
+
+def test_encode_problem_is_column_wise_with_interned_strings():
+    encoded = cbor2.loads(encode_problem(_problem()))
+    strings = encoded["strings"]
+    assert encoded["timeslotDay"] == [1, 5]
+    assert encoded["timeslotStart"] == [480, 810]
+    assert encoded["timeslotEnd"] == [600, 990]
+    assert [strings[i] for i in encoded["roomName"]] == ["A", "B"]
+    assert encoded["roomCapacity"] == [20, 30]
+    assert [strings[i] for i in encoded["lessonSubject"]] == ["Math", "Art"]
+    # Shared values are interned once
+    assert encoded["lessonTeacher"][0] == encoded["lessonTeacher"][1]
+    assert strings.count("Smith") == 1
+    assert encoded["lessonDuration"] == [2, 3]
+
+
+def test_missing_numbers_are_nan_and_missing_indexes_unassigned():
+    encoded = cbor2.loads(encode_problem(_problem()))
+    assert encoded["timeslotPreference"][0] == 1.5
+    assert math.isnan(encoded["timeslotPreference"][1])
+    assert encoded["lessonDifficulty"][0] == 0.8
+    assert math.isnan(encoded["lessonDifficulty"][1])
+    assert math.isnan(encoded["lessonSatisfaction"][0])
+    assert encoded["lessonSatisfaction"][1] == 4.0
+    assert encoded["lessonPinned"] == [False, True]
+    assert encoded["lessonPinnedTimeslot"] == [UNASSIGNED, 1]
+    assert encoded["lessonPinnedRoom"] == [UNASSIGNED, 0]
+    assert encoded["lessonTimeslot"] == [UNASSIGNED, 1]
+    assert encoded["lessonRoom"] == [UNASSIGNED, 0]
+    assert encoded["lessonAllowedTimeslots"] == [None, [1]]
+
+
+def test_decode_solution_builds_stored_result():
+    problem = _problem()
+    content = cbor2.dumps({
+        "score": "0hard/-7soft",
+        "lessonTimeslot": [0, 1],
+        "lessonRoom": [1, UNASSIGNED],
+        "scoreTrajectory": [{"millis": 10, "score": "-1hard/0soft"}, {"millis": 90, "score": "0hard/-7soft"}],
+    })
+    result = decode_solution(problem, content)
+
+    assert result["score"] == {"hard_score": 0, "soft_score": -7}
+    assert result["telemetry"]["score_trajectory"] == [[10, -1, 0], [90, 0, -7]]
+    assert [ts["start_time"] for ts in result["timeslots"]] == ["08:00", "13:30"]
+    math_lesson, art_lesson = result["lessons"]
+    assert math_lesson["id"] == problem.sessions[0].id
+    assert math_lesson["timeslot"] == result["timeslots"][0]
+    assert math_lesson["room"] == {"name": "B", "capacity": 30}
+    assert math_lesson["satisfaction_score"] is None
+    assert art_lesson["timeslot"]["day_of_week"] == "FRIDAY"
+    assert art_lesson["timeslot"]["preference_bonus"] is None
+    assert art_lesson["room"] is None
+    assert art_lesson["pinned"] is True
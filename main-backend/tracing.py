@@ -0,0 +1,65 @@
+"""
+Distributed tracing setup (OpenTelemetry).
+
+Instruments the FastAPI app, every outbound httpx call (which propagates
+W3C trace context to the ML Engine and Algorithm API) and SQLAlchemy
+queries. Spans are exported to an OTLP collector or appended to a local
+JSON-lines file, depending on ``Settings.tracing_exporter``.
+"""
+
+from fastapi import FastAPI
+from opentelemetry import trace
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import get_settings
+
+settings = get_settings()
+
+# Span attribute carrying the optimization job ID
+JOB_ID_ATTRIBUTE = "schedulus.job_id"
+
+tracer = trace.get_tracer("schedulus.main_backend")
+
+
+def setup_tracing(app: FastAPI, *engines: AsyncEngine) -> None:
+    """
+    Configure the tracer provider and instrument the app.
+
+    Does nothing when ``tracing_exporter`` is ``"none"``; the module-level
+    ``tracer`` then produces no-op spans.
+    """
+    if settings.tracing_exporter == "none":
+        return
+
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    elif settings.tracing_exporter == "file":
+        exporter = ConsoleSpanExporter(
+            out=open(settings.tracing_file_path, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    else:
+        raise ValueError(f"Unknown tracing exporter: {settings.tracing_exporter}")
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name})
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="/metrics,/health")
+    HTTPXClientInstrumentor().instrument()
+    SQLAlchemyInstrumentor().instrument(engines=[engine.sync_engine for engine in engines])
+
+
+def set_job_id(job_id: str) -> None:
+    """Attach the job ID to the currently active span."""
+    trace.get_current_span().set_attribute(JOB_ID_ATTRIBUTE, job_id)
@@ -0,0 +1,102 @@
+"""
+Compact wire format for Algorithm API solves.
+
+The verbose JSON problem repeats subject, teacher and student group strings
+in every session and the solution echoes full timeslot and room objects per
+lesson. The compact format sends the problem column-wise: strings are
+interned into one table and referenced by index, timeslots and rooms are
+referenced by index, and times are minutes since midnight. Missing numbers
+(no ML prediction, no timeslot preference) are sent as NaN, which the
+solver reads back as null, as if they had been null in JSON. The solution
+only carries each lesson's timeslot and room index and the score. Both are
+CBOR-encoded and exchanged as ``application/cbor``.
+
+``encode_problem`` encodes a ``Problem``; ``decode_solution`` builds the
+solved timetable in the stored result format from the compact solution,
+as the JSON path does from the verbose one.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import cbor2
+
+from problem import UNASSIGNED, Problem, valid_index
+
+COMPACT_CONTENT_TYPE = "application/cbor"
+
+# Missing float value; a float column cannot carry null
+MISSING = float("nan")
+
+DAYS = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY"]
+
+
+def _float(value: Optional[float]) -> float:
+    return MISSING if value is None else float(value)
+
+
+def _index(value: Optional[int]) -> int:
+    return UNASSIGNED if value is None else value
+
+
+def encode_problem(problem: Problem) -> bytes:
+    """Encode a problem in the compact format."""
+    strings: List[str] = []
+    interned: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = interned.get(value)
+        if index is None:
+            index = interned[value] = len(strings)
+            strings.append(value)
+        return index
+
+    timeslots, rooms, sessions = problem.timeslots, problem.rooms, problem.sessions
+    lessons = [session.lesson for session in sessions]
+    encoded = {
+        "timeslotDay": [DAYS.index(ts.day_of_week) + 1 for ts in timeslots],
+        "timeslotStart": [ts.start_minute for ts in timeslots],
+        "timeslotEnd": [ts.end_minute for ts in timeslots],
+        "timeslotPreference": [_float(ts.preference_bonus) for ts in timeslots],
+        "roomName": [intern(room.name) for room in rooms],
+        "roomCapacity": [room.capacity for room in rooms],
+        "lessonId": [session.id for session in sessions],
+        "lessonSubject": [intern(lesson.subject) for lesson in lessons],
+        "lessonTeacher": [intern(lesson.teacher) for lesson in lessons],
+        "lessonGroup": [intern(lesson.student_group) for lesson in lessons],
+        "lessonDuration": [session.duration_hours for session in sessions],
+        "lessonDifficulty": [_float(lesson.difficulty_weight) for lesson in lessons],
+        "lessonSatisfaction": [_float(lesson.satisfaction_score) for lesson in lessons],
+        "lessonPinned": [session.pinned for session in sessions],
+        "lessonPinnedTimeslot": [
+            _index(valid_index(session.pinned_timeslot_index, len(timeslots))) for session in sessions
+        ],
+        "lessonPinnedRoom": [
+            _index(valid_index(session.pinned_room_index, len(rooms))) for session in sessions
+        ],
+        "lessonTimeslot": list(problem.timeslot_index),
+        "lessonRoom": list(problem.room_index),
+        # None = all timeslots allowed
+        "lessonAllowedTimeslots": problem.allowed,
+        "strings": strings,
+    }
+    return cbor2.dumps(encoded)
+
+
+def decode_solution(problem: Problem, content: bytes) -> Dict[str, Any]:
+    """
+    Build the solved timetable of a compact solution.
+
+    Args:
+        problem: The problem that was encoded
+        content: CBOR-encoded compact solution
+
+    Returns:
+        The timetable in the stored result format
+    """
+    solution = cbor2.loads(content)
+    return problem.solution(
+        solution.get("score"),
+        solution["lessonTimeslot"],
+        solution["lessonRoom"],
+        solution.get("scoreTrajectory"),
+    )
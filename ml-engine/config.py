@@ -0,0 +1,51 @@
+"""
+ML Engine configuration settings.
+"""
+
+from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+
+class Settings(BaseSettings):
+    """Application settings loaded from environment variables."""
+    
+    # Application
+    app_name: str = "Schedulus ML Engine"
+    
+    # Tracing: "none", "otlp" (OTLP/HTTP collector) or "file" (JSON lines)
+    tracing_exporter: str = "none"
+    tracing_service_name: str = "schedulus-ml-engine"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    tracing_file_path: str = "traces.jsonl"
+
+    # Profiling (profiling.py): requests carrying profiling_token in the
+    # X-Profile header are profiled; the sampling profiler writes folded
+    # stacks to profiling_dir. Without a token, the debug endpoints are
+    # disabled
+    profiling_token: str = ""
+    profiling_dir: str = "profiles"
+    profiling_interval_ms: float = 1.0
+    profiling_sampling: bool = False
+    profiling_sample_interval_ms: float = 10.0
+    profiling_flush_seconds: float = 60.0
+    profiling_keep_files: int = 100
+
+    # Model registry: how often to check artifacts/CURRENT for a new version
+    # (0 disables the watcher; reloads are then only done via /models/reload)
+    model_watch_interval_seconds: float = 5.0
+
+    # Inference: worker processes (0 runs inference in a thread of the
+    # API process) and micro-batching of concurrent /predict requests
+    inference_workers: int = 2
+    inference_batch_window_ms: float = 2.0
+    inference_max_batch_courses: int = 1000
+
+    class Config:
+        env_file = ".env"
+        env_file_encoding = "utf-8"
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Get cached settings instance."""
+    return Settings()
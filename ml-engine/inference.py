@@ -0,0 +1,148 @@
+"""
+Process-pool inference with micro-batching.
+
+``/predict`` requests are not computed on the event loop. Requests arriving
+within ``inference_batch_window_ms`` of each other are coalesced into one
+vectorized model call, which runs in a pool of worker processes so a
+single container uses several cores. Each caller gets back its own slice
+of the batch result.
+
+Workers load model artifacts themselves (memory-mapped, so the pages are
+shared with the main process) and cache them by artifact directory; a
+batch always runs on the model instance its requests were admitted with,
+so hot reloads never mix versions within a response.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from config import get_settings
+from metrics import INFERENCE_BATCH_COURSES, INFERENCE_BATCH_REQUESTS
+from predictor import CourseModel, ModelUnavailableError
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Artifacts kept loaded per worker; older versions are dropped after a reload
+WORKER_CACHED_MODELS = 2
+
+_worker_models: Dict[str, CourseModel] = {}
+
+
+def _init_worker() -> None:
+    """Import the heavy inference dependencies before the first batch arrives."""
+    import scipy.sparse  # noqa: F401
+    import sklearn.feature_extraction.text  # noqa: F401
+
+
+def _worker_predict(artifact_dir: str, course_ids: List[str]) -> List[Dict]:
+    """Predict a batch with the given artifact (executes in a worker process)."""
+    model = _worker_models.get(artifact_dir)
+    if model is None:
+        try:
+            model = CourseModel(artifact_dir)
+        except (OSError, KeyError, ValueError) as e:
+            raise ModelUnavailableError(f"Cannot load model from {artifact_dir}: {e}") from e
+        if len(_worker_models) >= WORKER_CACHED_MODELS:
+            _worker_models.pop(next(iter(_worker_models)))
+        _worker_models[artifact_dir] = model
+    return model.predict(course_ids)
+
+
+@dataclass
+class _PendingBatch:
+    model: CourseModel
+    requests: List[tuple] = field(default_factory=list)  # (course_ids, future)
+    courses: int = 0
+
+
+class InferenceBatcher:
+    """Coalesces concurrent prediction requests and runs them off the event loop."""
+
+    def __init__(self, workers: int, window_ms: float, max_batch_courses: int):
+        self.workers = workers
+        self.window = window_ms / 1000
+        self.max_batch_courses = max_batch_courses
+        self._executor: Optional[Executor] = None
+        self._pending: Optional[_PendingBatch] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def predict(self, model: CourseModel, course_ids: List[str]) -> List[Dict]:
+        """Predict metrics for ``course_ids`` with ``model`` as part of a batch."""
+        loop = asyncio.get_running_loop()
+        pending = self._pending
+        if pending is not None and (
+            pending.model is not model
+            or pending.courses + len(course_ids) > self.max_batch_courses
+        ):
+            self._flush()
+            pending = None
+        if pending is None:
+            pending = self._pending = _PendingBatch(model)
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        future = loop.create_future()
+        pending.requests.append((course_ids, future))
+        pending.courses += len(course_ids)
+        if pending.courses >= self.max_batch_courses:
+            self._flush()
+        return await future
+
+    def _flush(self) -> None:
+        batch, self._pending = self._pending, None
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if batch is not None:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: _PendingBatch) -> None:
+        INFERENCE_BATCH_REQUESTS.observe(len(batch.requests))
+        INFERENCE_BATCH_COURSES.observe(batch.courses)
+        course_ids = [course_id for ids, _ in batch.requests for course_id in ids]
+        try:
+            if self._executor is None:
+                predictions = await asyncio.to_thread(batch.model.predict, course_ids)
+            else:
+                loop = asyncio.get_running_loop()
+                predictions = await loop.run_in_executor(
+                    self._executor, _worker_predict, batch.model.artifact_dir, course_ids
+                )
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                logger.error("Inference worker died; restarting the pool")
+                self.close()
+                self.start()
+            for _, future in batch.requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for ids, future in batch.requests:
+            if not future.done():
+                future.set_result(predictions[offset:offset + len(ids)])
+            offset += len(ids)
+
+
+batcher = InferenceBatcher(
+    workers=settings.inference_workers,
+    window_ms=settings.inference_batch_window_ms,
+    max_batch_courses=settings.inference_max_batch_courses,
+)
@@ -5,20 +5,57 @@ This service provides ML-based predictions for course difficulty weights
 and satisfaction scores based on historical data analysis.
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from models import (
     PredictionRequest,
     PredictionResponse,
     CoursePrediction,
     HealthResponse,
+    ModelReloadRequest,
 )
-from predictor import predict_course_metrics, get_model_info
+from predictor import ModelUnavailableError, active_model, get_model_info
+from config import get_settings
+from inference import batcher
+from metrics import PREDICT_REQUESTS, PREDICT_LATENCY, PREDICTED_COURSES, render_metrics
+from registry import registry
+from tracing import setup_tracing, tracer
+from profiling import sampler, setup_profiling
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the current model and watch the registry for new versions."""
+    try:
+        await registry.reload()
+    except ModelUnavailableError as e:
+        logger.warning("Starting without a model: %s", e)
+    batcher.start()
+    watcher = None
+    if settings.model_watch_interval_seconds > 0:
+        watcher = asyncio.create_task(registry.watch())
+    if settings.profiling_sampling:
+        sampler.start()
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    batcher.close()
+    sampler.stop()
+
 
 app = FastAPI(
     title="Schedulus ML Engine",
     description="Machine Learning predictions for university course scheduling optimization",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -37,16 +74,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+setup_tracing(app)
+setup_profiling(app)
+
 
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Root endpoint - health check."""
-    model_info = get_model_info()
-    return HealthResponse(
-        status="healthy",
-        version=model_info["version"],
-        model_loaded=True,
-    )
+    return await health_check()
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -54,9 +89,9 @@ async def health_check():
     """Health check endpoint."""
     model_info = get_model_info()
     return HealthResponse(
-        status="healthy",
+        status="healthy" if model_info["model_loaded"] else "degraded",
         version=model_info["version"],
-        model_loaded=True,
+        model_loaded=model_info["model_loaded"],
     )
 
 
@@ -72,12 +107,27 @@ async def predict(request: PredictionRequest):
         PredictionResponse with predictions for each course
     """
     if not request.course_ids:
+        PREDICT_REQUESTS.labels(outcome="rejected").inc()
         raise HTTPException(status_code=400, detail="course_ids cannot be empty")
     
     if len(request.course_ids) > 100:
+        PREDICT_REQUESTS.labels(outcome="rejected").inc()
         raise HTTPException(status_code=400, detail="Maximum 100 courses per request")
     
-    predictions_data = predict_course_metrics(request.course_ids)
+    with tracer.start_as_current_span(
+        "predict_course_metrics", attributes={"schedulus.course_count": len(request.course_ids)}
+    ), PREDICT_LATENCY.time():
+        try:
+            # Predict and report with the same instance, even if a reload
+            # swaps the active model meanwhile
+            model = active_model()
+            predictions_data = await batcher.predict(model, request.course_ids)
+        except ModelUnavailableError as e:
+            PREDICT_REQUESTS.labels(outcome="unavailable").inc()
+            raise HTTPException(status_code=503, detail=str(e))
+    PREDICT_REQUESTS.labels(outcome="ok").inc()
+    for pred in predictions_data:
+        PREDICTED_COURSES.labels(data_source=pred["factors"]["data_source"]).inc()
     
     predictions = [
         CoursePrediction(**pred) for pred in predictions_data
@@ -85,7 +135,7 @@ async def predict(request: PredictionRequest):
     
     return PredictionResponse(
         predictions=predictions,
-        model_version=get_model_info()["version"],
+        model_version=model.version,
     )
 
 
@@ -95,6 +145,40 @@ async def model_info():
     return get_model_info()
 
 
+@app.get("/models")
+async def list_models():
+    """List model versions in the registry and the active one."""
+    return {
+        "versions": registry.versions(),
+        "active": registry.active_version,
+    }
+
+
+@app.post("/models/reload")
+async def reload_model(request: Optional[ModelReloadRequest] = None):
+    """
+    Load a model version in the background and swap it in atomically.
+
+    Without a version, the one named by ``artifacts/CURRENT`` is loaded.
+    Requests in flight finish on the previous model.
+    """
+    version = request.version if request else None
+    try:
+        model = await registry.reload(version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ModelUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return get_model_info(model)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint."""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8082)
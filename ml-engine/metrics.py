@@ -0,0 +1,52 @@
+"""
+Prometheus metrics for the ML Engine, exposed on ``/metrics``.
+"""
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+PREDICT_REQUESTS = Counter(
+    "schedulus_ml_predict_requests_total",
+    "Prediction requests by outcome",
+    ["outcome"],
+)
+
+PREDICT_LATENCY = Histogram(
+    "schedulus_ml_predict_seconds",
+    "Time spent computing predictions for one request",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+PREDICTED_COURSES = Counter(
+    "schedulus_ml_predicted_courses_total",
+    "Courses predicted, by the data source used for the prediction",
+    ["data_source"],
+)
+
+INFERENCE_BATCH_REQUESTS = Histogram(
+    "schedulus_ml_inference_batch_requests",
+    "Prediction requests coalesced into one model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+INFERENCE_BATCH_COURSES = Histogram(
+    "schedulus_ml_inference_batch_courses",
+    "Courses predicted in one model call",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500),
+)
+
+MODEL_RELOADS = Counter(
+    "schedulus_ml_model_reloads_total",
+    "Model reloads by outcome",
+    ["outcome"],
+)
+
+ACTIVE_MODEL = Gauge(
+    "schedulus_ml_active_model",
+    "1 for the model version currently serving predictions",
+    ["version"],
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all registered metrics in the Prometheus text format."""
+    return generate_latest(), CONTENT_TYPE_LATEST
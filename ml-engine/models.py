@@ -22,6 +22,11 @@ class PredictionResponse(BaseModel):
     model_version: str = "1.0.0"
 
 
+class ModelReloadRequest(BaseModel):
+    """Request body for the model reload endpoint."""
+    version: Optional[str] = None  # Defaults to the version named by CURRENT
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
     status: str
@@ -1,108 +1,232 @@
 """
-Mock ML Predictor for course difficulty and satisfaction scoring.
-In production, this would use trained models on historical data.
+ML Predictor for course difficulty and satisfaction scoring.
+
+Serves the model trained by ``training.py``. Courses seen in training are
+answered from their historical means; other courses are predicted by a
+ridge regression over character n-grams of the course code and its level.
+Artifacts are loaded memory-mapped and inference runs on whole request
+batches at once.
+
+This module is also loaded by file path into the main backend (embedded
+mode), so it must not import other ML Engine modules.
 """
 
-from typing import Dict, List, Tuple
-import random
-import hashlib
-
-
-# Mock historical data for courses
-# In production, this would come from a trained model
-MOCK_COURSE_DATA: Dict[str, Tuple[float, float]] = {
-    # (difficulty_weight, satisfaction_score)
-    "CS101": (0.45, 0.88),  # Intro Programming - easy, high satisfaction
-    "CS201": (0.65, 0.82),  # Data Structures - moderate
-    "CS301": (0.78, 0.75),  # Algorithms - hard
-    "CS401": (0.85, 0.70),  # Operating Systems - hard
-    "CS402": (0.72, 0.85),  # Database Systems - moderate-hard, satisfying
-    "CS403": (0.68, 0.80),  # Computer Networks
-    "CS450": (0.90, 0.92),  # Machine Learning - very hard but very satisfying
-    "CS451": (0.88, 0.90),  # AI - very hard but satisfying
-    "CS460": (0.55, 0.90),  # Web Development - easier, very satisfying
-    "MATH101": (0.50, 0.65),  # Calculus I
-    "MATH201": (0.70, 0.60),  # Calculus II - harder
-    "MATH301": (0.82, 0.55),  # Linear Algebra
-    "MATH401": (0.75, 0.70),  # Statistics
-    "PHY101": (0.60, 0.68),  # Physics I
-    "PHY201": (0.72, 0.65),  # Physics II
-    "ENG101": (0.35, 0.75),  # Technical Writing - easier
-    "SE301": (0.58, 0.85),  # Software Engineering
-}
-
-
-def _generate_consistent_prediction(course_id: str) -> Tuple[float, float]:
+import json
+import math
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Artifact root; <root>/CURRENT names the version to load
+MODEL_DIR = os.environ.get(
+    "ML_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts"),
+)
+CURRENT_FILE = "CURRENT"
+
+
+class ModelUnavailableError(Exception):
+    """Raised when no trained model artifact can be loaded."""
+
+
+def normalize_course_id(course_id: str) -> str:
+    """Normalization shared by training and inference."""
+    return course_id.strip().upper()
+
+
+def build_vectorizer(params: dict):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(**{**params, "ngram_range": tuple(params["ngram_range"])})
+
+
+def course_level(normalized_ids) -> np.ndarray:
+    """Course level feature: first digit of the course number, scaled to 0..1."""
+    levels = np.zeros(len(normalized_ids), dtype=np.float32)
+    for i, course_id in enumerate(normalized_ids):
+        match = re.search(r"\d", course_id)
+        if match:
+            levels[i] = int(match.group()) / 9
+    return levels
+
+
+def featurize(vectorizer, normalized_ids):
+    """Sparse feature matrix: hashed code n-grams plus the course level."""
+    from scipy import sparse
+    hashed = vectorizer.transform(normalized_ids)
+    return sparse.hstack(
+        [hashed, sparse.csr_matrix(course_level(normalized_ids)[:, None])],
+        format="csr",
+    )
+
+
+class CourseModel:
+    """A loaded model artifact."""
+
+    def __init__(self, artifact_dir: str):
+        self.artifact_dir = artifact_dir
+        with open(os.path.join(artifact_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(artifact_dir, name), mmap_mode="r")
+
+        self.coef = load("coef.npy")
+        self.intercept = np.asarray(load("intercept.npy"))
+        self.known_ids = load("known_ids.npy")
+        self.known_targets = load("known_targets.npy")
+        self.known_counts = load("known_counts.npy")
+        self.vectorizer = build_vectorizer(self.meta["vectorizer"])
+        self.inferred_confidence = self.meta["inferred_confidence"]
+
+    def warm_up(self) -> None:
+        """Run a throwaway prediction so the first real request is not slow."""
+        self.predict([str(self.known_ids[0]), "WARMUP000"])
+
+    @property
+    def version(self) -> str:
+        return self.meta["version"]
+
+    def predict(self, course_ids: List[str]) -> List[Dict]:
+        """Predict metrics for a batch of courses."""
+        if not course_ids:
+            return []
+        normalized = np.array([normalize_course_id(course_id) for course_id in course_ids])
+        targets = np.empty((len(course_ids), 2), dtype=np.float32)
+
+        # Known courses: binary search in the sorted ID table
+        positions = np.searchsorted(self.known_ids, normalized)
+        positions = np.minimum(positions, len(self.known_ids) - 1)
+        known = self.known_ids[positions] == normalized
+        targets[known] = self.known_targets[positions[known]]
+        counts = np.where(known, self.known_counts[positions], 0)
+
+        # Unknown courses: one sparse matrix product for the whole batch
+        unknown = ~known
+        if unknown.any():
+            features = featurize(self.vectorizer, normalized[unknown])
+            targets[unknown] = np.clip(features @ self.coef.T + self.intercept, 0.0, 1.0)
+
+        targets = np.round(targets.astype(np.float64), 3)
+        predictions = []
+        for course_id, (difficulty, satisfaction), count in zip(course_ids, targets.tolist(), counts.tolist()):
+            if count:
+                confidence = round(min(0.99, 0.8 + 0.05 * math.log2(1 + count)), 3)
+                factors = {"data_source": "historical", "sample_size": count}
+            else:
+                confidence = self.inferred_confidence
+                factors = {
+                    "data_source": "inferred",
+                    "note": "Predicted from course code and level",
+                }
+            predictions.append({
+                "course_id": course_id,  # Return original ID
+                "difficulty_weight": difficulty,
+                "satisfaction_score": satisfaction,
+                "confidence": confidence,
+                "factors": factors,
+            })
+        return predictions
+
+
+# ---------- Model registry layout ----------
+# <MODEL_DIR>/<version>/ holds one artifact; <MODEL_DIR>/CURRENT names the
+# version to serve.
+
+
+def current_version(model_dir: str = MODEL_DIR) -> str:
+    """The version named by ``<model_dir>/CURRENT``."""
+    try:
+        with open(os.path.join(model_dir, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError as e:
+        raise ModelUnavailableError(f"No trained model in {model_dir}") from e
+
+
+def set_current_version(version: str, model_dir: str = MODEL_DIR) -> None:
+    """Point ``CURRENT`` at a version atomically."""
+    tmp_path = os.path.join(model_dir, f".{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(model_dir, CURRENT_FILE))
+
+
+def list_versions(model_dir: str = MODEL_DIR) -> List[str]:
+    """Versions present in the registry, oldest first."""
+    try:
+        entries = os.listdir(model_dir)
+    except OSError:
+        return []
+    return sorted(
+        entry for entry in entries
+        if os.path.isfile(os.path.join(model_dir, entry, "meta.json"))
+    )
+
+
+_model: Optional[CourseModel] = None
+
+
+def load_model(version: Optional[str] = None, model_dir: str = MODEL_DIR) -> CourseModel:
+    """
+    Load a model version (the current one by default) and make it active.
+
+    The new model is fully loaded and warmed up before it replaces the
+    active one, so requests never see a half-loaded model; requests that
+    already hold the previous model finish on it.
+    """
+    global _model
+    version = version or current_version(model_dir)
+    try:
+        model = CourseModel(os.path.join(model_dir, version))
+        model.warm_up()
+    except (OSError, KeyError, ValueError, IndexError) as e:
+        raise ModelUnavailableError(f"Cannot load model {version}: {e}") from e
+    _model = model
+    return model
+
+
+def active_model() -> CourseModel:
     """
-    Generate a consistent prediction for unknown courses based on their ID.
-    Uses hashing to ensure the same course always gets the same prediction.
+    The model serving requests, loading the current version on first use.
+
+    Callers that report the model version should predict with the returned
+    instance so both refer to the same model across a reload.
     """
-    # Use hash to generate consistent random values
-    hash_bytes = hashlib.md5(course_id.encode()).digest()
-    
-    # Extract two floats from the hash
-    difficulty = (hash_bytes[0] + hash_bytes[1]) / 510  # 0.0 - 1.0
-    satisfaction = (hash_bytes[2] + hash_bytes[3]) / 510  # 0.0 - 1.0
-    
-    # Adjust to more realistic ranges (0.3 - 0.95)
-    difficulty = 0.3 + difficulty * 0.65
-    satisfaction = 0.4 + satisfaction * 0.55
-    
-    return (round(difficulty, 3), round(satisfaction, 3))
+    return _model if _model is not None else load_model()
 
 
 def predict_course_metrics(course_ids: List[str]) -> List[Dict]:
     """
     Predict difficulty weight and satisfaction score for given courses.
-    
+
     Args:
         course_ids: List of course identifiers
-        
+
     Returns:
         List of prediction dictionaries with difficulty_weight, satisfaction_score,
         confidence, and optional factors
+
+    Raises:
+        ModelUnavailableError: If no trained model is available
     """
-    predictions = []
-    
-    for course_id in course_ids:
-        # Normalize course ID (uppercase, remove spaces)
-        normalized_id = course_id.strip().upper()
-        
-        # Check if we have mock data for this course
-        if normalized_id in MOCK_COURSE_DATA:
-            difficulty, satisfaction = MOCK_COURSE_DATA[normalized_id]
-            confidence = 0.95  # High confidence for known courses
-            factors = {
-                "data_source": "historical",
-                "sample_size": random.randint(100, 500),
-                "pass_rate": round(1 - (difficulty * 0.3), 2),
-            }
-        else:
-            # Generate consistent prediction for unknown courses
-            difficulty, satisfaction = _generate_consistent_prediction(normalized_id)
-            confidence = 0.60  # Lower confidence for inferred courses
-            factors = {
-                "data_source": "inferred",
-                "note": "Based on course code pattern analysis",
-            }
-        
-        predictions.append({
-            "course_id": course_id,  # Return original ID
-            "difficulty_weight": difficulty,
-            "satisfaction_score": satisfaction,
-            "confidence": confidence,
-            "factors": factors,
-        })
-    
-    return predictions
-
-
-def get_model_info() -> Dict:
-    """Get information about the current prediction model."""
+    return active_model().predict(course_ids)
+
+
+def get_model_info(model: Optional[CourseModel] = None) -> Dict:
+    """Get information about the active (or the given) prediction model."""
+    if model is None:
+        try:
+            model = active_model()
+        except ModelUnavailableError:
+            return {"model_type": None, "version": "unavailable", "model_loaded": False}
     return {
-        "model_type": "MockPredictor",
-        "version": "1.0.0",
-        "training_date": "2024-01-01",
-        "known_courses": len(MOCK_COURSE_DATA),
-        "features": ["historical_pass_rate", "student_feedback", "course_level"],
+        "model_type": model.meta["model_type"],
+        "version": model.version,
+        "training_date": model.meta["training_date"],
+        "training_source": model.meta["training_source"],
+        "known_courses": model.meta["known_courses"],
+        "features": model.meta["features"],
+        "cv_mean_absolute_error": model.meta["cv_mean_absolute_error"],
+        "model_loaded": True,
     }
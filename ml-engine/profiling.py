@@ -0,0 +1,310 @@
+"""
+Request profiling (same mechanism as the main backend's).
+
+Inference worker processes (``inference_workers`` > 0) are not sampled;
+their time shows up as the API process waiting on the batcher.
+
+On demand: a request carrying ``profiling_token`` in the ``X-Profile``
+header (or the ``profile`` query parameter, which access logs record) is
+profiled with pyinstrument. Only that request's task is recorded, not
+concurrent requests. The profile is saved under ``profiling_dir`` in
+speedscope format (https://www.speedscope.app); its name is returned in
+the ``X-Profile-File`` response header and it can be downloaded from
+``GET /debug/profiles/{name}``.
+
+Sampling: a background thread samples every thread's stack each
+``profiling_sample_interval_ms`` and attributes event loop samples to the
+endpoint whose request task was running. Every ``profiling_flush_seconds``
+the aggregated samples are written to ``profiling_dir`` as folded stacks
+(one ``endpoint;frame;frame count`` line per distinct stack, the input of
+flamegraph.pl and speedscope). Idle samples (threads waiting for work) are
+dropped. ``profiling_sampling`` sets the state at startup;
+``POST /debug/profiling?sampling=true|false`` toggles it at runtime.
+
+The debug endpoints require the token in the ``X-Profile`` header and do
+not exist while no token is configured.
+"""
+
+import asyncio
+import glob
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_PARAMETER = "profile"
+PROFILE_SUFFIX = ".speedscope.json"
+SAMPLES_SUFFIX = ".folded"
+# Leaf frames (file, function) of threads waiting for work: the event
+# loop polling (asyncio, or uvloop's C loop), lock/condition waits and
+# executor workers blocked on their queue
+_IDLE_FRAMES = frozenset({
+    ("selectors.py", "select"),
+    ("runners.py", "run"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+})
+# Requests to these paths are never profiled on demand
+_DEBUG_PATH_PREFIX = "/debug/"
+_UNSAFE_NAME_CHARACTERS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _timestamp() -> str:
+    return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+
+
+def _prune(suffix: str) -> None:
+    """Delete all but the newest ``profiling_keep_files`` files with ``suffix``."""
+    paths = sorted(glob.glob(os.path.join(settings.profiling_dir, f"*{suffix}")))
+    for path in paths[:-settings.profiling_keep_files]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _endpoint(scope: Dict[str, Any]) -> str:
+    """The request's route template (or its path, before routing)."""
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+def _fold(frame) -> Optional[str]:
+    """A stack as ``;``-joined frames, outermost first; None when idle."""
+    if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES:
+        return None
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    frames.reverse()
+    return ";".join(frames)
+
+
+class StackSampler:
+    """Samples all threads' stacks and periodically writes them as folded stacks."""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        # Request tasks on the event loop and their ASGI scopes
+        self._requests: Dict[asyncio.Task, Dict[str, Any]] = {}
+        self._samples: Counter = Counter()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start sampling; must be called from the event loop's thread."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+        self._thread.start()
+        logger.info("Sampling profiler started")
+
+    def stop(self) -> None:
+        """Stop sampling and write the samples collected so far."""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        self._requests.clear()
+        logger.info("Sampling profiler stopped")
+
+    def track(self, task: asyncio.Task, scope: Dict[str, Any]) -> None:
+        self._requests[task] = scope
+
+    def untrack(self, task: asyncio.Task) -> None:
+        self._requests.pop(task, None)
+
+    def _run(self) -> None:
+        interval = settings.profiling_sample_interval_ms / 1000
+        flush_at = time.monotonic() + settings.profiling_flush_seconds
+        while not self._stopping.wait(interval):
+            self._sample()
+            if time.monotonic() >= flush_at:
+                self._flush()
+                flush_at = time.monotonic() + settings.profiling_flush_seconds
+        self._flush()
+
+    def _sample(self) -> None:
+        own_thread_id = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        # Reading another thread's current task is a plain dict lookup
+        task = asyncio.current_task(self._loop)
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread_id:
+                continue
+            stack = _fold(frame)
+            if stack is None:
+                continue
+            if thread_id == self._loop_thread_id:
+                scope = self._requests.get(task) if task is not None else None
+                label = _endpoint(scope) if scope is not None else "(event loop)"
+            else:
+                label = f"(thread {thread_names.get(thread_id, thread_id)})"
+            self._samples[f"{label};{stack}"] += 1
+
+    def _flush(self) -> None:
+        samples, self._samples = self._samples, Counter()
+        if not samples:
+            return
+        path = os.path.join(settings.profiling_dir, f"samples-{_timestamp()}{SAMPLES_SUFFIX}")
+        try:
+            os.makedirs(settings.profiling_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as file:
+                for stack, count in samples.most_common():
+                    file.write(f"{stack} {count}\n")
+            _prune(SAMPLES_SUFFIX)
+        except OSError:
+            logger.exception("Cannot write profiling samples to %s", path)
+
+
+sampler = StackSampler()
+
+
+def _token_matches(candidate: Optional[str]) -> bool:
+    return bool(settings.profiling_token) and candidate is not None and hmac.compare_digest(
+        candidate.encode("utf-8"), settings.profiling_token.encode("utf-8")
+    )
+
+
+def _requested_token(scope: Dict[str, Any]) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER.encode("latin-1"):
+            return value.decode("latin-1")
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(PROFILE_QUERY_PARAMETER)
+    return values[0] if values else None
+
+
+def _save_profile(profiler, path: str) -> None:
+    from pyinstrument.renderers import SpeedscopeRenderer
+    os.makedirs(settings.profiling_dir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(profiler.output(SpeedscopeRenderer()))
+    _prune(PROFILE_SUFFIX)
+
+
+class ProfilingMiddleware:
+    """Attributes requests for the sampler and profiles requests that ask for it."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        if sampler.running:
+            sampler.track(task, scope)
+        try:
+            if (
+                settings.profiling_token
+                and not scope["path"].startswith(_DEBUG_PATH_PREFIX)
+                and _token_matches(_requested_token(scope))
+            ):
+                await self._profile(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            sampler.untrack(task)
+
+    async def _profile(self, scope, receive, send) -> None:
+        from pyinstrument import Profiler
+
+        name = _UNSAFE_NAME_CHARACTERS.sub(
+            "_", f"{_timestamp()}-{scope['method']}-{scope['path'].strip('/')}-{uuid.uuid4().hex[:8]}"
+        ) + PROFILE_SUFFIX
+
+        async def send_with_profile_name(message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-file", name.encode())]}
+            await send(message)
+
+        profiler = Profiler(interval=settings.profiling_interval_ms / 1000, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_name)
+        finally:
+            profiler.stop()
+            path = os.path.join(settings.profiling_dir, name)
+            try:
+                await asyncio.to_thread(_save_profile, profiler, path)
+                logger.info("Saved request profile %s", path)
+            except OSError:
+                logger.exception("Cannot write request profile %s", path)
+
+
+def _require_token(token: Optional[str]) -> None:
+    if not _token_matches(token):
+        raise HTTPException(status_code=403, detail="Profiling token required")
+
+
+async def get_profiling_status(x_profile: Optional[str] = Header(None)) -> Dict[str, Any]:
+    """Sampling profiler state."""
+    _require_token(x_profile)
+    return {
+        "sampling": sampler.running,
+        "sample_interval_ms": settings.profiling_sample_interval_ms,
+        "flush_seconds": settings.profiling_flush_seconds,
+        "directory": os.path.abspath(settings.profiling_dir),
+    }
+
+
+async def set_profiling(sampling: bool, x_profile: Optional[str] = Header(None)) -> Dict[str, Any]:
+    """Start or stop the sampling profiler."""
+    _require_token(x_profile)
+    if sampling:
+        sampler.start()
+    else:
+        await asyncio.to_thread(sampler.stop)
+    return await get_profiling_status(x_profile)
+
+
+async def download_profile(name: str, x_profile: Optional[str] = Header(None)) -> FileResponse:
+    """A saved request profile or samples file."""
+    _require_token(x_profile)
+    path = os.path.join(settings.profiling_dir, name)
+    if (
+        os.path.basename(name) != name
+        or not name.endswith((PROFILE_SUFFIX, SAMPLES_SUFFIX))
+        or not os.path.isfile(path)
+    ):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name)
+
+
+def setup_profiling(app: FastAPI) -> None:
+    """Add the profiling middleware and, when a token is configured, the debug endpoints."""
+    app.add_middleware(ProfilingMiddleware)
+    if not settings.profiling_token:
+        return
+    app.add_api_route("/debug/profiling", get_profiling_status, methods=["GET"], include_in_schema=False)
+    app.add_api_route("/debug/profiling", set_profiling, methods=["POST"], include_in_schema=False)
+    app.add_api_route("/debug/profiles/{name}", download_profile, methods=["GET"], include_in_schema=False)
@@ -0,0 +1,93 @@
+"""
+Model registry and hot reload.
+
+Artifacts live in versioned directories under ``predictor.MODEL_DIR`` with
+``CURRENT`` naming the version to serve. A reload loads the new version
+in a worker thread and swaps it in atomically; requests keep being served
+by the previous model meanwhile. Reloads are triggered through
+``/models/reload`` or by a watcher that notices ``CURRENT`` changing (for
+example after ``training.py`` finished).
+"""
+
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import predictor
+from config import get_settings
+from metrics import ACTIVE_MODEL, MODEL_RELOADS
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Loads and activates model versions from the registry directory."""
+
+    def __init__(self, model_dir: str = predictor.MODEL_DIR):
+        self.model_dir = model_dir
+        self._lock = asyncio.Lock()
+        self._active_version: Optional[str] = None
+
+    @property
+    def active_version(self) -> Optional[str]:
+        return self._active_version
+
+    def versions(self) -> list:
+        return predictor.list_versions(self.model_dir)
+
+    async def reload(self, version: Optional[str] = None) -> predictor.CourseModel:
+        """
+        Load a version (default: the one named by CURRENT) and make it active.
+
+        Selecting an explicit version also points CURRENT at it, so the
+        choice survives restarts and the watcher does not revert it.
+
+        Raises:
+            ValueError: If the version is not in the registry
+            predictor.ModelUnavailableError: If the artifact cannot be loaded
+        """
+        async with self._lock:
+            if version is not None and version not in self.versions():
+                raise ValueError(f"Unknown model version: {version}")
+            try:
+                model = await asyncio.to_thread(predictor.load_model, version, self.model_dir)
+            except predictor.ModelUnavailableError:
+                MODEL_RELOADS.labels(outcome="failed").inc()
+                raise
+            if version is not None:
+                await asyncio.to_thread(predictor.set_current_version, version, self.model_dir)
+
+            if self._active_version is not None:
+                ACTIVE_MODEL.labels(version=self._active_version).set(0)
+            self._active_version = model.version
+            ACTIVE_MODEL.labels(version=model.version).set(1)
+            MODEL_RELOADS.labels(outcome="ok").inc()
+            logger.info("Serving model %s", model.version)
+            return model
+
+    def _current_marker(self):
+        try:
+            stat = os.stat(os.path.join(self.model_dir, predictor.CURRENT_FILE))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def watch(self) -> None:
+        """Reload whenever CURRENT changes, polling at the configured interval."""
+        marker = self._current_marker()
+        while True:
+            await asyncio.sleep(settings.model_watch_interval_seconds)
+            new_marker = self._current_marker()
+            if new_marker == marker:
+                continue
+            marker = new_marker
+            try:
+                if predictor.current_version(self.model_dir) != self._active_version:
+                    await self.reload()
+            except Exception:
+                logger.exception("Model reload after CURRENT changed failed")
+
+
+registry = ModelRegistry()
@@ -0,0 +1,49 @@
+"""
+Distributed tracing setup (OpenTelemetry).
+
+Incoming requests continue the trace context propagated by the main
+backend, so predictions show up under the optimization job's trace.
+"""
+
+from fastapi import FastAPI
+from opentelemetry import trace
+
+from config import get_settings
+
+settings = get_settings()
+
+tracer = trace.get_tracer("schedulus.ml_engine")
+
+
+def setup_tracing(app: FastAPI) -> None:
+    """
+    Configure the tracer provider and instrument the app.
+
+    Does nothing when ``tracing_exporter`` is ``"none"``.
+    """
+    if settings.tracing_exporter == "none":
+        return
+
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    elif settings.tracing_exporter == "file":
+        exporter = ConsoleSpanExporter(
+            out=open(settings.tracing_file_path, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    else:
+        raise ValueError(f"Unknown tracing exporter: {settings.tracing_exporter}")
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name})
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="/metrics,/health")